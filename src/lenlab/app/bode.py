@@ -1,11 +1,11 @@
 from pathlib import Path
-from typing import TextIO
+from typing import BinaryIO, TextIO
 
 import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.colors import TABLEAU_COLORS
 from PySide6.QtCharts import QChart, QChartView, QLineSeries, QLogValueAxis, QValueAxis
-from PySide6.QtCore import QObject, Qt, Slot
+from PySide6.QtCore import QObject, QPointF, Qt, Slot
 from PySide6.QtGui import QColor, QPainter, QPen
 from PySide6.QtWidgets import (
     QComboBox,
@@ -17,11 +17,12 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from ..controller.csv import CSVTemplate
+from ..controller.csv import CSVTemplate, open_csv
 from ..controller.lenlab import Lenlab
 from ..controller.signal import sine_table
 from ..launchpad.protocol import command
 from ..message import Message
+from ..model.session import Session, is_session
 from ..translate import Translate, tr
 from .save_as import SaveAs
 
@@ -188,17 +189,26 @@ class BodeWidget(QWidget):
         amplitude = 1.5 - 0.1 * self.amplitude.currentIndex()
         self.bode.start(step, amplitude)
 
+    def view(self, session: Session):
+        if not self.bode.active:
+            self.bode.load_session(session)
+
     @Slot()
     def on_save_as_clicked(self):
         dialog = SaveAs(self)
         dialog.setWindowTitle(tr("Save bode plot", "Bode-Plot speichern"))
         dialog.set_default_file_name("lenlab_bode.csv")
+        dialog.set_data_filters()
         dialog.on_save_as = self.on_save_as
         dialog.open()
 
     def on_save_as(self, file_path: Path):
-        with file_path.open("w", encoding="utf-8", newline="\n") as file:
-            self.bode.save_as(file)
+        if is_session(file_path):
+            with file_path.open("wb") as file:
+                self.bode.save_session(file)
+        else:
+            with open_csv(file_path) as file:
+                self.bode.save_as(file)
 
     @Slot()
     def on_save_image_clicked(self):
@@ -294,9 +304,32 @@ class BodePlotter(QObject):
 
     csv_template = CSVTemplate("bode_plot", "frequency", "magnitude", "phase", ".0f")
 
+    def get_rows(self) -> np.ndarray:
+        return np.array(list(self.rows()), dtype=np.double).reshape((-1, 3))
+
     def save_as(self, file: TextIO):
         file.write(self.csv_template.head())
-        self.csv_template.write_rows(file.write, self.rows())
+        self.csv_template.write_columns(file.write, *self.get_rows().T)
+
+    def save_session(self, file: BinaryIO):
+        # the measurement is complete, no appends
+        rows = self.get_rows()
+        Session(
+            "bode_plot",
+            {"step": self.step, "amplitude": self.amplitude},
+            {name: rows[:, i] for i, name in enumerate(self.csv_template.column_names)},
+        ).save(file)
+
+    def load_session(self, session: Session):
+        # a CSV file has no settings
+        self.step = session.settings.get("step", 1)
+        self.amplitude = session.settings.get("amplitude", 1.5)
+        frequency, magnitude, phase = (
+            np.asarray(session.columns[name], dtype=np.double)
+            for name in self.csv_template.column_names
+        )
+        self.magnitude.replace(list(map(QPointF, frequency, magnitude)))
+        self.phase.replace(list(map(QPointF, frequency, phase)))
 
     def save_image(self, file_path: Path):
         fig, ax = plt.subplots(figsize=[12.8, 9.6], dpi=150)
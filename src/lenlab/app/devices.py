@@ -0,0 +1,98 @@
+import numpy as np
+from PySide6.QtCore import Slot
+from PySide6.QtWidgets import (
+    QHeaderView,
+    QMainWindow,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+)
+
+from ..controller.registry import DeviceRegistry
+from ..controller.report import Report
+from ..message import Message
+from ..translate import tr
+from .window import MainWindow
+
+
+class DevicesWindow(QMainWindow):
+    """Aggregate view of all Launchpads in the registry.
+
+    A row shows the state and the last voltmeter values of a Launchpad.
+    The open button shows the main window with the instruments bound to this Launchpad.
+    """
+
+    def __init__(self, registry: DeviceRegistry, report: Report, rules: bool = False):
+        super().__init__()
+        self.registry = registry
+        self.report = report
+        self.rules = rules
+
+        self.rows: dict[str, int] = {}
+        self.windows: dict[str, MainWindow] = {}
+
+        labels = [
+            "Launchpad",
+            "Status",
+            tr("Channel 1", "Kanal 1"),
+            tr("Channel 2", "Kanal 2"),
+            "",
+        ]
+        self.table = QTableWidget(0, len(labels))
+        self.table.setHorizontalHeaderLabels(labels)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setHidden(True)
+        self.setCentralWidget(self.table)
+
+        self.registry.added.connect(self.on_added)
+
+        self.setWindowTitle("Lenlab Launchpads")
+
+    def set_text(self, serial_number: str, column: int, text: str):
+        self.table.setItem(self.rows[serial_number], column, QTableWidgetItem(text))
+
+    @Slot(str)
+    def on_added(self, serial_number: str):
+        lenlab = self.registry.devices[serial_number]
+
+        row = self.table.rowCount()
+        self.rows[serial_number] = row
+        self.table.insertRow(row)
+        self.set_text(serial_number, 0, serial_number)
+        self.set_text(serial_number, 1, tr("Connecting", "Verbinde"))
+
+        button = QPushButton(tr("Open", "Öffnen"))
+        button.clicked.connect(lambda: self.open_device(serial_number))
+        self.table.setCellWidget(row, 4, button)
+
+        lenlab.ready.connect(lambda ready: self.on_ready(serial_number, ready))
+        lenlab.error.connect(lambda error: self.on_error(serial_number, error))
+        lenlab.reply.connect(lambda reply: self.on_reply(serial_number, reply))
+
+    def on_ready(self, serial_number: str, ready: bool):
+        status = tr("Ready", "Bereit") if ready else tr("Not connected", "Nicht verbunden")
+        self.set_text(serial_number, 1, status)
+
+    def on_error(self, serial_number: str, error: Message):
+        self.set_text(serial_number, 1, str(error))
+
+    def on_reply(self, serial_number: str, reply: bytes):
+        # the last point of the voltmeter
+        if reply[0:2] != b"Lx" or len(reply) < 12:
+            return
+
+        point = np.frombuffer(reply, np.dtype("<u2"), count=2, offset=len(reply) - 4)
+        for i, value in enumerate(point):
+            self.set_text(serial_number, 2 + i, f"{value * 3.3 / 4095:.3f} V")
+
+    def open_device(self, serial_number: str) -> MainWindow:
+        if serial_number not in self.windows:
+            lenlab = self.registry.devices[serial_number]
+            window = MainWindow(lenlab, self.report, self.rules)
+            window.setWindowTitle(f"Lenlab {serial_number}")
+            self.windows[serial_number] = window
+
+        window = self.windows[serial_number]
+        window.show()
+        window.raise_()
+        return window
@@ -3,24 +3,32 @@ import logging
 import signal
 import sys
 from importlib import metadata
+from pathlib import Path
 from traceback import format_exception, format_exception_only
 
 from attrs import frozen
 from PySide6.QtCore import (
     QLibraryInfo,
     QLocale,
+    QSettings,
+    QStandardPaths,
     QSysInfo,
     QTimer,
     QTranslator,
 )
 from PySide6.QtWidgets import QApplication, QMessageBox
 
+from ..controller import flash
+from ..controller.csv import Compression
 from ..controller.lenlab import Lenlab
+from ..controller.reconnect import Reconnect
+from ..controller.registry import DeviceRegistry
 from ..controller.report import Report
 from ..language import Language
 from ..message import Message
 from ..queued import QueuedCall
 from ..translate import tr
+from .devices import DevicesWindow
 from .window import MainWindow
 
 logger = logging.getLogger(__name__)
@@ -83,12 +91,31 @@ class InterruptHandler:
 
 
 def main(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # headless commands
+    if argv[:1] == ["flash"]:
+        sys.exit(flash.main(argv[1:]))
+
+    # the offline viewer, without a Launchpad
+    view = argv[:1] == ["view"]
+    if view:
+        argv = argv[1:]
+
     app = QApplication()
 
     logging.basicConfig(level=logging.INFO)
 
     parser = argparse.ArgumentParser()
 
+    if view:
+        parser.add_argument(
+            "file",
+            type=Path,
+            help="CSV file, session, or recording of Lenlab to view",
+        )
+
     parser.add_argument(
         "--port",
         help="Launchpad port to connect to (skips discovery)",
@@ -105,11 +132,106 @@ def main(argv: list[str] | None = None) -> None:
         type=int,
         help="timeout for firmware replies in milliseconds, default %(default)s",
     )
+    parser.add_argument(
+        "--no-resync",
+        action="store_true",
+        help="fail on damaged firmware replies instead of skipping them",
+    )
+    parser.add_argument(
+        "--depth",
+        default=Lenlab.default_depth,
+        type=int,
+        help="commands in flight, default %(default)s, the firmware supports one",
+    )
+    parser.add_argument(
+        "--link-baud-rate",
+        default=0,
+        type=int,
+        help="negotiate the link mode with checksums at this baud rate, "
+        "the firmware does not support it yet",
+    )
+    parser.add_argument(
+        "--multi",
+        action="store_true",
+        help="connect to all attached Launchpads, one Lenlab per Launchpad",
+    )
+    parser.add_argument(
+        "--reconnect",
+        action="store_true",
+        help="reconnect automatically when the Launchpad vanishes or stops replying",
+    )
+    parser.add_argument(
+        "--io-thread",
+        action="store_true",
+        help="receive on a dedicated I/O thread, independent of the GUI event loop",
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        metavar="DIR",
+        help="record each voltmeter run to a memory-mapped file in this directory",
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        metavar="DIR",
+        help="journal the voltmeter replies in this directory for recovery after a crash, "
+        "default in the user data directory",
+    )
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="do not journal the voltmeter replies",
+    )
+    parser.add_argument(
+        "--compression-level",
+        default=Compression.level,
+        type=int,
+        choices=range(10),
+        metavar="N",
+        help="level of .csv.gz and .csv.xz files, 0 fast to 9 small, default %(default)s",
+    )
+    parser.add_argument(
+        "--simulator",
+        action="store_true",
+        help="connect to the software Launchpad simulator instead of a Launchpad",
+    )
+    parser.add_argument(
+        "--capture",
+        type=Path,
+        metavar="FILE",
+        help="record the raw serial traffic to a capture file",
+    )
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        metavar="FILE",
+        help="replay a capture file instead of connecting to a Launchpad",
+    )
+    parser.add_argument(
+        "--replay-fast",
+        action="store_true",
+        help="replay as fast as possible instead of at the original speed",
+    )
 
     args = parser.parse_args(argv)
 
+    if args.multi:
+        # one Lenlab per Launchpad, the options of a single Lenlab do not apply
+        single = ["port", "record", "journal", "simulator", "capture", "replay"]
+        for name in single:
+            if getattr(args, name):
+                parser.error(f"--multi does not support --{name}")
+
+    if view:
+        # one window without a Launchpad or a journal
+        args.multi = args.reconnect = False
+        args.no_journal = True
+
     report = Report()
 
+    Compression.level = args.compression_level
+
     logger.info(f"Lenlab {metadata.version('lenlab')}")
     logger.info(f"Python {sys.version}")
     logger.info(f"Python Virtual Environment {sys.prefix}")
@@ -118,7 +240,41 @@ def main(argv: list[str] | None = None) -> None:
     logger.info(f"Architecture {QSysInfo.currentCpuArchitecture()}")
     logger.info(f"Kernel {QSysInfo.prettyProductName()}")
 
-    lenlab = Lenlab(args.port, args.probe_timeout, args.reply_timeout)
+    if args.multi:
+        registry = DeviceRegistry(
+            probe_timeout=args.probe_timeout,
+            reply_timeout=args.reply_timeout,
+            resync=not args.no_resync,
+            io_thread=args.io_thread,
+            depth=args.depth,
+            link_baud_rate=args.link_baud_rate,
+        )
+        if args.reconnect:
+            # each Lenlab reconnects on its own
+            # one watcher for all boards
+            registry.added.connect(lambda sn: Reconnect(registry.devices[sn], registry.watcher))
+
+    else:
+        lenlab = Lenlab(
+            args.port,
+            args.probe_timeout,
+            args.reply_timeout,
+            not args.no_resync,
+            args.io_thread,
+            args.simulator,
+            args.capture,
+            args.replay,
+            not args.replay_fast,
+            args.depth,
+            args.link_baud_rate,
+            QSettings("Lenlab", "Lenlab"),
+            discover=not view,
+        )
+
+        if args.reconnect:
+            Reconnect(lenlab)  # a child of lenlab
+
+        app.aboutToQuit.connect(lenlab.discovery.close_capture)
 
     # Qt translations
     path = QLibraryInfo.path(QLibraryInfo.LibraryPath.TranslationsPath)
@@ -130,9 +286,25 @@ def main(argv: list[str] | None = None) -> None:
     if QLocale().language() == QLocale.Language.German:
         Language.language = "german"
 
-    window = MainWindow(lenlab, report, rules=sys.platform == "linux")
+    if args.multi:
+        window = DevicesWindow(registry, report, rules=sys.platform == "linux")
+        QueuedCall(registry, registry.scan)
+    else:
+        if args.no_journal:
+            journal_dir = None
+        elif args.journal:
+            journal_dir = args.journal
+        else:
+            location = QStandardPaths.StandardLocation.GenericDataLocation
+            journal_dir = Path(QStandardPaths.writableLocation(location)) / "Lenlab" / "journal"
+
+        window = MainWindow(lenlab, report, sys.platform == "linux", args.record, journal_dir)
+
     window.show()
 
+    if view:
+        QueuedCall(window, lambda: window.open_file(args.file))
+
     # Exception Handler
     ExceptionHandler(window).install()
 
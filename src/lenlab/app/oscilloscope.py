@@ -10,8 +10,10 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from ..controller.csv import open_csv
 from ..controller.image import save_image
 from ..controller.lenlab import Lenlab
+from ..model.session import Session, is_session
 from ..model.waveform import Waveform, WaveformChart
 from ..translate import Translate, tr
 from .chart import ChartWidget
@@ -120,6 +122,7 @@ class OscilloscopeWidget(QWidget):
 
         self.setLayout(main_layout)
 
+        self.lenlab.ready.connect(self.on_ready)
         self.lenlab.reply.connect(self.on_reply)
 
     def acquire(self):
@@ -129,6 +132,12 @@ class OscilloscopeWidget(QWidget):
 
         return False
 
+    @Slot(bool)
+    def on_ready(self, ready):
+        # an active oscilloscope continues after a reconnect
+        if ready and self.active:
+            self.active = self.acquire()
+
     @Slot()
     def on_start_clicked(self):
         if self.acquire():
@@ -153,33 +162,48 @@ class OscilloscopeWidget(QWidget):
 
     @Slot(bytes)
     def on_reply(self, reply):
-        if not (reply.startswith(b"La") or reply.startswith(b"Lb")):
+        code = reply[0:2]
+        if not (code == b"La" or code == b"Lb"):
             return
 
-        if reply.startswith(b"La"):
+        if code == b"La":
             self.lenlab.adc_lock.release()
 
         self.waveform = Waveform.parse_reply(reply)
         self.chart.draw(self.waveform.create_chart())
         self.rate_field.setText(self.format_rate(int(1 / self.waveform.time_step)))
 
-        if reply.startswith(b"La") and self.active:
+        if code == b"La" and self.active:
             self.active = self.acquire()
 
-        if reply.startswith(b"Lb"):
+        if code == b"Lb":
             self.bode.emit(self.waveform)
 
+    def view(self, session: Session):
+        self.active = False
+        self.waveform = Waveform.from_session(session)
+        self.chart.draw(self.waveform.create_chart())
+        if self.waveform.time_step:
+            self.rate_field.setText(self.format_rate(round(1 / self.waveform.time_step)))
+
+        self.signal.set_settings(session.settings)
+
     @Slot()
     def on_save_as_clicked(self):
         dialog = SaveAs(self)
         dialog.setWindowTitle(tr("Save oscilloscope data", "Oszilloskop-Daten speichern"))
         dialog.set_default_file_name("lenlab_osci.csv")
+        dialog.set_data_filters()
         dialog.on_save_as = self.on_save_as
         dialog.open()
 
     def on_save_as(self, file_path: Path):
-        with file_path.open("w", encoding="utf-8", newline="\n") as file:
-            self.waveform.save_as(file)
+        if is_session(file_path):
+            with file_path.open("wb") as file:
+                self.waveform.save_session(file, self.signal.get_settings())
+        else:
+            with open_csv(file_path) as file:
+                self.waveform.save_as(file)
 
     @Slot()
     def on_save_image_clicked(self):
@@ -18,6 +18,28 @@ class SaveAs(QFileDialog):
         self.selectFile(default_file_name)
         self.setDefaultSuffix(default_file_name.split(".")[-1])
 
+    # name filter and default suffix
+    data_filters = {
+        "CSV (*.csv)": "csv",
+        "CSV gzip (*.csv.gz)": "csv.gz",
+        "CSV xz (*.csv.xz)": "csv.xz",
+        "Lenlab session (*.lenlab-session)": "lenlab-session",
+    }
+
+    def set_data_filters(self):
+        # compressed CSV files and sessions by the suffix
+        self.setNameFilters(list(self.data_filters))
+        self.filterSelected.connect(self.on_filter_selected)
+
+    @Slot(str)
+    def on_filter_selected(self, name_filter: str):
+        if suffix := self.data_filters.get(name_filter):
+            self.setDefaultSuffix(suffix)
+            # the file name follows the filter
+            selected = self.selectedFiles()
+            if selected and (name := Path(selected[0]).name):
+                self.selectFile(f"{name.split('.')[0]}.{suffix}")
+
     def __init__(self, parent: QWidget):
         super().__init__(parent)
 
@@ -38,6 +60,31 @@ class SaveAs(QFileDialog):
             self.on_success()
 
 
+class OpenFile(QFileDialog):
+    on_open: Callable | None = None
+
+    # CSV files of Lenlab, compressed or not, sessions, and recordings
+    name_filters = [
+        "Lenlab (*.csv *.csv.gz *.csv.xz *.lenlab-session *.lenlab)",
+        "CSV (*.csv *.csv.gz *.csv.xz)",
+        "Lenlab session (*.lenlab-session)",
+        "Lenlab recording (*.lenlab)",
+    ]
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+
+        self.setFileMode(QFileDialog.FileMode.ExistingFile)
+        self.setAcceptMode(QFileDialog.AcceptMode.AcceptOpen)
+        self.setNameFilters(self.name_filters)
+        self.fileSelected.connect(self.on_file_selected)
+
+    @Slot(str)
+    def on_file_selected(self, file_name):
+        if self.on_open is not None:
+            self.on_open(Path(file_name))
+
+
 class UnsavedData(QMessageBox):
     on_cancel: Callable | None = None
     on_save: Callable | None = None
@@ -149,6 +149,24 @@ class SignalWidget(QWidget):
 
         self.setLayout(parameter_layout)
 
+    def get_settings(self) -> dict[str, int]:
+        # slider positions, the frequency is the index into the sine table
+        return {
+            "sine_index": self.frequency.slider.value(),
+            "amplitude": self.amplitude.slider.value(),
+            "harmonic": self.harmonic.slider.value(),
+        }
+
+    def set_settings(self, settings: dict[str, int]):
+        sliders = {
+            "sine_index": self.frequency.slider,
+            "amplitude": self.amplitude.slider,
+            "harmonic": self.harmonic.slider,
+        }
+        for name, slider in sliders.items():
+            if name in settings:
+                slider.setValue(settings[name])
+
     def create_command(self, code: bytes):
         frequency_hertz, interval_25ns, points = sine_table[self.frequency.get_value()]
 
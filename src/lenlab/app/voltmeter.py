@@ -9,6 +9,7 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QMessageBox,
     QPushButton,
     QVBoxLayout,
     QWidget,
@@ -16,6 +17,7 @@ from PySide6.QtWidgets import (
 
 from ..controller.auto_save import AutoSave, Flag
 from ..controller.image import save_image
+from ..controller.journal import discard_journal, find_journals
 from ..controller.lenlab import Lenlab
 from ..launchpad.protocol import command
 from ..message import Message
@@ -35,14 +37,20 @@ class VoltmeterWidget(QWidget):
     # TODO convert to seconds
     intervals = [20, 50, 100, 200, 500, 1000, 2000]
 
-    def __init__(self, lenlab: Lenlab):
+    def __init__(
+        self,
+        lenlab: Lenlab,
+        record_dir: Path | None = None,
+        journal_dir: Path | None = None,
+    ):
         super().__init__()
         self.lenlab = lenlab
 
         self.started = Flag()
         self.polling = Flag()
+        self.resume = False  # logging after a reconnect
 
-        self.auto_save = AutoSave()
+        self.auto_save = AutoSave(record_dir, journal_dir)
 
         # poll interval
         self.poll_timer = QTimer()
@@ -152,7 +160,7 @@ class VoltmeterWidget(QWidget):
         self.lenlab.reply.connect(self.on_reply)
 
     def clear(self):
-        if not self.auto_save.points.index:
+        if not self.auto_save.points.index and not self.auto_save.viewing:
             return
 
         self.auto_save.clear()
@@ -184,15 +192,29 @@ class VoltmeterWidget(QWidget):
 
     @Slot(bool)
     def on_ready(self, ready: bool):
+        if not ready:
+            # the connection broke, continue logging on the next ready
+            self.resume = bool(self.polling)
+            self.poll_timer.stop()
+
         self.started.set(False)
         self.polling.set(False)
 
+        if ready and self.resume:
+            self.resume = False
+            logger.info("resume logging")
+            self.on_start_clicked()
+
     @Slot()
     def on_start_clicked(self):
         if self.started or self.polling:
             return
 
         if self.lenlab.adc_lock.acquire():
+            # the points of a file, start clears them
+            if self.auto_save.viewing:
+                self.clear()
+
             index = self.interval.currentIndex()
             interval_25ns = self.intervals[index] * 40_000
             self.started.set(True)
@@ -219,12 +241,14 @@ class VoltmeterWidget(QWidget):
     def on_reply(self, reply):
         points = self.auto_save.points
 
-        if reply.startswith(b"Lv"):  # start
+        if reply[0:2] == b"Lv":  # start
             interval_25ns = int.from_bytes(reply[4:8], byteorder="little")
             interval = interval_25ns / 40_000_000
 
             points.interval = interval
             self.interval.setEnabled(False)
+            self.auto_save.start_recording()
+            self.auto_save.write_journal(reply)
 
             if self.polling:  # no very quick stop pending
                 interval_ms = max(200, interval_25ns // 40_000)
@@ -233,11 +257,12 @@ class VoltmeterWidget(QWidget):
             logger.debug("started")
             self.poll_timer.start()
 
-        elif reply.startswith(b"Lx"):  # new points
+        elif reply[0:2] == b"Lx":  # new points
             length = int.from_bytes(reply[2:4], byteorder="little")
             polling = int.from_bytes(reply[4:8], byteorder="little")
 
             if length:
+                self.auto_save.write_journal(reply)
                 points.parse_reply(reply)
                 self.draw(points)
 
@@ -246,13 +271,76 @@ class VoltmeterWidget(QWidget):
             else:  # stop
                 self.lenlab.adc_lock.release()
                 self.started.set(False)
+                self.auto_save.sync_journal()
                 self.auto_save.save_update(buffered=False)
                 logger.debug("stopped")
 
+    @Slot()
+    def offer_recovery(self):
+        if not self.auto_save.journal_dir or self.auto_save.points.index:
+            return
+
+        journals = find_journals(self.auto_save.journal_dir)
+        if not journals:
+            return
+
+        # the newest, the others on the next start
+        file_path = journals[0]
+        dialog = QMessageBox(self)
+        dialog.setWindowTitle(tr("Recover voltmeter data", "Voltmeter-Daten wiederherstellen"))
+        dialog.setIcon(QMessageBox.Icon.Question)
+        dialog.setText(RecoveryMessage(file_path.name).long_form())
+        dialog.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        dialog.finished.connect(
+            lambda result: self.on_recovery_finished(
+                file_path, result == QMessageBox.StandardButton.Yes
+            )
+        )
+        dialog.open()
+
+    def on_recovery_finished(self, file_path: Path, recover: bool):
+        if recover:
+            self.recover(file_path)
+        else:
+            discard_journal(file_path)
+
+    def recover(self, file_path: Path):
+        self.auto_save.recover(file_path)
+        points = self.auto_save.points
+        if points.index:
+            self.interval.setEnabled(False)
+            self.draw(points)
+
+    def view(self, points: Points):
+        if self.started:
+            return
+
+        if self.auto_save.points.unsaved:
+            dialog = self.create_unsaved_data_dialog()
+            dialog.on_save = lambda: self.on_save_as_and_view(points)
+            dialog.on_discard = lambda: self.show_points(points)
+            dialog.open()
+        else:
+            self.show_points(points)
+
+    def on_save_as_and_view(self, points: Points):
+        dialog = self.create_save_as_dialog()
+        dialog.on_save_as = self.auto_save.save_as
+        dialog.on_success = lambda: self.show_points(points)
+        dialog.open()
+
+    def show_points(self, points: Points):
+        self.clear()
+        self.auto_save.view(points)
+        if points.index:
+            self.interval.setEnabled(False)
+            self.draw(points)
+
     def create_save_as_dialog(self) -> SaveAs:
         dialog = SaveAs(self)
         dialog.setWindowTitle(tr("Save voltmeter data", "Voltmeter-Daten speichern"))
         dialog.set_default_file_name("lenlab_volt.csv")
+        dialog.set_data_filters()
         return dialog
 
     def create_unsaved_data_dialog(self) -> UnsavedData:
@@ -311,6 +399,10 @@ class VoltmeterWidget(QWidget):
             dialog.on_save = self.on_save_as_and_close
             dialog.on_discard = self.on_discard_and_close
             dialog.open()
+        else:
+            # a clean close, nothing to recover
+            self.auto_save.stop_writer()
+            self.auto_save.discard_journal()
 
     def on_discard_and_close(self):
         self.on_stop_clicked()
@@ -335,6 +427,14 @@ class RunningAndUnsavedMessage(Message):
     Möchten Sie die Messung beenden und die Daten speichern?"""
 
 
+class RecoveryMessage(Message):
+    english = """Lenlab did not close properly and the voltmeter journal {0} remains.
+    Do you want to recover the voltmeter data? Otherwise, Lenlab deletes the journal."""
+
+    german = """Lenlab wurde nicht richtig beendet und das Voltmeter-Journal {0} ist noch da.
+    Möchten Sie die Voltmeter-Daten wiederherstellen? Andernfalls löscht Lenlab das Journal."""
+
+
 class UnsavedMessage(Message):
     english = """The voltmeter has unsaved data.
     Do you want to save the data?"""
@@ -2,10 +2,14 @@ from pathlib import Path
 
 from PySide6.QtCore import Slot
 from PySide6.QtGui import QAction, QCloseEvent
-from PySide6.QtWidgets import QMainWindow, QTabWidget, QVBoxLayout, QWidget
+from PySide6.QtWidgets import QMainWindow, QMessageBox, QTabWidget, QVBoxLayout, QWidget
 
 from ..controller.lenlab import Lenlab
+from ..controller.reader import read_file
 from ..controller.report import Report
+from ..message import Message
+from ..model.points import Points
+from ..queued import QueuedCall
 from ..translate import tr
 from .about import About
 from .bode import BodeWidget
@@ -13,12 +17,19 @@ from .figure import LaunchpadWidget, LitoWidget
 from .oscilloscope import OscilloscopeWidget
 from .poster import PosterWidget
 from .programmer import ProgrammerWidget
-from .save_as import SaveAs
+from .save_as import OpenFile, SaveAs
 from .voltmeter import VoltmeterWidget
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, lenlab: Lenlab, report: Report, rules: bool = False):
+    def __init__(
+        self,
+        lenlab: Lenlab,
+        report: Report,
+        rules: bool = False,
+        record_dir: Path | None = None,
+        journal_dir: Path | None = None,
+    ):
         super().__init__()
         self.lenlab = lenlab
         self.report = report
@@ -40,17 +51,20 @@ class MainWindow(QMainWindow):
             LaunchpadWidget(),
             LitoWidget(),
             prog := ProgrammerWidget(lenlab.discovery),
-            volt := VoltmeterWidget(lenlab),
+            volt := VoltmeterWidget(lenlab, record_dir, journal_dir),
             osci := OscilloscopeWidget(lenlab),
             bode := BodeWidget(lenlab),
             about := About(),
         ]
 
         self.voltmeter = volt
+        self.oscilloscope = osci
+        self.bode = bode
+        QueuedCall(volt, volt.offer_recovery)
 
         osci.bode.connect(bode.bode.on_bode)
 
-        tab_widget = QTabWidget()
+        self.tab_widget = tab_widget = QTabWidget()
         # tab_widget.setDocumentMode(True)  # no frame around pages
         for tab in self.tabs:
             tab_widget.addTab(tab, str(tab.title))
@@ -69,6 +83,10 @@ class MainWindow(QMainWindow):
 
         menu = menu_bar.addMenu("&Lenlab")
 
+        self.open_action = QAction(tr("Open", "Öffnen"), self)
+        self.open_action.triggered.connect(self.open_triggered)
+        menu.addAction(self.open_action)
+
         self.report_action = QAction(tr("Save error report", "Fehlerbericht speichern"), self)
         self.report_action.triggered.connect(self.save_report_triggered)
         menu.addAction(self.report_action)
@@ -87,6 +105,33 @@ class MainWindow(QMainWindow):
         # title
         self.setWindowTitle("Lenlab")
 
+    @Slot()
+    def open_triggered(self):
+        dialog = OpenFile(self)
+        dialog.setWindowTitle(tr("Open Lenlab data", "Lenlab-Daten öffnen"))
+        dialog.on_open = self.open_file
+        dialog.open()
+
+    def open_file(self, file_path: Path):
+        try:
+            data = read_file(file_path)
+        except Message as error:
+            dialog = QMessageBox(self)
+            dialog.setWindowTitle(tr("Open Lenlab data", "Lenlab-Daten öffnen"))
+            dialog.setIcon(QMessageBox.Icon.Warning)
+            dialog.setText(error.long_form())
+            dialog.open()
+            return
+        if isinstance(data, Points):
+            widget = self.voltmeter
+        elif data.kind == "oscilloscope":
+            widget = self.oscilloscope
+        else:
+            widget = self.bode
+
+        widget.view(data)
+        self.tab_widget.setCurrentWidget(widget)
+
     @Slot()
     def save_report_triggered(self):
         dialog = SaveAs(self)
@@ -1,8 +1,18 @@
+import logging
+from datetime import datetime
 from pathlib import Path
 
+import numpy as np
 from PySide6.QtCore import QObject, Signal, Slot
 
+from ..message import Message
 from ..model.points import Points
+from ..model.session import is_session
+from .csv import open_csv
+from .csv_writer import CSVWriter, SessionWriter
+from .journal import Journal, JournalError, read_journal
+
+logger = logging.getLogger(__name__)
 
 
 class Flag(QObject):
@@ -46,29 +56,143 @@ class PathProperty(QObject):
 class AutoSave(QObject):
     points: Points
 
-    def __init__(self):
+    backlog = Signal(int)  # rows not in the file yet
+
+    # the policy of the writer, 0 on each batch, None leaves the sync to the operating system
+    flush_interval = 1.0  # seconds
+    sync_interval: float | None = 30.0  # seconds
+
+    def __init__(self, record_dir: Path | None = None, journal_dir: Path | None = None):
         super().__init__()
-        self.points = Points()
+        # the codes take a quarter of the memory of volts
+        self.points = Points(codes=True)
+
+        # record each run to a memory-mapped file in this directory
+        self.record_dir = record_dir
+
+        # journal the replies in this directory for recovery after a crash
+        self.journal_dir = journal_dir
+        self.journal: Journal | None = None
 
         self.auto_save = Flag()
         self.auto_save.changed.connect(self.on_auto_save_changed)
 
         self.file_path = PathProperty()
 
-    def clear(self):
-        self.points.clear()
+        # the points of a file, read-only maps or volts, a measurement needs new points
+        self.viewing = False
+
+        # appends to the file on a writer thread during auto save
+        self.writer: CSVWriter | None = None
+        self.writer_idx = 0  # the first row of the writer
 
+    def clear(self):
         self.auto_save.set(False)
+        if self.viewing:
+            self.viewing = False
+            self.points = Points(codes=True)
+        else:
+            self.points.clear()
+
+        self.discard_journal()
+
         self.file_path.set(None)
 
     @Slot(bool)
     def on_auto_save_changed(self, auto_save: bool):
         if auto_save:
             self.save_update(buffered=False)
+        else:
+            self.stop_writer()
+
+    def start_writer(self):
+        policy = {"flush_interval": self.flush_interval, "sync_interval": self.sync_interval}
+        if is_session(self.file_path.value):
+            self.writer = SessionWriter(self.file_path.value, **policy)
+        else:
+            self.writer = CSVWriter(self.file_path.value, self.points.csv_template, **policy)
+
+        self.writer_idx = self.points.save_idx
+
+        self.writer.error.connect(self.on_writer_error)
+        self.writer.backlog.connect(self.backlog)
+        self.writer.start()
+
+    def stop_writer(self):
+        """Write the rows in the queue and close the file."""
+        if self.writer:
+            self.writer.stop()
+            self.writer = None
+
+    def join(self):
+        """Wait for the writer."""
+        if self.writer:
+            self.writer.join()
+
+    @Slot(Message)
+    def on_writer_error(self, error: Message):
+        # the file misses the rows after the last batch the writer wrote
+        if self.writer:
+            self.writer.stop()
+            self.points.save_idx = self.writer_idx + self.writer.written
+
+        self.points.unsaved = True
+        self.auto_save.set(False)
+        raise error
+
+    def start_recording(self):
+        if not self.record_dir or self.points.recording:
+            return
+
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        file_path = self.record_dir / f"voltmeter_{datetime.now():%Y%m%d_%H%M%S}.lenlab"
+        logger.info(f"record to {file_path}")
+        self.points.record(file_path)
+
+    def write_journal(self, reply: bytes):
+        if not self.journal_dir:
+            return
+
+        try:
+            if self.journal is None:
+                self.journal = Journal.create(self.journal_dir)
+
+            self.journal.append(reply)
+        except JournalError as error:
+            # the measurement continues without the journal
+            logger.error(error)
+            self.journal_dir = None
+
+    def sync_journal(self):
+        if self.journal:
+            self.journal.sync()
+
+    def discard_journal(self):
+        if self.journal:
+            self.journal.discard()
+            self.journal = None
+
+    def recover(self, file_path: Path):
+        """Rebuild the points from the journal of a crashed Lenlab and continue it."""
+        self.clear()
+        self.points, size = read_journal(file_path)
+        self.journal = Journal.open(file_path, size)
+
+    def view(self, points: Points):
+        """Show the points of a file."""
+        self.clear()
+        self.points = points
+        self.viewing = True
 
     def save_as(self, file_path: Path):
-        with file_path.open("w", encoding="utf-8", newline="\n") as file:
-            self.points.save_as(file)
+        # the writer finishes the old file
+        self.stop_writer()
+        if is_session(file_path):
+            with file_path.open("w+b") as file:
+                self.points.save_session(file)
+        else:
+            with open_csv(file_path) as file:
+                self.points.save_as(file)
 
         self.file_path.set(file_path)
 
@@ -81,6 +205,21 @@ class AutoSave(QObject):
             if self.points.index < self.points.save_idx + n:
                 return
 
-        file_path: Path = self.file_path.value
-        with file_path.open("a", encoding="utf-8", newline="\n") as file:
-            self.points.save_update(file)
+        if self.writer is None:
+            self.start_writer()
+
+        points = self.points
+        if isinstance(self.writer, SessionWriter):
+            blocks = ((rows,) for rows in points.code_blocks(points.save_idx))
+        else:
+            blocks = points.blocks(points.save_idx)
+
+        for block in blocks:
+            # a copy, the channels might change before the writer formats the block
+            if not self.writer.put(tuple(np.array(values) for values in block)):
+                break  # the rows wait in the points for the next update
+
+            points.save_idx += block[0].shape[0]
+
+        points.unsaved = points.save_idx < points.index
+        self.backlog.emit(self.writer.pending + points.index - points.save_idx)
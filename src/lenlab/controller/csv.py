@@ -1,10 +1,103 @@
+import gzip
+import lzma
+import re
 from collections.abc import Callable, Iterable
 from importlib import metadata
-from typing import Any
+from pathlib import Path
+from typing import Any, TextIO
 
+import numpy as np
 from attrs import frozen
 
 
+class Compression:
+    """Level of the .csv.gz and .csv.xz files, from 0 (fast) to 9 (small)."""
+
+    level = 6
+
+
+def open_csv(file_path: Path, mode: str = "w") -> TextIO:
+    """Open a CSV file for writing, gzip or xz compressed by the suffix .gz or .xz.
+
+    Append adds a gzip member or an xz stream to the file. The readers of gzip and xz
+    read the concatenation as one text.
+    """
+    options = {"encoding": "utf-8", "newline": "\n"}
+    if file_path.name.endswith(".gz"):
+        return gzip.open(file_path, mode + "t", compresslevel=Compression.level, **options)
+    elif file_path.name.endswith(".xz"):
+        return lzma.open(file_path, mode + "t", preset=Compression.level, **options)
+    else:
+        return file_path.open(mode, **options)
+
+
+fixed_point_format = re.compile(r"\.(\d+)f")
+
+
+def get_decimals(format_spec: str) -> int | None:
+    match = fixed_point_format.fullmatch(format_spec)
+    return int(match.group(1)) if match else None
+
+
+def fixed_point(values: np.ndarray, decimals: int) -> np.ndarray | None:
+    """Magnitudes in units of the last decimal, rounded as the % operator rounds."""
+    scaled = np.abs(values * 10.0**decimals)
+    if not np.isfinite(scaled).all() or scaled.max(initial=0.0) >= 2.0**53:
+        return None
+
+    units = np.rint(scaled).astype(np.int64)
+
+    # the product is not exact, close to a tie the exact value might round the other way
+    fraction = scaled - np.floor(scaled)
+    tolerance = 4 * np.finfo(np.double).eps * np.maximum(scaled, 1.0)
+    ties = np.flatnonzero(np.abs(fraction - 0.5) <= tolerance)
+    if ties.shape[0]:
+        template = f"%.{decimals}f"
+        units[ties] = [int((template % abs(v)).replace(".", "")) for v in values[ties].tolist()]
+
+    return units
+
+
+def format_column(values: np.ndarray, decimals: int) -> np.ndarray | None:
+    """Characters of each value in fixed point, right-aligned, zeros in front.
+
+    The same characters as the % operator with ".{decimals}f" for finite values.
+    """
+    units = fixed_point(values, decimals)
+    if units is None:
+        return None
+
+    n_digits = max(len(str(units.max(initial=0))), decimals + 1)
+    point = 1 if decimals else 0
+    width = 1 + n_digits + point  # sign, digits, decimal point
+    chars = np.zeros((values.shape[0], width), np.uint8)
+
+    # digits from right to left, at least a zero in front of the decimal point
+    length = np.full(values.shape, decimals + 1)
+    rest = units.astype(np.uint32) if n_digits <= 9 else units  # faster division
+    column = width - 1
+    for k in range(n_digits):
+        if decimals and k == decimals:
+            chars[:, column] = ord(".")
+            column -= 1
+
+        if k <= decimals:
+            rest, digit = np.divmod(rest, 10)
+            chars[:, column] = digit + ord("0")
+        else:
+            significant = rest > 0
+            rest, digit = np.divmod(rest, 10)
+            chars[:, column] = np.where(significant, digit + ord("0"), 0)
+            length[significant] = k + 1
+
+        column -= 1
+
+    # the % operator keeps the sign of negative zero
+    negative = np.flatnonzero(np.signbit(values))
+    chars[negative, width - 1 - point - length[negative]] = ord("-")
+    return chars
+
+
 @frozen
 class CSVTemplate:
     name: str
@@ -17,6 +110,10 @@ class CSVTemplate:
     ch1_format: str = ".6f"
     ch2_format: str = ".6f"
 
+    @property
+    def column_names(self) -> tuple[str, str, str]:
+        return self.x, self.ch1, self.ch2
+
     def head(self) -> str:
         version = metadata.version("lenlab")
         return f"Lenlab_MSPM0,{version},{self.name}\n{self.x},{self.ch1},{self.ch2}\n"
@@ -28,3 +125,25 @@ class CSVTemplate:
         tpl = self.line_template()
         for row in rows:
             write(tpl % row)
+
+    block_size = 1 << 16  # rows
+
+    def write_columns(self, write: Callable[[str], Any], *columns: np.ndarray):
+        """Write the same text as write_rows, in blocks of rows at once."""
+        decimals = [get_decimals(f) for f in (self.x_format, self.ch1_format, self.ch2_format)]
+        columns = [np.asarray(column, dtype=np.double) for column in columns]
+        for begin in range(0, columns[0].shape[0], self.block_size):
+            block = [column[begin : begin + self.block_size] for column in columns]
+            fields = [
+                format_column(values, d) if d is not None else None
+                for values, d in zip(block, decimals, strict=True)
+            ]
+            if any(chars is None for chars in fields):
+                # not a number or a different format
+                self.write_rows(write, zip(*(values.tolist() for values in block), strict=True))
+                continue
+
+            comma = np.full((block[0].shape[0], 1), ord(","), np.uint8)
+            newline = np.full((block[0].shape[0], 1), ord("\n"), np.uint8)
+            chars = np.hstack((fields[0], comma, fields[1], comma, fields[2], newline))
+            write(chars[chars != 0].tobytes().decode("ascii"))
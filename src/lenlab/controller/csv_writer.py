@@ -0,0 +1,176 @@
+import io
+import logging
+import os
+import queue
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+
+from ..message import Message
+from ..model.session import SessionAppender
+from .csv import CSVTemplate, open_csv
+
+logger = logging.getLogger(__name__)
+
+
+class CSVWriter(QThread):
+    """Append blocks of rows to a CSV file on a writer thread.
+
+    The writer keeps the file open, formats the blocks in the queue in one batch, and
+    flushes and syncs the file at intervals. A full queue rejects a block instead of
+    waiting, the caller keeps the rows and offers them again later. A slow drive
+    delays the file, not the GUI.
+    """
+
+    error = Signal(Message)
+    backlog = Signal(int)  # rows in the queue, after each batch
+
+    max_batch_size = 1 << 16  # rows
+
+    def __init__(
+        self,
+        file_path: Path,
+        csv_template: CSVTemplate,
+        max_blocks: int = 64,
+        flush_interval: float = 1.0,
+        sync_interval: float | None = 30.0,
+    ):
+        super().__init__()
+        self.setObjectName(f"csv {file_path.name}")
+        self.file_path = file_path
+        self.csv_template = csv_template
+
+        # 0 flushes or syncs each batch, None leaves the sync to the operating system
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+
+        self.queue: queue.Queue[tuple[np.ndarray, ...] | None] = queue.Queue(max_blocks)
+        self.queued = 0  # rows, main thread
+        self.written = 0  # rows, writer thread
+        self.stopping = False  # writer thread
+
+    @property
+    def pending(self) -> int:
+        return self.queued - self.written
+
+    def put(self, block: tuple[np.ndarray, ...]) -> bool:
+        """Queue a block of columns, False if the queue is full."""
+        try:
+            self.queue.put_nowait(block)
+        except queue.Full:
+            logger.warning(f"{self.objectName()}: backlog of {self.pending} rows")
+            return False
+
+        self.queued += block[0].shape[0]
+        return True
+
+    def stop(self):
+        """Write the rows in the queue and close the file."""
+        if self.isRunning():
+            self.queue.put(None)
+            self.wait()
+
+    def join(self):
+        """Wait until the writer wrote the rows in the queue, it might not have flushed them."""
+        self.queue.join()
+
+    def run(self):
+        try:
+            with self.open() as file:
+                self.write_batches(file)
+        except OSError as error:
+            self.error.emit(CSVWriterError(self.file_path.name, error.strerror))
+            # discard the queue until stop
+            while not self.stopping:
+                self.stopping = self.queue.get() is None
+                self.queue.task_done()
+
+    def open(self):
+        return open_csv(self.file_path, "a")
+
+    def write_blocks(self, file: io.TextIOBase, blocks: list[tuple[np.ndarray, ...]]):
+        parts = []
+        for block in blocks:
+            self.csv_template.write_columns(parts.append, *block)
+
+        file.write("".join(parts))
+
+    def write_batches(self, file: io.TextIOBase):
+        flushed = synced = time.monotonic()
+        while True:
+            blocks = [self.queue.get()]
+            size = 0 if blocks[0] is None else blocks[0][0].shape[0]
+            while blocks[-1] is not None and size < self.max_batch_size:
+                try:
+                    blocks.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+                if blocks[-1] is not None:
+                    size += blocks[-1][0].shape[0]
+
+            stop = self.stopping = blocks[-1] is None
+            try:
+                self.write_blocks(file, blocks[:-1] if stop else blocks)
+                now = time.monotonic()
+                if stop or now >= flushed + self.flush_interval:
+                    file.flush()
+                    flushed = now
+
+                if self.sync_interval is not None and (stop or now >= synced + self.sync_interval):
+                    self.sync(file)
+                    synced = now
+            finally:
+                for _ in blocks:
+                    self.queue.task_done()
+
+            if size:
+                self.written += size
+                self.backlog.emit(self.pending)
+
+            if stop:
+                return
+
+    @staticmethod
+    def sync(file: io.TextIOBase):
+        with suppress(io.UnsupportedOperation):  # not a file on a disk
+            os.fsync(file.fileno())
+
+
+class SessionWriter(CSVWriter):
+    """Append blocks of raw rows to the last column of a session file.
+
+    Each block is a tuple of one array of rows. The rows field of the file follows
+    each batch.
+    """
+
+    def __init__(self, file_path: Path, **kwargs):
+        super().__init__(file_path, None, **kwargs)
+
+    @contextmanager
+    def open(self) -> Iterator[BinaryIO]:
+        with self.file_path.open("r+b") as file:
+            self.appender = SessionAppender(file)
+            yield file
+
+    def write_blocks(self, file: BinaryIO, blocks: list[tuple[np.ndarray, ...]]):
+        for (rows,) in blocks:
+            self.appender.append(rows)
+
+        self.appender.update()
+
+
+class CSVWriterError(Message):
+    english = """Error on automatic saving to {0}
+
+    {1}
+    """
+    german = """Fehler beim automatischen Speichern in {0}
+
+    {1}
+    """
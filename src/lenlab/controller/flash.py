@@ -0,0 +1,240 @@
+"""Headless flashing station
+
+`python -m lenlab flash` programs every attached Launchpad in BSL mode at once,
+one BootstrapLoader per port, and prints a line per Launchpad.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from importlib import resources
+from pathlib import Path
+
+from attrs import asdict, frozen
+from PySide6.QtCore import QCoreApplication, QElapsedTimer, QEventLoop, QObject, Signal, Slot
+
+import lenlab
+
+from ..launchpad.bsl import BootstrapLoader
+from ..launchpad.launchpad import find_launchpad, group_by_serial_number
+from ..launchpad.port_info import PortInfo
+from ..launchpad.simulator import BslSimulator
+from ..launchpad.terminal import Terminal
+from ..message import Message
+from ..queued import QueuedCall
+
+logger = logging.getLogger(__name__)
+
+
+@frozen
+class FlashResult:
+    serial_number: str
+    port_name: str
+    status: str  # verified, written, or the error message
+    success: bool
+    written: int  # bytes
+    duration: float  # seconds
+    phases: dict[str, float]  # duration in ms
+
+    @property
+    def throughput(self) -> float:
+        # KiB per second of the whole procedure
+        return self.written / 1024 / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self) | {"throughput": round(self.throughput, 3)}
+
+    def __str__(self):
+        text = (
+            f"{self.serial_number or '-'}  {self.port_name}  {self.status}  "
+            f"{self.written / 1024:.1f} KiB  {self.duration:.2f} s  {self.throughput:.1f} KiB/s"
+        )
+        if self.phases:
+            text += "  (" + ", ".join(f"{k} {v:.0f} ms" for k, v in self.phases.items()) + ")"
+
+        return text
+
+
+def find_boards() -> dict[str, list[Terminal]]:
+    """Terminals of the attached Launchpads by serial number.
+
+    Windows does not tell the ports of a Launchpad apart, the station tries both.
+    """
+    boards = group_by_serial_number(find_launchpad(PortInfo.available_ports()))
+    if sys.platform != "win32":
+        for port_infos in boards.values():
+            del port_infos[1:]
+
+    return {
+        serial_number: [Terminal.from_port_info(pi) for pi in port_infos]
+        for serial_number, port_infos in boards.items()
+    }
+
+
+class Board(QObject):
+    """Program one Launchpad, on each of its ports concurrently."""
+
+    finished = Signal(FlashResult)
+
+    def __init__(self, serial_number: str, terminals: list[Terminal]):
+        super().__init__()
+        self.serial_number = serial_number
+        self.terminals = terminals
+        self.bootstrap_loaders: list[BootstrapLoader] = []
+        self.error: Message | None = None
+        self.clock = QElapsedTimer()
+
+    def start(self, firmware: bytes):
+        self.clock.start()
+        for terminal in self.terminals:
+            # the reason of an open failure for the report, the BSL handles the later errors
+            terminal.error.connect(self.on_open_error)
+            opened = terminal.open()
+            terminal.error.disconnect(self.on_open_error)
+            if not opened:
+                continue
+
+            bsl = BootstrapLoader(terminal)
+            bsl.success.connect(self.on_success)
+            bsl.error.connect(self.on_error)
+            self.bootstrap_loaders.append(bsl)
+            bsl.start(firmware)
+
+        if not self.bootstrap_loaders:
+            self.finish(None)
+
+    def finish(self, bsl: BootstrapLoader | None):
+        # a slow port of the same Launchpad shall not report later
+        for other in self.bootstrap_loaders:
+            other.timer.stop()
+            other.success.disconnect(self.on_success)
+            other.error.disconnect(self.on_error)
+
+        for terminal in self.terminals:
+            terminal.close()
+
+        if bsl:
+            status = "verified" if bsl.verified else "written"
+        else:
+            status = str(self.error) if self.error else "no port"
+
+        result = FlashResult(
+            self.serial_number,
+            bsl.terminal.port_name if bsl else ", ".join(t.port_name for t in self.terminals),
+            status,
+            bool(bsl),
+            bsl.written if bsl else 0,
+            self.clock.elapsed() / 1000,
+            bsl.phases if bsl else {},
+        )
+        logger.info(f"{self.serial_number}: {status}")
+        self.finished.emit(result)
+
+    @Slot(Terminal)
+    def on_success(self, terminal: Terminal):
+        bsl = next(bsl for bsl in self.bootstrap_loaders if bsl.terminal is terminal)
+        self.finish(bsl)
+
+    @Slot(Message)
+    def on_open_error(self, error: Message):
+        # permission denied or busy in another program
+        self.error = error
+
+    @Slot(Message)
+    def on_error(self, error: Message):
+        # the other port of the Launchpad might succeed
+        self.error = error
+        if all(bsl.unsuccessful for bsl in self.bootstrap_loaders):
+            self.finish(None)
+
+
+class FlashStation(QObject):
+    """Program many Launchpads in parallel, without widgets."""
+
+    finished = Signal()
+
+    def __init__(self, boards: dict[str, list[Terminal]], firmware: bytes):
+        super().__init__()
+        self.firmware = firmware
+        self.boards = [Board(sn, terminals) for sn, terminals in boards.items()]
+        self.results: list[FlashResult] = []
+
+    @property
+    def success(self) -> bool:
+        return bool(self.results) and all(result.success for result in self.results)
+
+    @Slot()
+    def start(self):
+        if not self.boards:
+            self.finished.emit()
+            return
+
+        for board in self.boards:
+            board.finished.connect(self.on_finished)
+            board.start(self.firmware)
+
+    @Slot(FlashResult)
+    def on_finished(self, result: FlashResult):
+        self.results.append(result)
+        if len(self.results) == len(self.boards):
+            self.finished.emit()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="lenlab flash",
+        description="program all attached Launchpads in BSL mode in parallel",
+    )
+    parser.add_argument(
+        "--firmware",
+        type=Path,
+        metavar="FILE",
+        help="firmware binary, default the Lenlab firmware of this version",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the results as JSON",
+    )
+    parser.add_argument(
+        "--simulator",
+        default=0,
+        type=int,
+        metavar="N",
+        help="program N simulated Launchpads instead of the attached ones",
+    )
+
+    args = parser.parse_args(argv)
+
+    # no widgets, the reference keeps the application alive
+    _app = QCoreApplication.instance() or QCoreApplication()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.firmware:
+        firmware = args.firmware.read_bytes()
+    else:
+        firmware = (resources.files(lenlab) / "lenlab_fw.bin").read_bytes()
+
+    if args.simulator:
+        boards = {f"simulator{i}": [BslSimulator.create_terminal()] for i in range(args.simulator)}
+    else:
+        boards = find_boards()
+
+    if not boards:
+        print("No Launchpad found", file=sys.stderr)
+        return 1
+
+    station = FlashStation(boards, firmware)
+    loop = QEventLoop()
+    station.finished.connect(loop.quit)
+    QueuedCall(station, station.start)
+    loop.exec()
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in station.results], indent=2))
+    else:
+        for result in station.results:
+            print(result)
+
+    return 0 if station.success else 1
@@ -0,0 +1,101 @@
+import logging
+
+from PySide6.QtCore import (
+    QCoreApplication,
+    QMetaObject,
+    QObject,
+    Qt,
+    QThread,
+    QTimer,
+    Signal,
+    Slot,
+)
+
+from ..launchpad.terminal import Terminal
+
+logger = logging.getLogger(__name__)
+
+
+class IOWorker(QObject):
+    """Terminal and reply timer on the I/O thread.
+
+    The terminal's reply is a view of its receive buffer, which the I/O thread reuses.
+    The worker copies each reply once, before it crosses to the main thread.
+    """
+
+    reply = Signal(bytes)
+    timeout = Signal()
+
+    def __init__(self, terminal: Terminal):
+        super().__init__()
+        self.terminal = terminal
+        self.terminal.reply.connect(self.on_reply)
+
+        # the timer measures the reply time on the I/O thread
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.timeout)
+
+    @Slot(bytes)
+    def write(self, command: bytes):
+        self.terminal.write(command)
+
+    @Slot(int)
+    def watch(self, timeout: int):
+        # Lenlab knows the timeout of the oldest command in flight
+        if timeout:
+            self.timer.start(timeout)
+        else:
+            self.timer.stop()
+
+    @Slot()
+    def discard(self):
+        self.terminal.discard()
+
+    @Slot(bytes)
+    def on_reply(self, reply):
+        # ignore BSL replies
+        if reply[0:1] == b"L":
+            self.timer.stop()
+            self.reply.emit(bytes(reply))
+
+    @Slot()
+    def release(self):
+        # only the owning thread may push an object to another thread
+        self.timer.stop()
+        main_thread = QCoreApplication.instance().thread()
+        if self.terminal.thread() == QThread.currentThread():
+            self.terminal.moveToThread(main_thread)
+
+        self.moveToThread(main_thread)
+
+
+class IOThread:
+    """Serial I/O on a dedicated thread.
+
+    The terminal receives and frames the packets on the I/O thread, independent of
+    the GUI event loop. The replies reach the main thread through queued signals.
+    """
+
+    def __init__(self, terminal: Terminal):
+        self.thread = QThread()
+        self.thread.setObjectName(f"io {terminal.port_name}")
+        self.worker = IOWorker(terminal)
+
+    def start(self):
+        logger.info(f"start {self.thread.objectName()}")
+        self.thread.start()
+        self.worker.terminal.moveToThread(self.thread)
+        self.worker.moveToThread(self.thread)
+
+    def stop(self):
+        if self.thread.isRunning():
+            logger.info(f"stop {self.thread.objectName()}")
+            # the terminal returns to the main thread for discovery and cleanup
+            QMetaObject.invokeMethod(
+                self.worker, "release", Qt.ConnectionType.BlockingQueuedConnection
+            )
+            self.thread.quit()
+            self.thread.wait()
+
+        self.worker.deleteLater()
@@ -0,0 +1,207 @@
+"""Write-ahead journal of the voltmeter
+
+The voltmeter appends each raw logger reply (Lv and Lx) to the journal before it parses
+the reply. The journal syncs the file to the disk every few seconds and when the
+measurement stops. A clean close or discard deletes the journal. A journal, which is
+still there on the next start, belongs to a crashed Lenlab and holds the measurement.
+
+The file is the magic followed by the replies as received, each with its header of
+eight bytes. Recovery stops at the last complete reply.
+
+A lock file next to the journal tells the journals of a running Lenlab apart.
+"""
+
+import logging
+import mmap
+import os
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Self
+
+from PySide6.QtCore import QLockFile
+
+from ..message import Message
+from ..model.points import Points
+
+logger = logging.getLogger(__name__)
+
+magic = b"Lenlab journal\x00\x01"
+header_size = 8
+
+# parse the payloads of many replies at once
+batch_size = 1 << 20  # bytes
+
+
+def lock_file(path: Path) -> QLockFile:
+    return QLockFile(str(path.with_suffix(".lock")))
+
+
+class Journal:
+    sync_interval = 5.0  # seconds
+
+    def __init__(self, path: Path, file: BinaryIO, lock: QLockFile):
+        self.path = path
+        self.file = file
+        self.lock = lock
+        self.synced = time.monotonic()
+
+    @classmethod
+    def create(cls, directory: Path) -> Self:
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            raise JournalError(directory, error.strerror) from None
+
+        path = directory / f"voltmeter_{datetime.now():%Y%m%d_%H%M%S_%f}.journal"
+        journal = cls.open(path)
+        journal.file.write(magic)
+        journal.sync()
+        return journal
+
+    @classmethod
+    def open(cls, path: Path, size: int | None = None) -> Self:
+        """Continue a journal, after the first size bytes if given."""
+        lock = lock_file(path)
+        if not lock.tryLock(0):
+            raise JournalLocked(path.name)
+
+        try:
+            file = path.open("ab")
+            if size is not None:
+                # the appends follow the last complete reply, not the torn tail
+                file.truncate(size)
+        except OSError as error:
+            lock.unlock()
+            raise JournalError(path.name, error.strerror) from None
+
+        logger.info(f"journal {path}")
+        return cls(path, file, lock)
+
+    def append(self, reply: bytes | memoryview):
+        try:
+            self.file.write(reply)
+            if time.monotonic() >= self.synced + self.sync_interval:
+                self.sync()
+        except OSError as error:
+            raise JournalError(self.path.name, error.strerror) from None
+
+    def sync(self):
+        # the power might fail, not only the app
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.synced = time.monotonic()
+
+    def close(self):
+        """Keep the journal for recovery."""
+        self.sync()
+        self.file.close()
+        self.lock.unlock()
+
+    def discard(self):
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+        self.lock.unlock()
+
+
+def find_journals(directory: Path) -> list[Path]:
+    """The unfinished journals, newest first, without the journals of a running Lenlab."""
+    journals = []
+    for path in sorted(directory.glob("voltmeter_*.journal"), reverse=True):
+        # the lock of a crashed Lenlab is stale
+        lock = lock_file(path)
+        if lock.tryLock(0):
+            lock.unlock()
+            journals.append(path)
+
+    return journals
+
+
+def discard_journal(path: Path):
+    path.unlink(missing_ok=True)
+    path.with_suffix(".lock").unlink(missing_ok=True)
+
+
+def read_replies(journal: memoryview) -> Iterator[memoryview]:
+    offset = len(magic)
+    while offset + header_size <= len(journal):
+        head = journal[offset : offset + header_size]
+        if head[0:1] != b"L":
+            logger.warning(f"journal damaged at {offset}")
+            return
+
+        end = offset + header_size + int.from_bytes(head[2:4], byteorder="little")
+        if end > len(journal):
+            return  # interrupted
+
+        yield journal[offset:end]
+        offset = end
+
+
+def parse_journal(points: Points, journal: memoryview) -> int:
+    """Parse the replies, return the end of the last complete reply."""
+    payloads = []
+    end = len(magic)
+
+    def parse():
+        # one reply of many payloads, parse_reply takes the length of the buffer
+        if payloads:
+            points.parse_reply(b"Lx" + bytes(6) + b"".join(payloads))
+            payloads.clear()
+
+    size = 0
+    for reply in read_replies(journal):
+        end += len(reply)
+        if reply[0:2] == b"Lx":
+            payloads.append(reply[header_size:])
+            size += len(reply) - header_size
+            if size >= batch_size:
+                parse()
+                size = 0
+
+        elif reply[0:2] == b"Lv":  # start, the first or after a reconnect
+            parse()
+            interval_25ns = int.from_bytes(reply[4:8], byteorder="little")
+            points.interval = interval_25ns / 40_000_000
+
+    parse()
+    return end
+
+
+def read_journal(path: Path) -> tuple[Points, int]:
+    """Rebuild the points from the journal, the size of the complete replies, too."""
+    points = Points(codes=True)
+    with path.open("rb") as file:
+        if file.read(len(magic)) != magic:
+            raise InvalidJournal(path.name)
+
+        # the journal of a week is hundreds of MiB, map it instead of reading it
+        with (
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+            memoryview(mapped) as journal,
+        ):
+            size = parse_journal(points, journal)
+
+    return points, size
+
+
+class InvalidJournal(Message):
+    english = "Invalid journal: {0}"
+    german = "Ungültiges Journal: {0}"
+
+
+class JournalLocked(Message):
+    english = "Another Lenlab writes the journal {0}"
+    german = "Ein anderes Lenlab schreibt das Journal {0}"
+
+
+class JournalError(Message):
+    english = """Error on journal {0}
+
+    {1}
+    """
+    german = """Fehler beim Journal {0}
+
+    {1}
+    """
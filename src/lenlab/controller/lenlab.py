@@ -1,11 +1,15 @@
 import logging
+from collections import deque
+from pathlib import Path
 
-from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtCore import QObject, QSettings, QTimer, Signal, Slot
 
 from ..launchpad.discovery import Discovery
+from ..launchpad.protocol import command
 from ..launchpad.terminal import Terminal
 from ..message import Message
 from ..queued import QueuedCall
+from .io_thread import IOThread
 
 logger = logging.getLogger(__name__)
 
@@ -30,10 +34,30 @@ class Lock(QObject):
         self.locked.emit(False)
 
 
+class Request(QObject):
+    """A command in the queue of Lenlab.
+
+    It emits the reply to the command or an error.
+    """
+
+    reply = Signal(bytes)
+    error = Signal(Message)
+
+    def __init__(self, command: bytes, timeout: int, retries: int = 0, retransmits: int = 0):
+        super().__init__()
+        self.command = command
+        self.code = command[1:2]
+        self.timeout = timeout
+        self.retries = retries
+        self.retransmits = retransmits
+
+
 class Lenlab(QObject):
     ready = Signal(bool)
     reply = Signal(bytes)
     write = Signal(bytes)
+    discard = Signal()
+    watch = Signal(int)  # reply timeout on the I/O thread, zero stops the timer
     error = Signal(Message)
 
     close = Signal()
@@ -41,17 +65,63 @@ class Lenlab(QObject):
     default_probe_timeout = 600
     default_reply_timeout = 600
 
+    # repeat a command once after a reply timeout in resync mode
+    max_retries = 1
+
+    # request a reply with a false checksum again in link mode
+    max_retransmits = 3
+
+    # commands in flight
+    # the firmware hangs when it should transmit while transmitting
+    default_depth = 1
+
+    io: IOThread | None = None
+    terminal: Terminal | None = None
+
     def __init__(
         self,
         port_name: str = "",
         probe_timeout: int = default_probe_timeout,
         reply_timeout: int = default_reply_timeout,
+        resync: bool = True,
+        io_thread: bool = False,
+        simulator: bool = False,
+        capture: Path | None = None,
+        replay: Path | None = None,
+        replay_realtime: bool = True,
+        depth: int = default_depth,
+        link_baud_rate: int = 0,
+        settings: QSettings | None = None,
+        serial_number: str = "",
+        discover: bool = True,
     ):
         super().__init__()
         self.reply_timeout = reply_timeout
         logger.info(f"set reply timeout to {self.reply_timeout} ms")
 
-        self.discovery = Discovery(port_name, probe_timeout)
+        self.resync = resync
+        logger.info(f"set resync mode to {self.resync}")
+
+        self.io_thread = io_thread
+        logger.info(f"set I/O thread to {self.io_thread}")
+
+        self.depth = max(depth, 1)
+        logger.info(f"set command depth to {self.depth}")
+
+        self.queue: deque[Request] = deque()  # waiting
+        self.in_flight: deque[Request] = deque()  # written, in order of the replies
+
+        self.discovery = Discovery(
+            port_name,
+            probe_timeout,
+            simulator,
+            capture,
+            replay,
+            replay_realtime,
+            link_baud_rate,
+            settings,
+            serial_number,
+        )
         self.discovery.ready.connect(self.on_terminal_ready)
         self.discovery.error.connect(self.error)
 
@@ -63,45 +133,215 @@ class Lenlab(QObject):
         # self.dac_lock = Lock()
         self.adc_lock = Lock()
 
-        QueuedCall(self.discovery, self.discovery.find)
+        # the offline viewer does not look for a Launchpad
+        if discover:
+            QueuedCall(self.discovery, self.discovery.find)
 
     @Slot(Terminal)
     def on_terminal_ready(self, terminal):
+        # a retry after NoReply hands over the same terminal again
+        if self.terminal is not None:
+            self.disconnect_terminal()
+
         # do not take ownership
-        terminal.reply.connect(self.on_reply)
+        self.terminal = terminal
+        terminal.resync_mode = self.resync
         terminal.error.connect(self.on_terminal_error)
-        self.write.connect(terminal.write)
+        terminal.dropped.connect(self.on_dropped)
+        terminal.corrupt.connect(self.on_corrupt)
+
+        if self.io_thread:
+            # the worker measures the reply timeout on the I/O thread
+            self.io = IOThread(terminal)
+            self.io.worker.reply.connect(self.on_reply)
+            self.io.worker.timeout.connect(self.on_timeout)
+            self.watch.connect(self.io.worker.watch)
+            self.write.connect(self.io.worker.write)
+            self.discard.connect(self.io.worker.discard)
+            self.io.start()
+        else:
+            terminal.reply.connect(self.on_reply)
+            self.write.connect(terminal.write)
+            self.discard.connect(terminal.discard)
 
         self.lock.release()
         # self.dac_lock.release()
         self.adc_lock.release()
         self.ready.emit(True)
 
-    @Slot()
-    def on_terminal_error(self):
+        # commands sent before the connection
+        self.send_next()
+
+    @Slot(Message)
+    def on_terminal_error(self, error):
+        # discovery closes and deletes the terminal
+        self.terminal = None
         self.timer.stop()
+        self.stop_io_thread()
         self.lock.acquire()
         # self.dac_lock.acquire()
         self.adc_lock.acquire()
+        self.fail_all(error)
         self.ready.emit(False)
 
+    def disconnect_terminal(self):
+        terminal, self.terminal = self.terminal, None
+        terminal.error.disconnect(self.on_terminal_error)
+        terminal.dropped.disconnect(self.on_dropped)
+        terminal.corrupt.disconnect(self.on_corrupt)
+        if not self.io_thread:
+            terminal.reply.disconnect(self.on_reply)
+            self.write.disconnect(terminal.write)
+            self.discard.disconnect(terminal.discard)
+
+    @Slot(Message)
+    def on_dropped(self, message):
+        # the command times out if its reply was damaged
+        logger.warning(message)
+
+    @Slot(bytes)
+    def on_corrupt(self, head):
+        # the firmware keeps its last reply for a retransmission
+        code = head[1:2]
+        request = next((r for r in self.in_flight if r.code == code), None)
+        if request is None:
+            logger.warning(f"unexpected corrupt reply {head}")
+            return
+
+        if not request.retransmits:
+            return  # the command times out and Lenlab repeats it
+
+        request.retransmits -= 1
+        logger.warning(f"false checksum, retransmit reply {head[:2]}")
+        self.start_timer()
+        self.write.emit(command(b"r"))
+
+    def stop_io_thread(self):
+        if self.io:
+            self.watch.disconnect(self.io.worker.watch)
+            self.write.disconnect(self.io.worker.write)
+            self.discard.disconnect(self.io.worker.discard)
+            self.io.stop()
+            self.io = None
+
+    def submit(self, command: bytes, timeout: int | None = None) -> Request:
+        """Queue a command.
+
+        The request emits the reply or an error. The reply signal of Lenlab
+        emits the reply, too. A new command replaces a waiting command with
+        the same code, a stalled link does not pile up the poll commands.
+        """
+        code = command[1:2]
+        for request in self.queue:
+            if request.code == code:
+                request.command = command
+                request.timeout = timeout or self.reply_timeout
+                return request
+
+        retries = self.max_retries if self.resync else 0
+        request = Request(command, timeout or self.reply_timeout, retries, self.max_retransmits)
+        self.queue.append(request)
+        self.send_next()
+        return request
+
     def send_command(self, command: bytes):
-        if self.lock.acquire():
-            self.timer.start(self.reply_timeout)
-            self.write.emit(command)
+        self.submit(command)
+
+    def send_next(self):
+        while self.queue and len(self.in_flight) < self.depth:
+            # the lock is free when the connection is ready and nothing is in flight
+            if not self.in_flight and not self.lock.acquire():
+                return
+
+            request = self.queue.popleft()
+            self.in_flight.append(request)
+            if len(self.in_flight) == 1:
+                self.start_timer()
+
+            self.write.emit(request.command)
+
+    def start_timer(self):
+        # the reply timeout of the oldest command in flight
+        timeout = self.in_flight[0].timeout if self.in_flight else 0
+        if self.io:
+            # the I/O thread has got its own timer
+            self.watch.emit(timeout)
+        elif timeout:
+            self.timer.start(timeout)
+        else:
+            self.timer.stop()
 
     @Slot(bytes)
     def on_reply(self, reply):
         # ignore BSL replies
-        if reply.startswith(b"L"):
-            self.timer.stop()
+        if reply[0:1] != b"L":
+            return
+
+        # the replies arrive in the order of the commands
+        code = reply[1:2]
+        for request in self.in_flight:
+            if request.code == code:
+                break
+        else:
+            logger.warning(f"unexpected reply {bytes(reply[:8])}")
+            return
+
+        # the replies to the commands before were damaged and dropped
+        lost = []
+        while (head := self.in_flight.popleft()) is not request:
+            lost.append(head)
+
+        self.start_timer()
+        if not self.in_flight:
             self.lock.release()
-            self.reply.emit(reply)
+
+        # a slot may submit the next command
+        request.reply.emit(reply)
+        self.reply.emit(reply)
+
+        if lost:
+            self.repeat(lost)
+        else:
+            self.send_next()
 
     @Slot()
     def on_timeout(self):
         # a timeout may mean a broken connection and stuck buffers
-        self.error.emit(NoReply())
+        self.discard.emit()
+
+        # or a damaged reply, the replies to the later commands are incomplete, too
+        lost = list(self.in_flight)
+        self.in_flight.clear()
+        self.repeat(lost)
+
+    def repeat(self, lost: list[Request]):
+        if not lost or any(not request.retries for request in lost):
+            self.lock.acquire()
+            # self.dac_lock.acquire()
+            self.adc_lock.acquire()
+            self.stop_io_thread()  # discovery retries on the main thread
+            self.fail_all(NoReply(), lost)
+            # the instruments resume on the next ready, like after a terminal error
+            self.ready.emit(False)
+            self.error.emit(NoReply())
+            return
+
+        for request in reversed(lost):
+            request.retries -= 1
+            logger.warning(f"no reply, repeat command {request.command[:2]}")
+            self.queue.appendleft(request)
+
+        if not self.in_flight:
+            self.lock.release()
+
+        self.send_next()
+
+    def fail_all(self, error: Message, lost: list[Request] | None = None):
+        requests = [*(lost or []), *self.in_flight, *self.queue]
+        self.in_flight.clear()
+        self.queue.clear()
+        for request in requests:
+            request.error.emit(error)
 
 
 class NoReply(Message):
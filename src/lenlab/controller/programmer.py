@@ -17,7 +17,7 @@ class Programmer(QObject):
     error = Signal(Message)
 
     bootstrap_loaders: list[BootstrapLoader]
-    n_messages: int = 8
+    n_messages: int = 9
 
     def __init__(self, discovery: Discovery):
         super().__init__()
@@ -0,0 +1,195 @@
+"""Read saved Lenlab data for the offline viewer
+
+The reader recognizes a session or a recording by the magic and a CSV file by the
+head line of CSVTemplate. It parses a CSV file in chunks of bytes, each in one numpy
+call, instead of line by line. A gigabyte of voltmeter CSV streams straight into the
+channels of the points.
+"""
+
+import gzip
+import logging
+import lzma
+import warnings
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from ..message import Message
+from ..model import session
+from ..model.points import Points
+from ..model.recording import Recording
+from ..model.session import Session
+from .csv import CSVTemplate
+
+logger = logging.getLogger(__name__)
+
+chunk_size = 1 << 22  # bytes
+
+
+def open_binary(file_path: Path) -> BinaryIO:
+    # gzip and xz by the suffix, like open_csv
+    if file_path.name.endswith(".gz"):
+        return gzip.open(file_path, "rb")
+    elif file_path.name.endswith(".xz"):
+        return lzma.open(file_path, "rb")
+    else:
+        return file_path.open("rb")
+
+
+def read_head(file: BinaryIO, file_name: str) -> CSVTemplate:
+    """Read the two head lines of CSVTemplate."""
+    try:
+        head = file.readline().decode("utf-8").strip().split(",")
+        names = file.readline().decode("utf-8").strip().split(",")
+    except (OSError, EOFError, UnicodeDecodeError):
+        raise InvalidFile(file_name) from None
+
+    if len(head) != 3 or head[0] != "Lenlab_MSPM0" or len(names) != 3:
+        raise InvalidFile(file_name)
+
+    return CSVTemplate(head[2], *names)
+
+
+def parse_rows(lines: bytes, file_name: str, n_columns: int) -> np.ndarray:
+    # numbers separated by commas, the line breaks are commas, too
+    lines = lines.replace(b"\r", b"")
+    n_rows = lines.count(b"\n")
+    try:
+        with warnings.catch_warnings():
+            # numpy warns about unmatched text
+            warnings.simplefilter("error", DeprecationWarning)
+            values = np.fromstring(lines.replace(b"\n", b",").decode("ascii"), sep=",")
+    except (DeprecationWarning, ValueError):
+        raise InvalidFile(file_name) from None
+
+    if values.shape[0] != n_rows * n_columns:
+        raise InvalidFile(file_name)
+
+    return values.reshape((n_rows, n_columns))
+
+
+def read_blocks(file: BinaryIO, file_name: str, n_columns: int = 3) -> Iterator[np.ndarray]:
+    """Parse the rows after the head, a block of rows per chunk of bytes."""
+    rest = b""
+    try:
+        while chunk := file.read(chunk_size):
+            # the last line of the chunk continues in the next chunk
+            chunk = rest + chunk
+            end = chunk.rfind(b"\n") + 1
+            rest = chunk[end:]
+            if end:
+                yield parse_rows(chunk[:end], file_name, n_columns)
+    except (OSError, EOFError):
+        raise InvalidFile(file_name) from None
+
+    if rest.strip():
+        yield parse_rows(rest + b"\n", file_name, n_columns)
+
+
+def read_points(blocks: Iterator[np.ndarray]) -> Points:
+    points = Points()
+    times = []
+    for block in blocks:
+        if len(times) < 2:
+            times.extend(block[:2, 0])
+
+        points.extend(block[:, 1], block[:, 2])
+
+    if len(times) == 2:
+        # the time has milliseconds
+        points.interval = round(times[1] - times[0], 3)
+
+    points.update_chart()
+    return points
+
+
+def read_csv(file_path: Path) -> Points | Session:
+    """The points of a voltmeter, or a session of an oscilloscope or the bode plotter."""
+    with open_binary(file_path) as file:
+        template = read_head(file, file_path.name)
+        if template.name == "voltmeter":
+            return read_points(read_blocks(file, file_path.name))
+
+        rows = np.concatenate([np.empty((0, 3)), *read_blocks(file, file_path.name)])
+
+    if template.name == "oscilloscope":
+        # the time in milliseconds, the steps from the whole range are more precise
+        x = rows[:, 0]
+        time_step = (x[-1] - x[0]) / (x.shape[0] - 1) * 1e-3 if x.shape[0] > 1 else 0.0
+        return Session(
+            "oscilloscope",
+            {"offset": 0, "time_step": time_step},
+            {"volts": np.ascontiguousarray(rows[:, 1:].T)},
+        )
+
+    if template.name == "bode_plot":
+        return Session(
+            "bode_plot",
+            columns={name: rows[:, i] for i, name in enumerate(template.column_names)},
+        )
+
+    raise InvalidFile(file_path.name)
+
+
+def read_file(file_path: Path) -> Points | Session:
+    """Points for the voltmeter, a session for the oscilloscope or the bode plotter."""
+    logger.info(f"open {file_path}")
+    try:
+        with file_path.open("rb") as file:
+            magic = file.read(8)
+    except OSError as error:
+        raise FileError(file_path.name, error.strerror) from None
+
+    try:
+        if magic == Recording.magic:
+            # maps the file, no copy
+            return Points.load(file_path)
+
+        if magic == session.magic:
+            return read_session(file_path)
+
+        return read_csv(file_path)
+    except (ValueError, KeyError, TypeError, IndexError):
+        # a damaged file or metadata of an unexpected shape
+        raise InvalidFile(file_path.name) from None
+    except OSError as error:
+        raise FileError(file_path.name, error.strerror) from None
+
+
+def read_session(file_path: Path) -> Points | Session:
+    content = Session.load(file_path)
+    if content.kind == "voltmeter":
+        return Points.from_session(content)
+
+    # the settings and columns of the view
+    if content.kind == "oscilloscope":
+        valid = {"offset", "time_step"} <= content.settings.keys() and (
+            "codes" in content.columns or "volts" in content.columns
+        )
+    elif content.kind == "bode_plot":
+        valid = {"frequency", "magnitude", "phase"} <= content.columns.keys()
+    else:
+        valid = False
+
+    if not valid:
+        raise InvalidFile(file_path.name)
+
+    return content
+
+
+class InvalidFile(Message):
+    english = "No Lenlab data: {0}"
+    german = "Keine Lenlab-Daten: {0}"
+
+
+class FileError(Message):
+    english = """Error on opening {0}
+
+    {1}
+    """
+    german = """Fehler beim Öffnen von {0}
+
+    {1}
+    """
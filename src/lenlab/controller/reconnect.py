@@ -0,0 +1,83 @@
+import logging
+
+from PySide6.QtCore import QObject, QTimer, Slot
+
+from ..launchpad.watcher import DeviceWatcher
+from ..message import Message
+from .lenlab import Lenlab
+
+logger = logging.getLogger(__name__)
+
+
+class Reconnect(QObject):
+    """Reconnect automatically after the connection to the Launchpad broke.
+
+    Reconnect retries the discovery with exponential backoff. A Launchpad,
+    which the watcher sees appear, resets the backoff and discovery retries immediately.
+    The instruments resume on ready.
+    """
+
+    initial_delay = 500  # ms
+    max_delay = 30_000  # ms
+
+    def __init__(self, lenlab: Lenlab, watcher: DeviceWatcher | None = None):
+        super().__init__(lenlab)
+        self.lenlab = lenlab
+        self.connected = False
+        self.pending = False  # discovery running
+        self.delay = self.initial_delay
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.retry)
+
+        self.lenlab.ready.connect(self.on_ready)
+        self.lenlab.error.connect(self.on_error)
+
+        # a shared watcher runs already
+        if watcher is None:
+            watcher = DeviceWatcher()
+            watcher.start()
+
+        self.watcher = watcher
+        self.watcher.plugged.connect(self.on_plugged)
+
+    @Slot(bool)
+    def on_ready(self, ready: bool):
+        self.pending = False
+        self.connected = ready
+        if ready:
+            self.timer.stop()
+            self.delay = self.initial_delay
+        else:
+            self.schedule()
+
+    @Slot(Message)
+    def on_error(self, error: Message):
+        # discovery failed or the firmware stopped replying
+        self.pending = False
+        self.connected = False
+        self.schedule()
+
+    @Slot()
+    def on_plugged(self):
+        if self.connected or self.pending:
+            return
+
+        self.timer.stop()
+        self.delay = self.initial_delay
+        self.retry()
+
+    def schedule(self):
+        if self.timer.isActive():
+            return
+
+        logger.info(f"reconnect in {self.delay} ms")
+        self.timer.start(self.delay)
+        self.delay = min(2 * self.delay, self.max_delay)
+
+    @Slot()
+    def retry(self):
+        logger.info("reconnect")
+        self.pending = True
+        self.lenlab.discovery.retry()
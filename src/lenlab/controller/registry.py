@@ -0,0 +1,43 @@
+import logging
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from ..launchpad.launchpad import find_launchpad, group_by_serial_number
+from ..launchpad.port_info import PortInfo
+from ..launchpad.watcher import DeviceWatcher
+from .lenlab import Lenlab
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceRegistry(QObject):
+    """One Lenlab per attached Launchpad, keyed by the USB serial number.
+
+    Each Lenlab discovers the ports of its own Launchpad only. The registry scans again,
+    when the watcher sees a Launchpad appear. It keeps the Lenlab of a vanished Launchpad
+    for a reconnect.
+    """
+
+    added = Signal(str)  # serial number
+
+    devices: dict[str, Lenlab]
+
+    def __init__(self, watcher: DeviceWatcher | None = None, **options):
+        super().__init__()
+        self.options = options  # for each Lenlab
+        self.devices = {}
+
+        self.watcher = watcher or DeviceWatcher()
+        self.watcher.plugged.connect(self.scan)
+        self.watcher.start()
+
+    @Slot()
+    def scan(self):
+        launchpads = group_by_serial_number(find_launchpad(PortInfo.available_ports()))
+        for serial_number in launchpads:
+            if serial_number in self.devices:
+                continue
+
+            logger.info(f"add Launchpad {serial_number}")
+            self.devices[serial_number] = Lenlab(serial_number=serial_number, **self.options)
+            self.added.emit(serial_number)
@@ -8,29 +8,37 @@ User's Guide https://www.ti.com/lit/ug/slau887/slau887.pdf
 
 import logging
 import struct
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from io import BytesIO
-from itertools import batched
 from typing import Self
 
 from attrs import fields, frozen
-from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtCore import QElapsedTimer, QObject, QTimer, Signal, Slot
 
 from ..message import Message
-from .launchpad import KB, crc, last
+from .crc32 import crc32, seed
+from .launchpad import KB
 from .terminal import Terminal
 
 logger = logging.getLogger(__name__)
 
 
-def pack(payload: bytes) -> bytes:
-    """Pack a packet for the Bootstrap Loader."""
+def pack(*payload: bytes | memoryview) -> bytes:
+    """Pack a packet for the Bootstrap Loader.
+
+    The payload may consist of several parts, for example command, address and a view of the
+    firmware. The packet is the only copy.
+    """
+    checksum = seed
+    for part in payload:
+        checksum = crc32(part, checksum)
+
     return b"".join(
         [
             b"\x80",
-            len(payload).to_bytes(2, byteorder="little"),
-            payload,
-            last(crc(payload)).to_bytes(4, byteorder="little"),
+            sum(len(part) for part in payload).to_bytes(2, byteorder="little"),
+            *payload,
+            checksum.to_bytes(4, byteorder="little"),
         ]
     )
 
@@ -48,7 +56,7 @@ def unpack(packet: BytesIO) -> bytes:
     payload = packet.read(length)
 
     checksum = int.from_bytes(packet.read(4), byteorder="little")
-    if not last(crc(payload)) == checksum:
+    if not crc32(payload) == checksum:
         raise ChecksumError()
 
     return payload
@@ -78,23 +86,54 @@ class DeviceInfo:
         return cls(*struct.unpack(fmt, reply))
 
 
+def pack_longs(*values: int) -> bytes:
+    return b"".join(value.to_bytes(4, byteorder="little") for value in values)
+
+
 class BootstrapLoader(QObject):
+    """Verified and differential programming.
+
+    The BSL computes the CRC32 of a flash memory range (standalone verification).
+    The programmer compares the CRC of each sector with the firmware and erases and writes
+    only the sectors, which differ. A verification of the whole firmware concludes.
+
+    A BSL without the standalone verification erases the whole memory and
+    writes the whole firmware.
+
+    The batch size follows the buffer size of the BSL. The next batch is packed,
+    while the BSL programs the current one.
+    """
+
     message = Signal(Message)
     success = Signal(Terminal)
     error = Signal(Message)
 
-    batch_size = 12 * KB
+    min_batch_size = 1 * KB
+    packet_overhead = 8  # header, length, command, and address
+    flash_word = 8  # bytes, the batch size is a multiple
+    sector_size = 1 * KB  # erase granularity
+    min_verify_size = 1 * KB  # the standalone verification requires at least 1 KB
     interval = 600
 
     # connect_packet = bytes((0x80, 0x01, 0x00, 0x12, 0x3A, 0x61, 0x44, 0xDE))
     CONNECT = b"\x12"
     OK = b"\x3b\x00"
+    VERIFICATION = b"\x32"
 
     terminal: Terminal
     callback: Callable[..., None]
     device_info: DeviceInfo
-    enumerate_batched: enumerate
+    firmware: memoryview
     firmware_size: int
+    batch_size: int
+    sectors: Iterator[int]
+    window: tuple[int, int, int]  # sector address, verified range
+    verify: bool  # verify after writing
+    changed: list[int]  # sector addresses
+    steps: Iterator[tuple[bytes, bool]]  # packet, ack mode
+    prepared: tuple[bytes, bool] | None  # the next step
+    phase_name: str | None
+    phases: dict[str, float]  # duration in ms
 
     def __init__(self, terminal: Terminal):
         super().__init__()
@@ -107,9 +146,16 @@ class BootstrapLoader(QObject):
         self.timer.setInterval(self.interval)
         self.timer.timeout.connect(self.on_timeout)
 
+        self.clock = QElapsedTimer()
+
     def start(self, firmware: bytes):
-        self.enumerate_batched = enumerate(batched(firmware, self.batch_size))
+        self.firmware = memoryview(firmware)
         self.firmware_size = len(firmware)
+        self.phase_name = None
+        self.phases = {}
+        self.phase("connect")
+        self.written = 0  # bytes programmed
+        self.verified = False
 
         self.terminal.ack.connect(self.on_ack)
         self.terminal.reply.connect(self.on_reply)
@@ -124,12 +170,23 @@ class BootstrapLoader(QObject):
         callback: Callable[..., None],
         ack_mode: bool = False,
     ):
+        self.write(pack(command), callback, ack_mode)
+
+    def write(self, packet: bytes, callback: Callable[..., None], ack_mode: bool = False):
         self.terminal.ack_mode = ack_mode
-        self.terminal.write(pack(command))
+        self.terminal.write(packet)
 
         self.callback = callback
         self.timer.start()
 
+    def phase(self, name: str | None):
+        # the time of the previous phase
+        if self.phase_name:
+            self.phases[self.phase_name] = self.clock.nsecsElapsed() / 1e6
+
+        self.phase_name = name
+        self.clock.start()
+
     @Slot()
     def on_ack(self):
         try:
@@ -182,9 +239,13 @@ class BootstrapLoader(QObject):
 
     def on_device_info(self, reply: bytes):
         self.device_info = DeviceInfo.parse(reply)
-        if self.device_info.max_buffer_size < self.batch_size + 8:
-            raise BufferTooSmall(self.device_info.max_buffer_size)
+        # the largest batch in the buffer of the BSL, whole flash words
+        self.batch_size = self.device_info.max_buffer_size - self.packet_overhead
+        self.batch_size -= self.batch_size % self.flash_word
+        if self.batch_size < self.min_batch_size:
+            raise BufferTooSmall(self.device_info.max_buffer_size / 1000)
 
+        logger.info(f"{self.terminal.port_name}: batch size {self.batch_size} bytes")
         self.message.emit(BufferSize(self.device_info.max_buffer_size / 1000))
 
         self.message.emit(Unlock())
@@ -194,36 +255,131 @@ class BootstrapLoader(QObject):
         if not reply == self.OK:
             raise ErrorReply(reply)
 
-        self.message.emit(Erase())
-        self.command(bytes([0x15]), self.on_erased)
+        self.phase("check")
+        self.message.emit(CheckMemory())
+        self.sectors = iter(range(0, self.firmware_size, self.sector_size))
+        self.changed = []
+        self.next_sector()
+
+    def next_sector(self):
+        address = next(self.sectors, None)
+        if address is None:
+            self.write_changes()
+            return
+
+        # the window of a short sector at the end reaches back into the previous sector
+        end = min(address + self.sector_size, self.firmware_size)
+        start = max(0, min(address, end - self.min_verify_size))
+        self.window = (address, start, end)
+        self.command(bytes([0x26]) + pack_longs(start, end - start), self.on_sector_verified)
+
+    def on_sector_verified(self, reply: bytes):
+        if reply[0:1] != self.VERIFICATION:
+            # no standalone verification, write everything
+            logger.info(f"{self.terminal.port_name}: no verification {reply.hex()}")
+            self.write_everything()
+            return
+
+        address, start, end = self.window
+        if reply[1:5] != crc32(self.firmware[start:end]).to_bytes(4, byteorder="little"):
+            self.changed.append(address)
+
+        self.next_sector()
+
+    def program_steps(self, start: int, end: int) -> Iterator[tuple[bytes, bool]]:
+        for address in range(start, end, self.batch_size):
+            batch = self.firmware[address : min(address + self.batch_size, end)]
+            self.written += len(batch)
+            yield pack(b"\x24", pack_longs(address), batch), True
+
+    def write_changes(self):
+        # contiguous runs of changed sectors
+        runs: list[list[int]] = []
+        for address in self.changed:
+            end = min(address + self.sector_size, self.firmware_size)
+            if runs and runs[-1][1] == address:
+                runs[-1][1] = end
+            else:
+                runs.append([address, end])
+
+        if not runs:
+            self.message.emit(FirmwareUpToDate())
+            self.verify_firmware()
+            return
+
+        self.phase("write")
+        size = sum(end - start for start, end in runs)
+        logger.info(f"{self.terminal.port_name}: write {len(runs)} ranges, {size} bytes")
+        self.message.emit(WriteChanges(size / 1000, self.firmware_size / 1000))
+
+        def steps():
+            for start, end in runs:
+                # start and end address, the end is inclusive
+                yield pack(b"\x13", pack_longs(start, end - 1)), False
+                yield from self.program_steps(start, end)
+
+        self.steps = steps()
+        self.prepared = None
+        self.verify = True
+        self.next_step()
+
+    def write_everything(self):
+        self.phase("write")
+        self.message.emit(WriteFirmware(self.firmware_size / 1000))
 
-    def on_erased(self, reply: bytes):
-        if not reply == self.OK:
+        def steps():
+            yield pack(b"\x15"), False  # mass erase
+            yield from self.program_steps(0, self.firmware_size)
+
+        self.steps = steps()
+        self.prepared = None
+        self.verify = False
+        self.next_step()
+
+    def next_step(self):
+        step = self.prepared or next(self.steps, None)
+        if step is None:
+            if self.verify:
+                self.verify_firmware()
+            else:
+                self.restart()
+            return
+
+        packet, ack_mode = step
+        self.write(packet, self.on_step, ack_mode=ack_mode)
+
+        # pack the next batch, while the BSL programs this one
+        self.prepared = next(self.steps, None)
+
+    def on_step(self, reply: bytes | None = None):
+        # program data fast acknowledges, erase replies with a core message
+        if reply is not None and not reply == self.OK:
             raise ErrorReply(reply)
 
-        self.message.emit(WriteFirmware(self.firmware_size / 1000))
-        self.next_batch()
-
-    def next_batch(self):
-        # batch is a tuple of ints (single bytes)
-        i, batch = next(self.enumerate_batched)
-        payload = b"".join(
-            [
-                b"\x24",
-                (i * self.batch_size).to_bytes(4, byteorder="little"),
-                bytes(batch),
-            ]
-        )
-        self.command(payload, self.on_programmed, ack_mode=True)
-
-    def on_programmed(self):
-        try:
-            self.next_batch()
-        except StopIteration:
-            self.message.emit(Restart())
-            self.command(bytes([0x40]), self.on_restart, ack_mode=True)
+        self.next_step()
+
+    def verify_firmware(self):
+        self.phase("verify")
+        self.message.emit(VerifyFirmware())
+        self.command(bytes([0x26]) + pack_longs(0, self.firmware_size), self.on_verified)
+
+    def on_verified(self, reply: bytes):
+        checksum = crc32(self.firmware).to_bytes(4, byteorder="little")
+        if not (reply[0:1] == self.VERIFICATION and reply[1:5] == checksum):
+            raise VerificationFailed()
+
+        self.verified = True
+        self.restart()
+
+    def restart(self):
+        self.phase("restart")
+        self.message.emit(Restart())
+        self.command(bytes([0x40]), self.on_restart, ack_mode=True)
 
     def on_restart(self):
+        self.phase(None)
+        timing = ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.phases.items())
+        logger.info(f"{self.terminal.port_name}: {timing}")
         self.success.emit(self.terminal)
 
 
@@ -292,18 +448,41 @@ class Unlock(Message):
     progress = 1
 
 
-class Erase(Message):
-    english = "Erase memory"
-    german = "Speicher löschen"
+class CheckMemory(Message):
+    english = "Compare memory"
+    german = "Speicher vergleichen"
     progress = 1
 
 
 class WriteFirmware(Message):
-    english = "Write firmware ({0:.1f} KiB)"
-    german = "Firmware schreiben ({0:.1f} KiB)"
+    english = "Erase memory and write firmware ({0:.1f} KiB)"
+    german = "Speicher löschen und Firmware schreiben ({0:.1f} KiB)"
+    progress = 2  # without verification
+
+
+class WriteChanges(Message):
+    english = "Write changes ({0:.1f} of {1:.1f} KiB)"
+    german = "Änderungen schreiben ({0:.1f} von {1:.1f} KiB)"
     progress = 1
 
 
+class FirmwareUpToDate(Message):
+    english = "Firmware up to date"
+    german = "Firmware ist aktuell"
+    progress = 1
+
+
+class VerifyFirmware(Message):
+    english = "Verify firmware"
+    german = "Firmware prüfen"
+    progress = 1
+
+
+class VerificationFailed(Message):
+    english = "Verification failed: the memory differs from the firmware"
+    german = "Prüfung fehlgeschlagen: Der Speicher unterscheidet sich von der Firmware"
+
+
 class Restart(Message):
     english = "Restart"
     german = "Neustarten"
@@ -0,0 +1,28 @@
+from .launchpad import KB
+
+
+class BufferPool:
+    """Preallocated receive buffers for the terminal.
+
+    The terminal reads into a buffer from the pool and hands out memoryviews
+    of complete packets. It returns the buffer to the pool, when it switches buffers.
+    A buffer never resizes, because a bytearray with exported memoryviews cannot resize.
+    """
+
+    # a bulk reply of 27 KB and the beginning of the next reply fit into one buffer
+    buffer_size = 64 * KB
+
+    def __init__(self, n_buffers: int = 2, buffer_size: int = buffer_size):
+        self.buffer_size = buffer_size
+        self.free = [bytearray(buffer_size) for _ in range(n_buffers)]
+
+    def acquire(self, size: int = 0) -> bytearray:
+        for i, buffer in enumerate(self.free):
+            if len(buffer) >= size:
+                return self.free.pop(i)
+
+        # the pool grows on demand
+        return bytearray(max(size, self.buffer_size))
+
+    def release(self, buffer: bytearray) -> None:
+        self.free.append(buffer)
@@ -0,0 +1,204 @@
+import logging
+import struct
+import time
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO, Self
+
+from attrs import frozen
+from PySide6.QtCore import QElapsedTimer, QIODeviceBase, QObject, QTimer
+
+from ..message import Message
+from .simulator import VirtualPort
+from .terminal import Terminal
+
+logger = logging.getLogger(__name__)
+
+magic = b"Lenlab capture\x00\x01"
+# kind, port index, time in ns since the start of the capture, length of the data
+record_header = struct.Struct("<cBQI")
+
+RECEIVED = b"r"
+SENT = b"w"
+
+
+@frozen
+class Record:
+    kind: bytes
+    port: int
+    time: int
+    data: bytes
+
+
+class CaptureWriter:
+    """Binary capture file of the raw serial traffic."""
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.file.write(magic)
+        self.start = time.monotonic_ns()
+
+    @classmethod
+    def open(cls, path: Path) -> Self:
+        try:
+            return cls(path.open("wb"))
+        except OSError as error:
+            raise CaptureError(path, error.strerror) from None
+
+    def write(self, kind: bytes, port: int, data: bytes | memoryview) -> None:
+        t = time.monotonic_ns() - self.start
+        self.file.write(record_header.pack(kind, port, t, len(data)))
+        self.file.write(data)
+        # keep the capture of a stall, even if the app does not terminate cleanly
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class Recorder:
+    """Record the traffic of one terminal."""
+
+    def __init__(self, writer: CaptureWriter, port: int = 0):
+        self.writer = writer
+        self.port = port
+
+    def received(self, data: bytes | memoryview) -> None:
+        self.writer.write(RECEIVED, self.port, data)
+
+    def sent(self, data: bytes) -> None:
+        self.writer.write(SENT, self.port, data)
+
+
+def read_capture(file: BinaryIO) -> Iterator[Record]:
+    if file.read(len(magic)) != magic:
+        raise InvalidCapture(file.name)
+
+    while head := file.read(record_header.size):
+        if len(head) < record_header.size:
+            raise InvalidCapture(file.name)
+
+        kind, port, t, length = record_header.unpack(head)
+        data = file.read(length)
+        if len(data) < length:
+            raise InvalidCapture(file.name)
+
+        yield Record(kind, port, t, data)
+
+
+class ReplayPort(VirtualPort):
+    """Replay a capture in place of a serial port.
+
+    A write of the host releases the received chunks, which followed the same write
+    in the capture, at their original delays or as fast as possible. The replay
+    keeps the chunks, so the terminal sees the same fragments as in the capture.
+    """
+
+    def __init__(
+        self, records: list[Record], parent: QObject | None = None, realtime: bool = True
+    ):
+        super().__init__(parent, pacing=False)
+        self.realtime = realtime
+
+        # the port, which received the replies
+        port = next((record.port for record in records if record.kind == RECEIVED), 0)
+        self.records = [record for record in records if record.port == port]
+        self.index = 0
+
+        self.pending: deque[tuple[int, bytes]] = deque()  # due time in ns, data
+        self.replay_clock = QElapsedTimer()
+        self.replay_timer = QTimer(self)
+        self.replay_timer.setInterval(1 if realtime else 0)
+        self.replay_timer.timeout.connect(self.on_replay_timeout)
+
+    @classmethod
+    def create_terminal(cls, path: Path, realtime: bool = True) -> Terminal:
+        try:
+            with path.open("rb") as file:
+                records = list(read_capture(file))
+        except OSError as error:
+            raise CaptureError(path, error.strerror) from None
+
+        terminal = Terminal(path.name)
+        terminal.port = cls(records, terminal, realtime)
+        return terminal
+
+    @property
+    def is_finished(self) -> bool:
+        return self.index == len(self.records) and not self.pending
+
+    def open(self, mode: QIODeviceBase.OpenModeFlag) -> bool:
+        super().open(mode)
+        self.replay_clock.start()
+        # the chunks before the first write
+        self.release(0)
+        return True
+
+    def close(self) -> None:
+        super().close()
+        self.replay_timer.stop()
+        self.pending.clear()
+
+    def write(self, data: bytes) -> int:
+        # any baud rate, the capture knows the replies
+        if self.is_open:
+            self.receive(bytes(data))
+
+        return len(data)
+
+    def receive(self, data: bytes) -> None:
+        if self.index == len(self.records):
+            logger.info(f"end of capture, ignore write {data[:8]}")
+            return
+
+        record = self.records[self.index]
+        self.index += 1
+        if record.data != data:
+            logger.warning(f"write {data[:8]} differs from capture {record.data[:8]}")
+
+        self.release(record.time)
+
+    def release(self, t0: int) -> None:
+        now = self.replay_clock.nsecsElapsed()
+        while self.index < len(self.records) and self.records[self.index].kind == RECEIVED:
+            record = self.records[self.index]
+            due = now + record.time - t0 if self.realtime else now
+            self.pending.append((due, record.data))
+            self.index += 1
+
+        if self.pending:
+            self.replay_timer.start()
+
+    def on_replay_timeout(self) -> None:
+        now = self.replay_clock.nsecsElapsed()
+        while self.pending and self.pending[0][0] <= now:
+            due, data = self.pending.popleft()
+            if self.is_open:
+                self.rx += data
+                self.readyRead.emit()
+
+        if not self.pending:
+            self.replay_timer.stop()
+
+
+class CaptureError(Message):
+    english = """Error on capture file {0}
+
+    {1}
+    """
+    german = """Fehler bei der Aufzeichnungsdatei {0}
+
+    {1}
+    """
+
+
+class InvalidCapture(Message):
+    english = """Invalid capture file {0}
+
+    The file is not a Lenlab capture or it is incomplete.
+    """
+    german = """Ungültige Aufzeichnungsdatei {0}
+
+    Die Datei ist keine Lenlab-Aufzeichnung oder sie ist unvollständig.
+    """
@@ -0,0 +1,19 @@
+"""Fast CRC32 for the BSL and the firmware replies
+
+Same checksum as `launchpad.crc`: ISO 3309, reversed polynom, seed 0xFFFFFFFF,
+and no final inversion. zlib computes the same CRC with a final inversion.
+"""
+
+import zlib
+
+seed = 0xFFFFFFFF
+mask = 0xFFFFFFFF
+
+
+def crc32(data: bytes | bytearray | memoryview, checksum: int = seed) -> int:
+    """Checksum of the data.
+
+    Pass the checksum of the previous data to continue over several chunks.
+    """
+    # zlib inverts the register at the beginning and at the end
+    return zlib.crc32(data, checksum ^ mask) ^ mask
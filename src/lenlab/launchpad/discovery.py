@@ -1,15 +1,19 @@
 import logging
 import sys
-from typing import cast
+from pathlib import Path
+from typing import Self, cast
 
-from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from attrs import frozen
+from PySide6.QtCore import QElapsedTimer, QObject, QSettings, QTimer, Signal, Slot
 
 from ..message import Message
 from ..queued import QueuedCall
 from . import rules
+from .capture import CaptureWriter, Recorder, ReplayPort
 from .launchpad import find_launchpad, find_tiva_launchpad
 from .port_info import PortInfo
 from .protocol import command, get_app_version, unpack_fw_version
+from .simulator import Simulator
 from .terminal import Terminal
 
 logger = logging.getLogger(__name__)
@@ -32,10 +36,14 @@ class Probe(QObject):
 
         self.terminal.set_baud_rate(1_000_000)
         self.terminal.ack_mode = False
+        self.terminal.crc_mode = False
         self.terminal.write(command(b"8"))
 
     @Slot(bytes)
     def on_reply(self, reply):
+        # one reply, the link negotiation follows on the same terminal
+        self.terminal.reply.disconnect(self.on_reply)
+
         # now we know which terminal talks to the firmware
         self.select.emit(self.terminal)
 
@@ -44,12 +52,87 @@ class Probe(QObject):
 
         app_version = get_app_version()
         fw_version = unpack_fw_version(reply)
+        self.terminal.fw_version = fw_version or ""
         if fw_version == app_version:
             self.ready.emit(self.terminal)
         else:
             self.error.emit(InvalidVersion(fw_version, app_version))
 
 
+class Link(QObject):
+    """Negotiate the link mode after the probe.
+
+    The firmware confirms the baud rate at 1 MBaud and switches after the confirmation.
+    In link mode, each reply has got a CRC32 trailer. Without a confirmation,
+    the terminal stays at 1 MBaud without checksums.
+    """
+
+    ready = Signal(Terminal)
+
+    def __init__(self, terminal: Terminal, baud_rate: int, timeout: int = 100):
+        super().__init__()
+        self.terminal = terminal
+        self.baud_rate = baud_rate
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(timeout)
+        self.timer.timeout.connect(self.on_timeout)
+
+    def start(self):
+        logger.info(f"negotiate link mode at {self.baud_rate} Baud")
+
+        # disconnects automatically when the link is destroyed
+        self.terminal.reply.connect(self.on_reply)
+
+        self.timer.start()
+        self.terminal.write(command(b"l", self.baud_rate))
+
+    @Slot(bytes)
+    def on_reply(self, reply):
+        if reply[0:2] != b"Ll" or int.from_bytes(reply[4:8], "little") != self.baud_rate:
+            return
+
+        self.timer.stop()
+        self.terminal.reply.disconnect(self.on_reply)
+        self.terminal.set_baud_rate(self.baud_rate)
+        self.terminal.crc_mode = True
+        logger.info(f"link mode at {self.baud_rate} Baud")
+        self.ready.emit(self.terminal)
+
+    @Slot()
+    def on_timeout(self):
+        self.terminal.reply.disconnect(self.on_reply)
+        logger.warning("no link mode, the firmware stays at 1 MBaud")
+        self.ready.emit(self.terminal)
+
+
+@frozen
+class LastPort:
+    """The port of the last successful discovery in the settings."""
+
+    name: str
+    serial_number: str = ""
+    fw_version: str = ""
+
+    @classmethod
+    def load(cls, settings: QSettings) -> Self | None:
+        name = settings.value("discovery/port_name", "")
+        if not name:
+            return None
+
+        return cls(
+            name,
+            settings.value("discovery/serial_number", ""),
+            settings.value("discovery/fw_version", ""),
+        )
+
+    def save(self, settings: QSettings) -> None:
+        settings.setValue("discovery/port_name", self.name)
+        settings.setValue("discovery/serial_number", self.serial_number)
+        settings.setValue("discovery/fw_version", self.fw_version)
+
+
 class Discovery(QObject):
     available = Signal()  # terminals available for programming or probing
     ready = Signal(Terminal)  # firmware connection established
@@ -57,10 +140,37 @@ class Discovery(QObject):
 
     terminals: list[Terminal]
     probes: list[Probe]
-
-    def __init__(self, port_name: str = "", probe_timeout: int = 600):
+    link: Link | None = None
+
+    # the last port answers fast or discovery scans all ports
+    fast_probe_timeout = 200
+
+    def __init__(
+        self,
+        port_name: str = "",
+        probe_timeout: int = 600,
+        simulator: bool = False,
+        capture: Path | None = None,
+        replay: Path | None = None,
+        replay_realtime: bool = True,
+        link_baud_rate: int = 0,
+        settings: QSettings | None = None,
+        serial_number: str = "",
+    ):
         super().__init__()
         self.port_name = port_name
+        self.serial_number = serial_number  # one of several Launchpads
+        self.simulator = simulator
+        self.capture = capture
+        self.capture_writer: CaptureWriter | None = None  # one for all opens
+        self.replay = replay
+        self.replay_realtime = replay_realtime
+        self.link_baud_rate = link_baud_rate  # zero means no link mode
+        self.settings = settings
+        self.last_port = LastPort.load(settings) if settings else None
+        self.fast_path = False
+        self.clock = QElapsedTimer()
+        self.time_to_ready: int | None = None  # ms, startup metric
         self.probe_enabled = True
         self.probe_timeout = probe_timeout
         logger.info(f"set probe timeout to {probe_timeout} ms")
@@ -96,6 +206,20 @@ class Discovery(QObject):
     def on_ready(self, terminal):
         logger.info(f"terminal {terminal.port_name} ready")
 
+        if self.clock.isValid():
+            self.time_to_ready = self.clock.elapsed()
+            self.clock.invalidate()
+            path = "fast path" if self.fast_path else "full scan"
+            logger.info(f"time to ready {self.time_to_ready} ms ({path})")
+
+        # later errors of the terminal are no failure of the fast path
+        self.fast_path = False
+
+        if self.settings and not (self.simulator or self.replay):
+            pi = PortInfo.from_name(terminal.port_name)
+            self.last_port = LastPort(terminal.port_name, pi.serial_number, terminal.fw_version)
+            self.last_port.save(self.settings)
+
     @Slot()
     def retry(self):
         logger.info("retry")
@@ -107,6 +231,28 @@ class Discovery(QObject):
     @Slot()
     def find(self):
         logger.info("find")
+        if not self.clock.isValid():
+            self.clock.start()
+
+        if self.simulator:
+            self.terminals = [Simulator.create_terminal()]
+            QueuedCall(self, self.open)
+            return
+
+        if self.replay:
+            try:
+                self.terminals = [ReplayPort.create_terminal(self.replay, self.replay_realtime)]
+            except Message as error:
+                self.error.emit(error)
+                return
+
+            QueuedCall(self, self.open)
+            return
+
+        self.fast_path = self.find_last_port()
+        if self.fast_path:
+            QueuedCall(self, self.open)
+            return
 
         if sys.platform == "linux":
             if not rules.check_rules():
@@ -132,18 +278,56 @@ class Discovery(QObject):
                 self.error.emit(NoLaunchpad())
                 return
 
+            if self.serial_number:
+                matches = [pi for pi in matches if pi.serial_number == self.serial_number]
+                if not matches:
+                    self.error.emit(DeviceNotFound(self.serial_number))
+                    return
+
             if sys.platform != "win32":
                 del matches[1:]
 
         self.terminals = [Terminal.from_port_info(pi) for pi in matches]
         QueuedCall(self, self.open)
 
+    def find_last_port(self) -> bool:
+        # skip the scan, the rules check and probing both ports on Windows
+        last = self.last_port
+        if self.port_name or self.serial_number or not last:
+            return False
+
+        if last.fw_version != get_app_version():
+            return False
+
+        pi = PortInfo.from_name(last.name)
+        if not pi.is_available or pi.serial_number != last.serial_number:
+            logger.info(f"last port {last.name} not available")
+            return False
+
+        logger.info(f"try last port {last.name} first")
+        self.terminals = [Terminal.from_port_info(pi)]
+        return True
+
     @Slot()
     def open(self):
+        if self.capture:
+            # a retry or a reconnect continues the capture of the stall
+            if self.capture_writer is None:
+                try:
+                    self.capture_writer = CaptureWriter.open(self.capture)
+                except Message as error:
+                    self.error.emit(error)
+                    return
+
+                logger.info(f"capture to {self.capture}")
+
+            for i, terminal in enumerate(self.terminals):
+                terminal.recorder = Recorder(self.capture_writer, i)
+
         for terminal in self.terminals:
             terminal.error.connect(self.stop)
             terminal.error.connect(self.on_terminal_error)
-            terminal.error.connect(self.error)
+            terminal.error.connect(self.report_error)
 
             # on_error handles the error message and cleanup
             if not terminal.open():
@@ -154,17 +338,39 @@ class Discovery(QObject):
 
         self.available.emit()
 
+    @Slot()
+    def close_capture(self):
+        if self.capture_writer:
+            self.capture_writer.close()
+            self.capture_writer = None
+
     @Slot()
     def probe(self):
-        self.timer.start()
+        self.timer.start(self.fast_probe_timeout if self.fast_path else self.probe_timeout)
         self.probes = [Probe(terminal) for terminal in self.terminals]
         for probe in self.probes:
             probe.select.connect(self.stop)
             probe.select.connect(self.select_terminal)
-            probe.ready.connect(self.ready)
-            probe.error.connect(self.error)
+            probe.ready.connect(self.on_probe_ready)
+            probe.error.connect(self.report_error)
             probe.start()
 
+    @Slot(Terminal)
+    def on_probe_ready(self, terminal: Terminal):
+        if not self.link_baud_rate:
+            self.ready.emit(terminal)
+            return
+
+        self.link = Link(terminal, self.link_baud_rate)
+        self.link.ready.connect(self.on_link_ready)
+        self.link.start()
+
+    @Slot(Terminal)
+    def on_link_ready(self, terminal: Terminal):
+        self.link.deleteLater()
+        self.link = None
+        self.ready.emit(terminal)
+
     @Slot()
     def stop(self):
         self.timer.stop()
@@ -194,9 +400,35 @@ class Discovery(QObject):
 
         self.terminals = [terminal]
 
+    @Slot(Message)
+    def report_error(self, error: Message):
+        # another port might hold the Launchpad, the full scan finds it
+        if self.fast_path:
+            logger.info(f"last port {self.last_port.name}: {error}")
+            self.fall_back()
+            return
+
+        self.error.emit(error)
+
+    def fall_back(self):
+        self.stop()
+        self.fast_path = False
+        self.last_port = None
+        for terminal in self.terminals:
+            terminal.close()
+            terminal.deleteLater()
+
+        self.terminals = []
+        QueuedCall(self, self.find)
+
     @Slot()
     def on_timeout(self):
         logger.info("timeout")
+        if self.fast_path:
+            logger.info(f"no reply on last port {self.last_port.name}")
+            self.fall_back()
+            return
+
         self.error.emit(NoFirmware())
 
 
@@ -222,6 +454,17 @@ class NotFound(NoLaunchpad):
     """
 
 
+class DeviceNotFound(NoLaunchpad):
+    english = """Launchpad {0} not found
+
+    Connect the Launchpad with the serial number {0} via USB to your computer.
+    """
+    german = """Launchpad {0} nicht gefunden
+
+    Verbinden Sie das Launchpad mit der Seriennummer {0} über USB mit Ihrem Computer.
+    """
+
+
 class TivaLaunchpad(NoLaunchpad):
     english = """Tiva C-Series Launchpad found
 
@@ -22,6 +22,15 @@ def find_launchpad(port_infos: list[PortInfo]) -> list[PortInfo]:
     return port_infos
 
 
+def group_by_serial_number(port_infos: list[PortInfo]) -> dict[str, list[PortInfo]]:
+    # one Launchpad per serial number, the ports keep their order
+    launchpads = {}
+    for pi in port_infos:
+        launchpads.setdefault(pi.serial_number, []).append(pi)
+
+    return launchpads
+
+
 def find_tiva_launchpad(port_infos: list[PortInfo]) -> list[PortInfo]:
     # vid, pid
     return [pi for pi in port_infos if pi.vid == ti_vid and pi.pid == tiva_pid]
@@ -10,6 +10,7 @@ class PortInfo:
     name: str = ""
     vid: int = 0
     pid: int = 0
+    serial_number: str = ""
 
     is_available: bool = False
     q_port_info: QSerialPortInfo | None = None
@@ -20,6 +21,7 @@ class PortInfo:
             name=name or q_port_info.portName(),
             vid=q_port_info.vendorIdentifier(),
             pid=q_port_info.productIdentifier(),
+            serial_number=q_port_info.serialNumber(),
             is_available=not q_port_info.isNull(),
             q_port_info=q_port_info,
         )
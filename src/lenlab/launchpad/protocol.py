@@ -1,5 +1,7 @@
 from importlib import metadata
 
+from .crc32 import crc32
+
 
 def pack(code: bytes, arg: bytes = b"\x00\x00\x00\x00", length: int = 0) -> bytes:
     assert len(code) == 1
@@ -14,9 +16,63 @@ def command(code: bytes, arg: int = 0, *payload: int) -> bytes:
     return pack(code, arg.to_bytes(4, byteorder="little"), 8) + payload
 
 
+# payload length of the firmware replies by code (without the argument)
+reply_lengths = {
+    b"k": 0,  # knock
+    b"8": 0,  # version
+    b"v": 0,  # start logging
+    b"u": 0,  # logging example data
+    b"s": 2 * 2000,  # sinus
+    b"a": 27 * 1024,  # acquire
+    b"b": 27 * 1024,  # bode
+    b"l": 0,  # link mode
+}
+
+# get points: up to 1024 points, two channels of uint16
+max_points_length = 4 * 1024
+
+
+def is_plausible_reply(head: bytes) -> bool:
+    """Check label, code, and length of a firmware reply header (first four bytes).
+
+    A prefix of a plausible header is plausible, too.
+    """
+    if head[0:1] != b"L":
+        return False
+
+    code = bytes(head[1:2])
+    if not code:
+        return True
+
+    if code != b"x" and code not in reply_lengths:
+        return False
+
+    if len(head) < 4:
+        return True
+
+    length = int.from_bytes(head[2:4], byteorder="little")
+    if code == b"x":
+        return length % 4 == 0 and length <= max_points_length
+
+    return length == reply_lengths[code]
+
+
+# link mode: a CRC32 trailer on each firmware reply, the same CRC as the BSL
+checksum_size = 4
+
+
+def checksum(packet: bytes | memoryview) -> bytes:
+    return crc32(packet).to_bytes(checksum_size, byteorder="little")
+
+
+def has_valid_checksum(packet: bytes | memoryview) -> bool:
+    """Check the CRC32 trailer of a reply in link mode."""
+    return checksum(packet[:-checksum_size]) == packet[-checksum_size:]
+
+
 def unpack_fw_version(reply: bytes) -> str | None:
     if reply[0:4] == b"L8\x00\x00":
-        return "8." + reply[4:8].strip(b"\x00").decode("ascii", errors="strict")
+        return "8." + bytes(reply[4:8]).strip(b"\x00").decode("ascii", errors="strict")
 
     return None
 
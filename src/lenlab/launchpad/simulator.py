@@ -0,0 +1,621 @@
+import logging
+
+import numpy as np
+from PySide6.QtCore import QByteArray, QElapsedTimer, QIODeviceBase, QObject, QTimer, Signal
+from PySide6.QtSerialPort import QSerialPort
+
+from . import bsl
+from .crc32 import crc32
+from .launchpad import KB
+from .protocol import checksum, get_example_version_reply, pack
+from .terminal import Terminal
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualPort(QObject):
+    """In-process serial port.
+
+    It implements the subset of QSerialPort, which the terminal uses. The device
+    side transmits packets with `transmit` and receives the host's bytes in `receive`.
+
+    The port paces the transmission like a UART with 8N1 framing at the device's baud rate.
+    It may split the transmission into small fragments and damage packets on purpose.
+    """
+
+    readyRead = Signal()
+    errorOccurred = Signal(QSerialPort.SerialPortError)
+
+    device_baud_rate = 1_000_000
+
+    def __init__(
+        self,
+        parent: QObject | None = None,
+        pacing: bool = True,
+        fragment_size: int = 0,
+        corruption: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__(parent)
+        self.pacing = pacing
+        self.fragment_size = fragment_size  # maximum bytes per readyRead, 0 means no limit
+        self.corruption = corruption  # probability of a damaged packet
+        self.rng = np.random.default_rng(seed)
+
+        self.is_open = False
+        self.baud_rate = 9_600
+
+        self.rx = bytearray()  # arrived at the host
+        self.wire = bytearray()  # on the wire
+        self.wire_clock = QElapsedTimer()
+        self.wire_sent = 0
+
+        self.wire_timer = QTimer(self)
+        self.wire_timer.setInterval(1 if pacing else 0)
+        self.wire_timer.timeout.connect(self.on_wire_timeout)
+
+    @classmethod
+    def create_terminal(cls, **kwargs) -> Terminal:
+        terminal = Terminal("simulator")
+        terminal.port = cls(terminal, **kwargs)
+        return terminal
+
+    @property
+    def bytes_per_second(self) -> float:
+        # start bit, 8 data bits, stop bit
+        return self.device_baud_rate / 10
+
+    @property
+    def is_transmitting(self) -> bool:
+        return bool(self.wire)
+
+    # QSerialPort interface
+
+    def isOpen(self) -> bool:
+        return self.is_open
+
+    def open(self, mode: QIODeviceBase.OpenModeFlag) -> bool:
+        self.is_open = True
+        self.errorOccurred.emit(QSerialPort.SerialPortError.NoError)
+        return True
+
+    def close(self) -> None:
+        self.is_open = False
+        self.wire_timer.stop()
+        self.wire.clear()
+        self.rx.clear()
+
+    def clear(self) -> bool:
+        self.rx.clear()
+        return True
+
+    def errorString(self) -> str:
+        return ""
+
+    def baudRate(self) -> int:
+        return self.baud_rate
+
+    def setBaudRate(self, baud_rate: int) -> bool:
+        self.baud_rate = baud_rate
+        return True
+
+    def bytesAvailable(self) -> int:
+        return len(self.rx)
+
+    def peek(self, n: int) -> QByteArray:
+        return QByteArray(bytes(self.rx[:n]))
+
+    def read(self, n: int) -> QByteArray:
+        data = QByteArray(bytes(self.rx[:n]))
+        del self.rx[:n]
+        return data
+
+    def write(self, data: bytes) -> int:
+        # the device does not understand bytes at a false baud rate
+        if self.is_open and self.baud_rate == self.device_baud_rate:
+            self.receive(bytes(data))
+
+        return len(data)
+
+    # device side
+
+    def receive(self, data: bytes) -> None:
+        pass
+
+    def transmit(self, packet: bytes) -> None:
+        if self.corruption and self.rng.random() < self.corruption:
+            packet = self.damage(packet)
+
+        if not self.wire:
+            self.wire_clock.start()
+            self.wire_sent = 0
+            self.wire_timer.start()
+
+        self.wire += packet
+
+    def damage(self, packet: bytes) -> bytes:
+        packet = bytearray(packet)
+        i = int(self.rng.integers(len(packet)))
+        kind = self.rng.integers(3)
+        if kind == 0:  # flip a bit
+            packet[i] ^= 1 << int(self.rng.integers(8))
+        elif kind == 1:  # lose a byte
+            del packet[i]
+        else:  # lose the rest
+            del packet[i:]
+
+        logger.debug(f"damage packet {bytes(packet[:8])}")
+        return bytes(packet)
+
+    def on_wire_timeout(self) -> None:
+        if self.pacing:
+            due = int(self.wire_clock.nsecsElapsed() * 1e-9 * self.bytes_per_second)
+            n = min(due - self.wire_sent, len(self.wire))
+        else:
+            n = len(self.wire)
+
+        if n <= 0:
+            return
+
+        data = bytes(self.wire[:n])
+        del self.wire[:n]
+        self.wire_sent += n
+        if not self.wire:
+            self.wire_timer.stop()
+            self.on_transmitted()
+
+        if not self.is_open:
+            return
+
+        if self.fragment_size:
+            while data:
+                size = int(self.rng.integers(1, self.fragment_size, endpoint=True))
+                self.rx += data[:size]
+                data = data[size:]
+                self.readyRead.emit()
+        else:
+            self.rx += data
+            self.readyRead.emit()
+
+    def on_transmitted(self) -> None:
+        pass
+
+
+class Simulator(VirtualPort):
+    """Lenlab firmware in software.
+
+    It speaks the protocol of `workspace/lenlab_fw/interpreter.c` with synthetic signals.
+    The oscilloscope measures the signal generator on channel 1
+    and a first order low pass filter on channel 2.
+    The voltmeter logs a slow sine on channel 1 and a ramp on channel 2.
+    It implements the link mode (commands `l` and `r`) ahead of the firmware.
+    """
+
+    command_size = 16  # header and 4 uint16_t
+
+    n_points = 1024  # points per logging buffer
+    n_blocks = 8
+    n_block_samples = 2 * 432  # per channel
+    waveform_window = 6000
+    pre_blocks = 4
+
+    # baud rates of the link mode
+    link_baud_rates = (2_000_000, 4_000_000, 8_000_000)
+
+    cutoff_frequency = 1_000.0  # low pass filter on channel 2
+    noise = 1.0  # standard deviation in ADC codes
+
+    def __init__(self, parent: QObject | None = None, **kwargs):
+        super().__init__(parent, **kwargs)
+
+        self.command = bytearray()
+        self.handlers = {
+            b"k": self.on_knock,
+            b"8": self.on_version,
+            b"s": self.on_sinus,
+            b"a": self.on_acquire,
+            b"b": self.on_bode,
+            b"v": self.on_start_logging,
+            b"x": self.on_get_points,
+            b"u": self.on_example_data,
+            b"l": self.on_link,
+            b"r": self.on_retransmit,
+        }
+
+        # the firmware hangs when it should transmit while transmitting
+        self.hung = False
+
+        # link mode
+        self.crc_mode = False
+        self.next_baud_rate = 0  # after the confirmation
+        self.last_packet = b""  # for a retransmission
+
+        # the main timer paces the acquisition of a waveform
+        self.main_timer = QTimer(self)
+        self.main_timer.setSingleShot(True)
+        self.main_timer.timeout.connect(self.on_main_timeout)
+        self.waveform = b""
+
+        self.signal = np.zeros(2000, dtype="<i2")
+        self.components: list[tuple[int, int]] = []  # amplitude, multiplier
+
+        self.polling = 0  # argument of the points reply
+        self.log_interval = 1
+        self.log_clock = QElapsedTimer()
+        self.log_index = 0  # points collected
+        self.log_end: int | None = 0  # points at timer stop
+        self.example_data: list[bytes] = []
+
+    def receive(self, data: bytes) -> None:
+        self.command += data
+        while len(self.command) >= self.command_size:
+            packet = bytes(self.command[: self.command_size])
+            del self.command[: self.command_size]
+            self.handle_command(packet)
+
+    def handle_command(self, packet: bytes) -> None:
+        if self.hung:
+            return
+
+        length = int.from_bytes(packet[2:4], byteorder="little")
+        if packet[0:1] != b"L" or length != 8:
+            return
+
+        code = packet[1:2]
+        arg = int.from_bytes(packet[4:8], byteorder="little")
+        payload = np.frombuffer(packet, np.dtype("<u2"), offset=8)
+        if handler := self.handlers.get(code):
+            handler(arg, *(int(x) for x in payload))
+
+    def send(self, code: bytes, arg: int, payload: bytes = b"") -> None:
+        self.send_packet(pack(code, arg.to_bytes(4, byteorder="little"), len(payload)) + payload)
+
+    def send_packet(self, packet: bytes) -> None:
+        if self.is_transmitting:
+            logger.warning("transmit while transmitting, the firmware hangs")
+            self.hung = True
+            return
+
+        if self.crc_mode:
+            packet += checksum(packet)
+
+        self.last_packet = packet
+        self.transmit(packet)
+
+    # signal generator
+
+    def create_sinus(self, length: int, amplitude: int, multiplier: int, harmonic: int) -> None:
+        length = min(length, self.signal.shape[0])
+        self.components = [(amplitude, 1)]
+        if multiplier > 1 and harmonic > 0:
+            self.components.append((harmonic, multiplier))
+
+        t = np.linspace(0, 2 * np.pi, endpoint=False, num=length)
+        sinus = sum(np.sin(t * m) * a for a, m in self.components)
+        self.signal[:length] = np.round(sinus)
+
+    def on_sinus(self, arg, length, amplitude, multiplier, harmonic):
+        self.create_sinus(length, amplitude, multiplier, harmonic)
+        self.send(b"s", length, self.signal.tobytes())
+
+    # oscilloscope
+
+    def acquire(self, code: bytes, interval: int, length: int) -> None:
+        interval &= 0xFFFF  # uint16_t
+        if not interval or length < 2:
+            return  # the firmware would divide by zero
+
+        # trigger: the window begins at the same phase of the signal, in double samples
+        end = (self.n_blocks + self.pre_blocks) * self.n_block_samples // 2 - 1
+        mid = end - self.waveform_window // 4
+        begin = end - self.waveform_window // 2
+        offset = begin - (mid % (length >> 1))
+        offset = (offset % (self.n_block_samples // 2)) * 2  # single samples in the first block
+
+        # the signal crosses zero rising in the middle of the window
+        n = self.n_blocks * self.n_block_samples
+        angle = 2 * np.pi * (np.arange(n) - offset - self.waveform_window // 2) / length
+        frequency = 40e6 / interval / length
+
+        ch1 = np.full(n, 2048.0)
+        ch2 = np.full(n, 2048.0)
+        for amplitude, multiplier in self.components:
+            ch1 += amplitude * np.sin(angle * multiplier)
+            transfer = 1 / (1 + 1j * frequency * multiplier / self.cutoff_frequency)
+            ch2 += amplitude * abs(transfer) * np.sin(angle * multiplier + np.angle(transfer))
+
+        channels = np.concatenate((ch1, ch2))
+        channels += self.rng.normal(0.0, self.noise, channels.shape)
+        codes = np.clip(np.round(channels), 0, 4095).astype("<u2")
+
+        # acquisition time of the ring buffer in ms
+        n_acquired = (self.n_blocks + self.pre_blocks) * self.n_block_samples
+        arg = (interval + (offset << 16)).to_bytes(4, byteorder="little")
+        self.waveform = pack(code, arg, codes.nbytes) + codes.tobytes()
+        self.main_timer.start(int(n_acquired * interval * 25e-6) if self.pacing else 0)
+
+    def on_main_timeout(self):
+        self.send_packet(self.waveform)
+
+    def on_acquire(self, arg, length, amplitude, multiplier, harmonic):
+        self.stop_main_timer()
+        self.create_sinus(length, amplitude, multiplier, harmonic)
+        self.acquire(b"a", arg, length)
+
+    def on_bode(self, arg, length, amplitude, multiplier, harmonic):
+        self.stop_main_timer()
+        self.create_sinus(length, amplitude, 0, 0)
+        self.acquire(b"b", arg, length)
+
+    # voltmeter
+
+    def stop_main_timer(self) -> None:
+        # logging and acquisition share the main timer
+        self.main_timer.stop()
+        if self.log_end is None:
+            self.log_end = self.points_available()
+
+    def points_available(self) -> int:
+        if self.log_end is not None:
+            return self.log_end
+
+        n = self.log_clock.nsecsElapsed() // (self.log_interval * 25)
+        if n >= self.log_index + self.n_points:
+            # the timer stops with a full buffer
+            self.log_end = self.log_index + self.n_points
+            return self.log_end
+
+        return n
+
+    def create_points(self, begin: int, end: int) -> bytes:
+        t = np.arange(begin, end) * self.log_interval * 25e-9
+        ch1 = 1.65 + np.sin(2 * np.pi * t / 10.0)  # 10 s
+        ch2 = (t % 20.0) / 20.0 * 3.3  # 20 s
+        volts = np.stack((ch1, ch2), axis=1)
+        volts += self.rng.normal(0.0, self.noise * 3.3 / 4095, volts.shape)
+        return np.clip(np.round(volts * 4095 / 3.3), 0, 4095).astype("<u2").tobytes()
+
+    def on_start_logging(self, arg, *payload):
+        self.stop_main_timer()
+        self.example_data = []
+        self.polling = 1
+        self.log_interval = max(arg, 1)
+        self.log_index = 0
+        self.log_end = None
+        self.log_clock.start()
+        self.send(b"v", arg)
+
+    def on_get_points(self, arg, *payload):
+        if arg == 0:  # stop logging
+            self.stop_main_timer()
+            self.polling = 0
+
+        if self.example_data:
+            # like the firmware, the example data packets have got the code v
+            self.send(b"v", 0, self.example_data[0])
+            self.example_data.reverse()  # ping pong
+            return
+
+        end = self.points_available()
+        points = self.create_points(self.log_index, end)
+        self.log_index = end
+        self.send(b"x", self.polling, points)
+
+    def on_example_data(self, arg, *payload):
+        self.stop_main_timer()
+
+        i = np.arange(self.n_points) << 2
+        self.example_data = [
+            np.stack((i, 4096 - i), axis=1).astype("<u2").tobytes(),
+            np.stack((4096 - i, i), axis=1).astype("<u2").tobytes(),
+        ]
+        self.send(b"u", arg)
+
+    # link mode
+
+    def on_link(self, arg, *payload):
+        if arg not in self.link_baud_rates:
+            return  # the host stays at the default baud rate
+
+        # confirm at the current baud rate, then switch
+        self.send(b"l", arg)
+        self.next_baud_rate = arg
+
+    def on_transmitted(self):
+        if self.next_baud_rate:
+            self.device_baud_rate, self.next_baud_rate = self.next_baud_rate, 0
+            self.crc_mode = True
+
+    def on_retransmit(self, arg, *payload):
+        if self.is_transmitting:
+            logger.warning("transmit while transmitting, the firmware hangs")
+            self.hung = True
+            return
+
+        self.transmit(self.last_packet)
+
+    # terminal
+
+    def on_knock(self, arg, *payload):
+        self.stop_main_timer()
+        self.send(b"k", int.from_bytes(b"nock", byteorder="little"))
+
+    def on_version(self, arg, *payload):
+        reply = get_example_version_reply()
+        self.send(reply[1:2], int.from_bytes(reply[4:8], byteorder="little"))
+
+
+class BslSimulator(VirtualPort):
+    """MSPM0 Bootstrap Loader in software.
+
+    It implements the subset of the BSL commands (SLAU887), which the programmer uses,
+    on a simulated main flash memory. The flash memory programs like the real one:
+    a write clears bits, only an erase sets them again.
+    """
+
+    flash_size = 128 * KB
+    sector_size = 1 * KB
+
+    # 7: 1 MBaud
+    baud_rates = {7: 1_000_000}
+
+    device_info = (
+        b"1\x00\x01\x00\x01\x00\x00\x00\x00\x01\x00\xc0>`\x01\x00 \x01\x00\x00\x00\x01\x00\x00\x00"
+    )
+
+    def __init__(
+        self,
+        parent: QObject | None = None,
+        verification: bool = True,
+        stuck_bits: bool = False,
+        max_buffer_size: int = 0,
+        **kwargs,
+    ):
+        super().__init__(parent, **kwargs)
+        self.device_baud_rate = 9_600
+        if max_buffer_size:
+            # after response, versions and interface version
+            size = max_buffer_size.to_bytes(2, byteorder="little")
+            self.device_info = self.device_info[:11] + size + self.device_info[13:]
+        self.next_baud_rate = 0  # after the acknowledgement
+
+        self.verification = verification  # supports the standalone verification
+        self.stuck_bits = stuck_bits  # a write misses the lowest bit of each byte
+
+        self.flash = np.full(self.flash_size, 0xFF, dtype=np.uint8)
+        self.unlocked = False
+        self.started = False
+        self.commands: list[int] = []  # command codes received
+
+        self.packet = bytearray()
+        self.handlers = {
+            0x12: self.on_connect,
+            0x13: self.on_range_erase,
+            0x15: self.on_mass_erase,
+            0x19: self.on_device_info,
+            0x21: self.on_unlock,
+            0x24: self.on_program_data_fast,
+            0x26: self.on_verification,
+            0x40: self.on_start_application,
+            0x52: self.on_change_baud_rate,
+        }
+
+    def receive(self, data: bytes) -> None:
+        self.packet += data
+        while self.packet:
+            if self.packet[0] != 0x80:
+                del self.packet[0]
+                self.ack(0x51)  # header incorrect
+                continue
+
+            if len(self.packet) < 3:
+                return
+
+            length = int.from_bytes(self.packet[1:3], byteorder="little")
+            if len(self.packet) < length + 7:
+                return
+
+            payload = bytes(self.packet[3 : length + 3])
+            check = int.from_bytes(self.packet[length + 3 : length + 7], byteorder="little")
+            del self.packet[: length + 7]
+
+            if crc32(payload) != check:
+                self.ack(0x52)  # checksum incorrect
+            elif handler := self.handlers.get(payload[0]):
+                self.commands.append(payload[0])
+                handler(payload[1:])
+            else:
+                self.respond(b"\x3b\x07")  # invalid command
+
+    def ack(self, code: int = 0x00) -> None:
+        self.transmit(bytes([code]))
+
+    def respond(self, payload: bytes) -> None:
+        packet = bsl.pack(payload)
+        # the response packet begins with the acknowledgement and the header 0x08
+        self.transmit(b"\x00\x08" + packet[1:])
+
+    def on_transmitted(self) -> None:
+        if self.next_baud_rate:
+            self.device_baud_rate, self.next_baud_rate = self.next_baud_rate, 0
+
+    def address_range(self, start: int, end: int) -> slice | None:
+        if start < 0 or end > self.flash_size or start >= end:
+            return None
+
+        return slice(start, end)
+
+    # commands
+
+    def on_connect(self, data: bytes) -> None:
+        self.ack()
+
+    def on_change_baud_rate(self, data: bytes) -> None:
+        if baud_rate := self.baud_rates.get(data[0]):
+            self.ack()
+            self.next_baud_rate = baud_rate
+        else:
+            self.ack(0x54)  # unknown baud rate
+
+    def on_device_info(self, data: bytes) -> None:
+        self.respond(self.device_info)
+
+    def on_unlock(self, data: bytes) -> None:
+        self.unlocked = data == b"\xff" * 32
+        self.respond(b"\x3b\x00" if self.unlocked else b"\x3b\x05")
+
+    def on_mass_erase(self, data: bytes) -> None:
+        if not self.unlocked:
+            self.respond(b"\x3b\x04")  # locked
+            return
+
+        self.flash[:] = 0xFF
+        self.respond(b"\x3b\x00")
+
+    def on_range_erase(self, data: bytes) -> None:
+        start = int.from_bytes(data[0:4], byteorder="little")
+        end = int.from_bytes(data[4:8], byteorder="little")
+        if not self.unlocked:
+            self.respond(b"\x3b\x04")  # locked
+            return
+
+        # the erase covers whole sectors, end is the last address
+        start -= start % self.sector_size
+        end += self.sector_size - end % self.sector_size
+        if (sectors := self.address_range(start, end)) is None:
+            self.respond(b"\x3b\x02")  # invalid address
+            return
+
+        self.flash[sectors] = 0xFF
+        self.respond(b"\x3b\x00")
+
+    def on_program_data_fast(self, data: bytes) -> None:
+        address = int.from_bytes(data[0:4], byteorder="little")
+        block = np.frombuffer(data, np.uint8, offset=4)
+        target = self.address_range(address, address + block.size)
+        if not self.unlocked or target is None:
+            return  # no acknowledgement in fast mode
+
+        if self.stuck_bits:
+            block = block | 1
+
+        self.flash[target] &= block
+        self.ack()
+
+    def on_verification(self, data: bytes) -> None:
+        address = int.from_bytes(data[0:4], byteorder="little")
+        size = int.from_bytes(data[4:8], byteorder="little")
+        if not self.verification:
+            self.respond(b"\x3b\x07")  # invalid command
+            return
+
+        target = self.address_range(address, address + size)
+        if not self.unlocked or size < 1 * KB or target is None:
+            self.respond(b"\x3b\x02")  # invalid address or length
+            return
+
+        self.respond(b"\x32" + crc32(self.flash[target].tobytes()).to_bytes(4, byteorder="little"))
+
+    def on_start_application(self, data: bytes) -> None:
+        self.ack()
+        self.started = True
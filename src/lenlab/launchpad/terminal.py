@@ -1,11 +1,13 @@
 import logging
 from typing import Self
 
-from PySide6.QtCore import QIODeviceBase, QObject, Signal, Slot
+from PySide6.QtCore import QCoreApplication, QIODeviceBase, QObject, Signal, Slot
 from PySide6.QtSerialPort import QSerialPort
 
 from ..message import Message
+from .buffer import BufferPool
 from .port_info import PortInfo
+from .protocol import checksum_size, has_valid_checksum, is_plausible_reply
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,8 @@ class Terminal(QObject):
     ack = Signal()
     error = Signal(Message)
     reply = Signal(bytes)
+    dropped = Signal(Message)  # damaged packet, the connection stays open
+    corrupt = Signal(bytes)  # header of a complete reply with a false checksum
 
     port: QSerialPort
 
@@ -22,12 +26,41 @@ class Terminal(QObject):
         self.ack_mode = False
         self.port_name = port_name
 
+        # receive buffer, unprocessed bytes between rx_begin and rx_end
+        self.pool = BufferPool()
+        self.rx = self.pool.acquire()
+        self.rx_begin = 0
+        self.rx_end = 0
+
+        # resync mode skips damaged firmware replies instead of failing
+        self.resync_mode = False
+        self.skipped_bytes = 0
+        self.resync_count = 0
+
+        # link mode checks the CRC32 trailer of the firmware replies
+        self.crc_mode = False
+        self.crc_errors = 0
+
+        # raw capture of the traffic
+        self.recorder = None
+
+        # the probe reads the version of the firmware
+        self.fw_version = ""
+
     @classmethod
     def from_port_info(cls, port_info: PortInfo) -> Self:
         terminal = cls(port_info.name)
-        terminal.port = QSerialPort(port_info.q_port_info)
+        # the port is a child to move with the terminal to another thread
+        terminal.port = QSerialPort(port_info.q_port_info, terminal)
         return terminal
 
+    @property
+    def buffer(self) -> memoryview:
+        return memoryview(self.rx)[self.rx_begin : self.rx_end]
+
+    def clear_buffer(self) -> None:
+        self.rx_begin = self.rx_end = 0
+
     @property
     def bytes_available(self) -> int:
         return self.port.bytesAvailable()
@@ -50,6 +83,7 @@ class Terminal(QObject):
         logger.debug(f"open {self.port_name}")
         if self.port.open(QIODeviceBase.OpenModeFlag.ReadWrite):
             self.port.clear()  # windows might have leftovers
+            self.clear_buffer()
             return True
 
         return False
@@ -65,15 +99,28 @@ class Terminal(QObject):
     def peek(self, n: int) -> bytes:
         return self.port.peek(n).data()
 
-    def read(self, n: int) -> bytes:
-        return self.port.read(n).data()
+    def read(self, n: int) -> memoryview:
+        # a view of the QByteArray without a copy to bytes
+        return memoryview(self.port.read(n))
 
     def write(self, packet: bytes) -> int:
         logger.debug(f"write {packet}")
+        if self.recorder:
+            self.recorder.sent(packet)
+
         return self.port.write(packet)
 
+    def return_to_main_thread(self) -> None:
+        # the error handlers on the main thread close and delete the terminal
+        main_thread = QCoreApplication.instance().thread()
+        if self.thread() != main_thread:
+            self.moveToThread(main_thread)
+
     @Slot(QSerialPort.SerialPortError)
     def on_error_occurred(self, error):
+        if error is not QSerialPort.SerialPortError.NoError:
+            self.return_to_main_thread()
+
         if error is QSerialPort.SerialPortError.NoError:
             pass
         elif error is QSerialPort.SerialPortError.PermissionError:
@@ -84,30 +131,124 @@ class Terminal(QObject):
             logger.debug(f"{self.port_name}: {self.port.errorString()}")
             self.error.emit(PortError(self.port_name, self.port.errorString()))
 
+    def receive(self, data: bytes | memoryview) -> None:
+        if self.rx_begin == self.rx_end:
+            self.clear_buffer()
+
+        n = len(data)
+        if self.rx_end + n > len(self.rx):
+            # move the unprocessed bytes to the front of another buffer from the pool
+            size = self.rx_end - self.rx_begin
+            rx = self.pool.acquire(size + n)
+            memoryview(rx)[:size] = self.buffer
+            self.pool.release(self.rx)
+            self.rx, self.rx_begin, self.rx_end = rx, 0, size
+
+        memoryview(self.rx)[self.rx_end : self.rx_end + n] = data
+        self.rx_end += n
+
     @Slot()
     def on_ready_read(self):
-        n = self.bytes_available
-        head = self.peek(4)
-        if not self.ack_mode and (head[0:1] == b"L" or head[0:2] == b"\x00\x08"):
-            if n >= 8:
-                length = int.from_bytes(head[2:4], "little") + 8
-                if n == length:
-                    reply = self.read(n)
-                    logger.debug(f"reply {reply[:8]}")
-                    self.reply.emit(reply)
-                elif n > length:
-                    packet = self.read(n)
-                    self.error.emit(OverlongPacket(n, packet[:12].hex()))
-
-        # a single zero is valid in both modes
-        elif n == 1 and head[0:1] == b"\x00":
-            if self.ack_mode:
-                self.read(n)
-                self.ack.emit()
+        # the receive buffer keeps incomplete packets for the next call
+        data = self.read(self.bytes_available)
+        if self.recorder:
+            self.recorder.received(data)
+
+        self.receive(data)
 
+        while self.buffer:
+            # a slot may change the mode, check it for every packet
+            if self.ack_mode:
+                # a single zero is valid in both modes
+                if self.buffer == b"\x00":
+                    self.clear_buffer()
+                    self.ack.emit()
+                else:
+                    self.drop_invalid()
+
+                return
+
+            if self.resync_mode:
+                if not is_plausible_reply(self.buffer[:4]):
+                    self.resync()
+                    continue
+
+            elif not is_valid_prefix(self.buffer[:2]):
+                self.drop_invalid()
+                return
+
+            if len(self.buffer) < 8:
+                return  # incomplete header
+
+            length = int.from_bytes(self.buffer[2:4], byteorder="little") + 8
+            size = length + checksum_size if self.crc_mode else length
+            if len(self.buffer) < size:
+                return  # incomplete packet
+
+            if self.crc_mode and not has_valid_checksum(self.buffer[:size]):
+                self.reject(size)
+                continue
+
+            # the reply is a view of the receive buffer, valid until the slots return
+            # a slot copies the data to keep it
+            reply = self.buffer[:length]
+            self.rx_begin += size
+            logger.debug(f"reply {bytes(reply[:8])}")
+            self.reply.emit(reply)
+
+        # the whole buffer is free again
+        self.clear_buffer()
+
+    def drop_invalid(self):
+        n = len(self.buffer)
+        packet = bytes(self.buffer[:12])
+        self.clear_buffer()
+        self.return_to_main_thread()
+        self.error.emit(InvalidPacket(n, packet.hex()))
+
+    def drop(self, n: int):
+        packet = bytes(self.buffer[:12])
+        self.rx_begin += n
+
+        self.skipped_bytes += n
+        self.resync_count += 1
+        logger.warning(
+            f"{self.port_name}: drop {n} bytes, "
+            f"{self.skipped_bytes} bytes in {self.resync_count} packets so far"
+        )
+        self.dropped.emit(DamagedPacket(n, packet.hex()))
+
+    def reject(self, n: int):
+        head = bytes(self.buffer[:8])
+        self.rx_begin += n
+
+        self.crc_errors += 1
+        logger.warning(f"{self.port_name}: false checksum {head}, {self.crc_errors} so far")
+        self.corrupt.emit(head)
+
+    def resync(self):
+        # skip to the next plausible reply header or a prefix of it at the end
+        i = self.rx_begin + 1
+        while (i := self.rx.find(b"L", i, self.rx_end)) != -1:
+            if is_plausible_reply(self.rx[i : min(i + 4, self.rx_end)]):
+                break
+
+            i += 1
         else:
-            packet = self.read(n)
-            self.error.emit(InvalidPacket(n, packet[:12].hex()))
+            i = self.rx_end
+
+        self.drop(i - self.rx_begin)
+
+    @Slot()
+    def discard(self):
+        # an incomplete packet will not complete after a reply timeout
+        if self.buffer:
+            self.drop(len(self.buffer))
+
+
+def is_valid_prefix(head: bytes) -> bool:
+    # Lenlab firmware packets begin with L, BSL response packets with zero and eight
+    return head[0:1] == b"L" or head == b"\x00\x08"[: len(head)]
 
 
 class PortError(Message):
@@ -151,15 +292,15 @@ class TerminalError(Message):
     pass
 
 
-class OverlongPacket(TerminalError):
-    english = """Overlong packet received: length = {0}, packet = 0x{1} ...
+class InvalidPacket(TerminalError):
+    english = """Invalid packet received: length = {0}, packet = 0x{1} ...
     """
-    german = """Überlanges Paket empfangen: Länge = {0}, Paket = 0x{1} ...
+    german = """Ungültiges Paket empfangen: Länge = {0}, Paket = 0x{1} ...
     """
 
 
-class InvalidPacket(TerminalError):
-    english = """Invalid packet received: length = {0}, packet = 0x{1} ...
+class DamagedPacket(TerminalError):
+    english = """Damaged packet dropped: length = {0}, packet = 0x{1} ...
     """
-    german = """Ungültiges Paket empfangen: Länge = {0}, Paket = 0x{1} ...
+    german = """Beschädigtes Paket verworfen: Länge = {0}, Paket = 0x{1} ...
     """
@@ -0,0 +1,57 @@
+import logging
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from .launchpad import find_launchpad
+from .port_info import PortInfo
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceWatcher(QObject):
+    """Watch for Launchpads to appear and vanish.
+
+    The watcher compares the Launchpad ports in the list of available ports periodically.
+    It works the same on all platforms and does not open any port.
+    """
+
+    plugged = Signal()
+    unplugged = Signal()
+
+    default_interval = 1000  # ms
+
+    def __init__(self, interval: int = default_interval):
+        super().__init__()
+        self.ports: set[str] = set()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.poll)
+
+    def start(self):
+        self.ports = self.find_ports()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    @staticmethod
+    def find_ports() -> set[str]:
+        return {pi.name for pi in find_launchpad(PortInfo.available_ports())}
+
+    @Slot()
+    def poll(self):
+        ports = self.find_ports()
+        if ports == self.ports:
+            return
+
+        removed, added = self.ports - ports, ports - self.ports
+        self.ports = ports
+
+        if removed:
+            logger.info(f"unplugged {', '.join(sorted(removed))}")
+            self.unplugged.emit()
+
+        if added:
+            logger.info(f"plugged {', '.join(sorted(added))}")
+            self.plugged.emit()
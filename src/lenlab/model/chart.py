@@ -13,6 +13,10 @@ class Chart:
     x_range: tuple[float, float] = 0.0, 3.0
     y_range: tuple[float, float] = 0.0, 4.0
 
+    # envelope of compressed channels, minimum and maximum per point
+    lower: list[np.ndarray] | None = None
+    upper: list[np.ndarray] | None = None
+
     channel_labels = (
         Translate("Channel 1", "Kanal 1"),
         Translate("Channel 2", "Kanal 2"),
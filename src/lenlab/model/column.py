@@ -0,0 +1,108 @@
+from collections.abc import Callable
+
+import numpy as np
+from attrs import Factory, define
+
+
+@define
+class Column:
+    """Append-only column of samples in fixed-size chunks.
+
+    An append fills the last chunk and allocates new chunks as needed. It never copies
+    the samples already stored. A slice within a chunk is a view, a slice across chunks
+    is a contiguous copy.
+
+    The allocator may provide the chunks, for example maps of a file.
+    """
+
+    chunk_size: int = 1 << 16  # 512 KiB of doubles
+    dtype: np.dtype = Factory(lambda: np.dtype(np.double))
+
+    chunks: list[np.ndarray] = Factory(list)
+    length: int = 0
+
+    allocate: Callable[[], np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def shape(self) -> tuple[int]:
+        return (self.length,)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.chunks) * self.chunk_size
+
+    def clear(self):
+        # keep the first chunk for the next recording
+        del self.chunks[1:]
+        self.length = 0
+
+    def extend(self, values: np.ndarray, factor: float | None = None):
+        """Append the values, multiplied by the factor, straight into the chunks."""
+        offset = 0
+        while offset < values.shape[0]:
+            if self.length == self.capacity:
+                if self.allocate:
+                    self.chunks.append(self.allocate())
+                else:
+                    self.chunks.append(np.empty((self.chunk_size,), dtype=self.dtype))
+
+            chunk = self.chunks[-1]
+            begin = self.length % self.chunk_size
+            n = min(self.chunk_size - begin, values.shape[0] - offset)
+            if factor is None:
+                chunk[begin : begin + n] = values[offset : offset + n]
+            else:
+                np.multiply(values[offset : offset + n], factor, out=chunk[begin : begin + n])
+
+            offset += n
+            self.length += n
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.get_slice(key)
+
+        if isinstance(key, np.ndarray):
+            return self.take(key)
+
+        if key < 0:
+            key += self.length
+
+        if not 0 <= key < self.length:
+            raise IndexError(key)
+
+        return self.chunks[key // self.chunk_size][key % self.chunk_size]
+
+    def get_slice(self, key: slice) -> np.ndarray:
+        begin, end, step = key.indices(self.length)
+        if step != 1:
+            return self.get_slice(slice(begin, end))[::step]
+
+        if end <= begin:
+            return np.empty((0,), dtype=self.dtype)
+
+        first, last = begin // self.chunk_size, (end - 1) // self.chunk_size
+        if first == last:
+            offset = first * self.chunk_size
+            return self.chunks[first][begin - offset : end - offset]
+
+        parts = [self.chunks[first][begin - first * self.chunk_size :]]
+        parts.extend(self.chunks[first + 1 : last])
+        parts.append(self.chunks[last][: end - last * self.chunk_size])
+        return np.concatenate(parts)
+
+    def take(self, indices: np.ndarray) -> np.ndarray:
+        # gather from each chunk involved
+        chunk_ids, offsets = np.divmod(indices, self.chunk_size)
+        values = np.empty(indices.shape, dtype=self.dtype)
+        for chunk_id in np.unique(chunk_ids):
+            selection = chunk_ids == chunk_id
+            values[selection] = self.chunks[chunk_id][offsets[selection]]
+
+        return values
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.get_slice(slice(None))
+        return values if dtype is None else values.astype(dtype)
@@ -1,23 +1,116 @@
-from typing import TextIO
+from functools import partial
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, ClassVar, Self, TextIO
 
 import numpy as np
 from attrs import Factory, define
 
 from ..controller.csv import CSVTemplate
 from .chart import Chart
+from .column import Column
+from .recording import Recording
+from .session import Session, SessionAppender
+
+
+@define
+class Pyramid:
+    """Minimum, maximum, and mean of blocks of 2^k samples of a channel.
+
+    The first level summarizes blocks of 2^min_level samples of the channel,
+    each further level summarizes pairs of blocks of the level below.
+    The pyramid updates only the new complete blocks. It takes 48 / 2^min_level bytes
+    per sample, less than the raw codes of the channel.
+    """
+
+    min_level: ClassVar[int] = 6  # 64 samples
+
+    # rows of minimum, maximum, and mean
+    levels: list[np.ndarray] = Factory(list)
+    lengths: list[int] = Factory(list)  # complete blocks per level
+
+    def clear(self):
+        self.levels.clear()
+        self.lengths.clear()
+
+    def get_level(self, i: int, n_blocks: int) -> np.ndarray:
+        if i == len(self.levels):
+            self.levels.append(np.empty((max(n_blocks, 1024), 3), dtype=np.double))
+            self.lengths.append(0)
+
+        level = self.levels[i]
+        if n_blocks > level.shape[0]:
+            # double the capacity, the levels are small compared to the channel
+            level = np.pad(
+                level, ((0, max(n_blocks, 2 * level.shape[0]) - level.shape[0]), (0, 0))
+            )
+            self.levels[i] = level
+
+        return level
+
+    def update(self, channel: Column, index: int):
+        n_blocks = index >> self.min_level
+        i = 0
+        while n_blocks:
+            level = self.get_level(i, n_blocks)
+            begin = self.lengths[i]
+            if begin == n_blocks:
+                break  # no new block on this level and above
+
+            if i == 0:
+                size = 1 << self.min_level
+                blocks = channel[begin * size : n_blocks * size].reshape((-1, size))
+                level[begin:n_blocks, 0] = blocks.min(axis=1)
+                level[begin:n_blocks, 1] = blocks.max(axis=1)
+                level[begin:n_blocks, 2] = blocks.mean(axis=1)
+            else:
+                pairs = self.levels[i - 1][2 * begin : 2 * n_blocks].reshape((-1, 2, 3))
+                level[begin:n_blocks, 0] = pairs[:, :, 0].min(axis=1)
+                level[begin:n_blocks, 1] = pairs[:, :, 1].max(axis=1)
+                level[begin:n_blocks, 2] = pairs[:, :, 2].mean(axis=1)
+
+            self.lengths[i] = n_blocks
+            n_blocks >>= 1
+            i += 1
+
+    def prefix_sum(self, channel: Column, index: int, positions: np.ndarray) -> np.ndarray:
+        """Sum of channel[:position] for each position in O(log n)."""
+        size = 1 << self.min_level
+        n_blocks = positions >> self.min_level
+
+        # the samples in front of position in an incomplete block
+        offsets = np.arange(size)
+        samples = np.minimum((n_blocks << self.min_level)[:, None] + offsets, max(index - 1, 0))
+        partial = offsets < (positions & (size - 1))[:, None]
+        total = np.where(partial, channel[samples], 0.0).sum(axis=1)
+
+        # the complete blocks: one block per set bit of n_blocks
+        for k, level in enumerate(self.levels):
+            block = (n_blocks >> k) - 1
+            total += np.where(block & 1 == 0, level[np.maximum(block, 0), 2] * (size << k), 0.0)
+
+        return total
 
 
 @define
 class Points:
     interval: float = 0.0  # seconds
 
-    # 100_000 doubles is 800 KiB and 2.7 hours at 100 ms
-    # 1 million doubles is 8 MiB and 5.5 hours at 20 ms
-    channels: list[np.ndarray] = Factory(
-        lambda: [np.empty((100_000,), dtype=np.double) for _ in range(2)]
-    )  # volt
+    # store the raw 12-bit ADC codes and convert to volt on demand
+    codes: bool = False
+    scale: float = 3.3 / 4095  # volt per code
+
+    # a chunk of 65536 doubles is 512 KiB and 1.8 hours at 100 ms or 22 minutes at 20 ms
+    # 30 million doubles, a week at 20 ms, are 229 MiB per channel, the codes 57 MiB
+    channels: list[Column] = Factory(lambda self: self.create_channels(), takes_self=True)
     index: int = 0
 
+    # the channels map the file of the recording
+    recording: Recording | None = None
+
+    # summaries for the chart, one per channel
+    pyramids: list[Pyramid] = Factory(lambda: [Pyramid() for _ in range(2)])
+
     chart_updated: bool = True
     chart_batch_size: int = 1
     chart_n_points: int = 0
@@ -25,9 +118,24 @@ class Points:
     unsaved: bool = False
     save_idx: int = 0
 
+    def create_channels(self) -> list[Column]:
+        # volt or code
+        return [Column(dtype=np.dtype("<u2" if self.codes else np.double)) for _ in range(2)]
+
     def clear(self):
         self.interval = 0.0
         self.index = 0
+        if self.recording:
+            # the recording keeps the samples
+            self.stop_recording()
+            self.channels = self.create_channels()
+
+        for channel in self.channels:
+            channel.clear()
+
+        for pyramid in self.pyramids:
+            pyramid.clear()
+
         self.chart_updated = True
         self.chart_batch_size = 1
         self.chart_n_points = 0
@@ -44,7 +152,54 @@ class Points:
         else:
             return int(60 / interval)  # minutes
 
-    def parse_reply(self, reply: bytes):
+    def record(self, path: Path):
+        """Record to a memory-mapped file, including the samples so far.
+
+        The channels map the file. The memory use stays flat and the samples survive a crash.
+        """
+        self.stop_recording()
+        chunk_size, dtype = self.channels[0].chunk_size, self.channels[0].dtype
+        recording = Recording.create(path, 2, chunk_size, dtype, self.interval, self.scale)
+
+        channels = []
+        for i, channel in enumerate(self.channels):
+            mapped = Column(chunk_size, dtype, allocate=partial(recording.allocate, i))
+            for begin in range(0, self.index, chunk_size):
+                mapped.extend(channel[begin : min(begin + chunk_size, self.index)])
+
+            channels.append(mapped)
+
+        self.channels = channels
+        recording.set_length(self.index)
+        self.recording = recording
+
+    def stop_recording(self):
+        if self.recording:
+            self.recording.close()
+            self.recording = None
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """Map a recording read-only."""
+        recording = Recording.open(path)
+        points = cls(
+            recording.interval,
+            codes=recording.dtype == np.dtype("<u2"),
+            scale=recording.scale,
+            channels=[
+                Column(recording.chunk_size, recording.dtype, list(chunks), recording.length)
+                for chunks in recording.chunks
+            ],
+            index=recording.length,
+        )
+        for pyramid, channel in zip(points.pyramids, points.channels, strict=True):
+            pyramid.update(channel, points.index)
+
+        points.update_chart()
+        # the samples are in the file, like those of a session
+        return points
+
+    def parse_reply(self, reply: bytes | memoryview):
         # interval = int.from_bytes(reply[4:8], byteorder="little")
         payload = np.frombuffer(reply, np.dtype("<u2"), offset=8)
         length = payload.shape[0] // 2
@@ -55,15 +210,25 @@ class Points:
 
         index = self.index + length
         for i, channel in enumerate(self.channels):
-            if index > channel.shape[0]:
-                self.channels[i] = channel = np.pad(channel, (0, 10_000), mode="empty")
-
-            channel[self.index : index] = payload[:, i] / 4095 * 3.3
+            if self.codes:
+                channel.extend(payload[:, i])
+            else:
+                # convert straight into the channel without temporary arrays
+                channel.extend(payload[:, i], self.scale)
 
         self.index = index
+        for pyramid, channel in zip(self.pyramids, self.channels, strict=True):
+            pyramid.update(channel, index)
+
+        if self.recording:
+            # after the samples
+            self.recording.set_length(index)
+
         self.unsaved = True
+        self.update_chart()
 
-        self.chart_batch_size = self.select_batch_size(index, self.interval)
+    def update_chart(self):
+        self.chart_batch_size = self.select_batch_size(self.index, self.interval)
         chart_n_points = self.index // self.chart_batch_size
         self.chart_updated = chart_n_points != self.chart_n_points
         self.chart_n_points = chart_n_points
@@ -74,6 +239,16 @@ class Points:
         values = values.mean(axis=1)
         return values
 
+    def volts(self, values: np.ndarray) -> np.ndarray:
+        # vectorized, the volts are a view without codes
+        return values * self.scale if self.codes else values
+
+    def batch_means(self, i: int, n_points: int, batch_size: int) -> np.ndarray:
+        # the same as compress, in O(n_points log n) instead of O(n)
+        positions = np.arange(n_points + 1) * batch_size
+        sums = self.pyramids[i].prefix_sum(self.channels[i], self.index, positions)
+        return self.volts(np.diff(sums) / batch_size)
+
     @staticmethod
     def select_x_unit(time: float) -> float:
         if time <= 2.0 * 60.0:  # 2 minutes
@@ -101,9 +276,9 @@ class Points:
             return Chart()
 
         if batch_size > 1:
-            channels = [self.compress(values, n_points, batch_size) for values in self.channels]
+            channels = [self.batch_means(i, n_points, batch_size) for i in range(2)]
         else:
-            channels = [values[:n_points] for values in self.channels]
+            channels = [self.volts(values[:n_points]) for values in self.channels]
 
         x_unit = self.select_x_unit(self.index * interval)
         x = np.arange(0, n_points) * batch_size * interval / x_unit
@@ -111,22 +286,65 @@ class Points:
 
         return Chart(x=x, channels=channels, x_unit=x_unit, x_range=x_range)
 
+    def window(self, begin: int, end: int, n_pixels: int) -> Chart:
+        """Minimum, maximum, and mean of the samples from begin to end in about n_pixels points.
+
+        The pyramid answers any window in O(n_pixels) for zoom and pan.
+        """
+        begin, end = max(begin, 0), min(end, self.index)
+        if end <= begin:
+            return Chart()
+
+        # blocks of 2^k samples, at least n_pixels
+        k = max((end - begin) // max(n_pixels, 1), 1).bit_length() - 1
+        lower, upper, channels = [], [], []
+        for pyramid, channel in zip(self.pyramids, self.channels, strict=True):
+            i = min(k - pyramid.min_level, len(pyramid.levels) - 1)
+            if i < 0:
+                # blocks smaller than the first level
+                size = 1 << k
+                stop = begin + (end - begin) // size * size
+                blocks = channel[begin:stop].reshape((-1, size))
+                rows = np.stack((blocks.min(axis=1), blocks.max(axis=1), blocks.mean(axis=1)), 1)
+                k_used = k
+                first = begin
+            else:
+                k_used = i + pyramid.min_level
+                b0, b1 = begin >> k_used, min(end >> k_used, pyramid.lengths[i])
+                rows = pyramid.levels[i][b0:b1]
+                first = b0 << k_used
+
+            lower.append(self.volts(rows[:, 0]))
+            upper.append(self.volts(rows[:, 1]))
+            channels.append(self.volts(rows[:, 2]))
+
+        x_unit = self.select_x_unit((end - begin) * self.interval)
+        x = (first + np.arange(channels[0].shape[0]) * (1 << k_used)) * self.interval / x_unit
+        x_range = begin * self.interval / x_unit, end * self.interval / x_unit
+        return Chart(x, channels, x_unit, x_range, lower=lower, upper=upper)
+
     def get_last_time(self) -> float:
         # invalid when empty
         return (self.index - 1) * self.interval
 
     def get_last_value(self, channel: int) -> float:
         # invalid when empty
-        return self.channels[channel][self.index - 1]
+        value = self.channels[channel][self.index - 1]
+        return float(value * self.scale) if self.codes else value
+
+    def blocks(self, offset: int = 0):
+        # uncompressed, time in seconds, chunk by chunk
+        chunk_size = self.channels[0].chunk_size
+        begin = offset
+        while begin < self.index:
+            end = min((begin // chunk_size + 1) * chunk_size, self.index)
+            time = np.arange(begin, end) * self.interval
+            yield time, *(self.volts(channel[begin:end]) for channel in self.channels)
+            begin = end
 
     def rows(self, offset: int = 0):
-        # uncompressed, time in seconds
-        return zip(
-            np.arange(offset, self.index) * self.interval,
-            self.channels[0][offset : self.index],
-            self.channels[1][offset : self.index],
-            strict=True,
-        )
+        # a stream of rows, it does not copy the whole channels
+        return chain.from_iterable(zip(*block, strict=True) for block in self.blocks(offset))
 
     csv_template = CSVTemplate("voltmeter")
 
@@ -134,16 +352,69 @@ class Points:
         file.write(self.csv_template.head())
 
         if self.unsaved:
-            self.csv_template.write_rows(file.write, self.rows())
+            for block in self.blocks():
+                self.csv_template.write_columns(file.write, *block)
 
             self.unsaved = False
             self.save_idx = self.index
 
+    @property
+    def column_name(self) -> str:
+        return "codes" if self.codes else "volts"
+
+    def code_blocks(self, offset: int = 0):
+        # rows of both channels, raw, chunk by chunk
+        chunk_size = self.channels[0].chunk_size
+        begin = offset
+        while begin < self.index:
+            end = min((begin // chunk_size + 1) * chunk_size, self.index)
+            yield np.stack([channel[begin:end] for channel in self.channels], axis=1)
+            begin = end
+
+    def create_session(self) -> Session:
+        # the rows of the channels are the last column, the session grows
+        dtype = self.channels[0].dtype
+        return Session(
+            "voltmeter",
+            {"interval": self.interval, "scale": self.scale},
+            {self.column_name: np.empty((0, 2), dtype)},
+        )
+
+    def save_session(self, file: BinaryIO):
+        """Save the raw rows chunk by chunk, the file opens for reading and writing."""
+        self.create_session().save(file)
+        appender = SessionAppender(file)
+        for block in self.code_blocks():
+            appender.append(block)
+
+        appender.update()
+        self.unsaved = False
+        self.save_idx = self.index
+
+    @classmethod
+    def from_session(cls, session: Session) -> Self:
+        codes = "codes" in session.columns
+        values = session.columns["codes" if codes else "volts"]
+        points = cls(session.settings["interval"], codes=codes, scale=session.settings["scale"])
+        points.extend(values[:, 0], values[:, 1])
+        points.update_chart()
+        return points
+
+    def extend(self, *columns: np.ndarray):
+        """Append samples of both channels, codes or volts like the channels."""
+        for channel, values in zip(self.channels, columns, strict=True):
+            channel.extend(values)
+
+        self.index += columns[0].shape[0]
+        for pyramid, channel in zip(self.pyramids, self.channels, strict=True):
+            pyramid.update(channel, self.index)
+
     def save_update(self, file: TextIO):
         if not self.unsaved:
             return
 
-        self.csv_template.write_rows(file.write, self.rows(self.save_idx))
+        for block in self.blocks(self.save_idx):
+            self.csv_template.write_columns(file.write, *block)
 
         self.unsaved = False
         self.save_idx = self.index
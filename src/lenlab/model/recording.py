@@ -0,0 +1,151 @@
+"""Voltmeter recording in a memory-mapped file
+
+The file begins with a header of 64 bytes, little endian:
+
+    magic      8 bytes   b"LENLABR1"
+    channels   uint16
+    reserved   uint16
+    chunk      uint32    samples per chunk
+    dtype      4 bytes   numpy type string, b"<u2" (codes) or b"<f8" (volts)
+    interval   float64   seconds
+    scale      float64   volt per code
+    length     uint64    samples per channel
+
+Rows of chunks follow the header, one chunk per channel in each row. The samples are
+in the file as soon as they arrive. The length follows the samples, so the header
+of an interrupted recording counts only complete samples.
+"""
+
+import struct
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from ..message import Message
+
+
+class Recording:
+    magic = b"LENLABR1"
+    header = struct.Struct("<8sHHI4sddQ")
+    header_size = 64
+    length_offset = header.size - 8
+
+    def __init__(
+        self,
+        path: Path,
+        n_channels: int,
+        chunk_size: int,
+        dtype: np.dtype,
+        interval: float,
+        scale: float,
+        length: int = 0,
+        writable: bool = True,
+    ):
+        self.path = path
+        self.n_channels = n_channels
+        self.chunk_size = chunk_size
+        self.dtype = np.dtype(dtype)
+        self.interval = interval
+        self.scale = scale
+        self.length = length
+        self.writable = writable
+
+        self.mode = "r+" if writable else "r"
+        self.chunks: list[list[np.memmap]] = [[] for _ in range(n_channels)]
+        self.length_field = np.memmap(path, "<u8", self.mode, self.length_offset, (1,))
+
+    @classmethod
+    def create(
+        cls,
+        path: Path,
+        n_channels: int,
+        chunk_size: int,
+        dtype: np.dtype,
+        interval: float,
+        scale: float,
+    ) -> Self:
+        dtype = np.dtype(dtype)
+        head = cls.header.pack(
+            cls.magic, n_channels, 0, chunk_size, dtype.str.encode(), interval, scale, 0
+        )
+        with path.open("wb") as file:
+            file.write(head.ljust(cls.header_size, b"\x00"))
+
+        return cls(path, n_channels, chunk_size, dtype, interval, scale)
+
+    @classmethod
+    def open(cls, path: Path, writable: bool = False) -> Self:
+        with path.open("rb") as file:
+            head = file.read(cls.header_size)
+
+        if len(head) < cls.header_size or head[:8] != cls.magic:
+            raise InvalidRecording(path.name)
+
+        magic, n_channels, _, chunk_size, dtype, interval, scale, length = cls.header.unpack(
+            head[: cls.header.size]
+        )
+        recording = cls(
+            path,
+            n_channels,
+            chunk_size,
+            np.dtype(dtype.rstrip(b"\x00").decode()),
+            interval,
+            scale,
+            length,
+            writable,
+        )
+
+        # the complete rows and the row of the last samples
+        n_rows = -(-length // chunk_size)
+        size = path.stat().st_size
+        if size < recording.chunk_offset(n_rows, 0):
+            raise InvalidRecording(path.name)
+
+        for channel in range(n_channels):
+            for _ in range(n_rows):
+                recording.allocate(channel)
+
+        return recording
+
+    def chunk_offset(self, row: int, channel: int) -> int:
+        chunk_bytes = self.chunk_size * self.dtype.itemsize
+        return self.header_size + (row * self.n_channels + channel) * chunk_bytes
+
+    def allocate(self, channel: int) -> np.memmap:
+        """Map the next chunk of the channel, grow the file by a row as needed."""
+        row = len(self.chunks[channel])
+        end = self.chunk_offset(row + 1, 0)
+        if self.writable and self.path.stat().st_size < end:
+            # write the last byte, Windows cannot truncate a file with mapped views
+            with self.path.open("r+b") as file:
+                file.seek(end - 1)
+                file.write(b"\x00")
+
+        chunk = np.memmap(
+            self.path, self.dtype, self.mode, self.chunk_offset(row, channel), (self.chunk_size,)
+        )
+        self.chunks[channel].append(chunk)
+        return chunk
+
+    def set_length(self, length: int):
+        self.length = length
+        self.length_field[0] = length
+
+    def flush(self):
+        for chunks in self.chunks:
+            if chunks:
+                chunks[-1].flush()
+
+        self.length_field.flush()
+
+    def close(self):
+        if self.writable:
+            self.flush()
+
+        self.chunks = [[] for _ in range(self.n_channels)]
+
+
+class InvalidRecording(Message):
+    english = "Invalid recording: {0}"
+    german = "Ungültige Aufzeichnung: {0}"
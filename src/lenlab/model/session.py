@@ -0,0 +1,181 @@
+"""Lenlab session file
+
+A session file holds the raw data of a measurement with its settings. np.memmap maps
+the columns without parsing and a writer appends rows to the last column. The suffix
+is .lenlab-session, recordings are .lenlab.
+
+The file begins with a header of 24 bytes, little endian:
+
+    magic      8 bytes   b"LENLABS1"
+    metadata   uint32    size of the metadata in bytes
+    reserved   uint32
+    rows       uint64    rows of the last column
+
+The metadata follows the header, JSON in UTF-8, padded with spaces to a multiple of
+64 bytes (with the header):
+
+    kind       "voltmeter", "oscilloscope", or "bode_plot"
+    lenlab     version of the app
+    firmware   version of the firmware
+    settings   interval, scale, sine table index, and the like, by kind
+    columns    name, dtype (numpy type string), shape, and offset of each column
+
+The columns follow the metadata, raw little endian in C order. The offset counts from
+the end of the metadata, each column begins at a multiple of 64 bytes. The first
+dimension of the last column is the rows field of the header. The last column ends
+the file, an interrupted append leaves an incomplete row after the last row.
+"""
+
+import json
+import struct
+from importlib import metadata
+from pathlib import Path
+from typing import Any, BinaryIO, Self
+
+import numpy as np
+from attrs import Factory, define
+
+from ..launchpad.protocol import get_app_version
+from ..message import Message
+
+magic = b"LENLABS1"
+header = struct.Struct("<8sIIQ")
+rows_offset = header.size - 8
+alignment = 64
+
+# recordings are .lenlab
+suffix = ".lenlab-session"
+
+
+def is_session(file_path: Path) -> bool:
+    return file_path.name.endswith(suffix)
+
+
+def align(size: int) -> int:
+    return -(-size // alignment) * alignment
+
+
+@define
+class Session:
+    kind: str
+    settings: dict[str, Any] = Factory(dict)
+    columns: dict[str, np.ndarray] = Factory(dict)
+
+    lenlab: str = Factory(lambda: metadata.version("lenlab"))
+    firmware: str = Factory(get_app_version)
+
+    def save(self, file: BinaryIO):
+        descriptors = []
+        offset = 0
+        for name, values in self.columns.items():
+            dtype = values.dtype.newbyteorder("<")
+            descriptors.append(
+                {"name": name, "dtype": dtype.str, "shape": list(values.shape), "offset": offset}
+            )
+            offset = align(offset + values.nbytes)
+
+        content = {
+            "kind": self.kind,
+            "lenlab": self.lenlab,
+            "firmware": self.firmware,
+            "settings": self.settings,
+            "columns": descriptors,
+        }
+        data = json.dumps(content, indent=1).encode("utf-8")
+        data = data.ljust(align(header.size + len(data)) - header.size, b" ")
+
+        rows = descriptors[-1]["shape"][0] if descriptors else 0
+        file.write(header.pack(magic, len(data), 0, rows))
+        file.write(data)
+
+        position = 0
+        for values, descriptor in zip(self.columns.values(), descriptors, strict=True):
+            file.write(b"\x00" * (descriptor["offset"] - position))
+            values = np.ascontiguousarray(values, dtype=descriptor["dtype"])
+            file.write(values.tobytes())
+            position = descriptor["offset"] + values.nbytes
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """Map the columns read-only."""
+        content, rows, data_offset = read_header(path)
+        columns = {}
+        for i, descriptor in enumerate(content["columns"]):
+            shape = tuple(descriptor["shape"])
+            if i == len(content["columns"]) - 1:
+                shape = (rows, *shape[1:])
+
+            offset = data_offset + descriptor["offset"]
+            dtype = np.dtype(descriptor["dtype"])
+            if offset + dtype.itemsize * int(np.prod(shape)) > path.stat().st_size:
+                raise InvalidSession(path.name)
+
+            if 0 in shape:
+                columns[descriptor["name"]] = np.empty(shape, dtype)
+            else:
+                columns[descriptor["name"]] = np.memmap(path, dtype, "r", offset, shape)
+
+        return cls(
+            content["kind"],
+            content["settings"],
+            columns,
+            content["lenlab"],
+            content["firmware"],
+        )
+
+
+def read_header(path: Path) -> tuple[dict[str, Any], int, int]:
+    with path.open("rb") as file:
+        head = file.read(header.size)
+        if len(head) < header.size or head[:8] != magic:
+            raise InvalidSession(path.name)
+
+        _, size, _, rows = header.unpack(head)
+        try:
+            content = json.loads(file.read(size).decode("utf-8"))
+        except ValueError:
+            raise InvalidSession(path.name) from None
+
+    return content, rows, header.size + size
+
+
+class SessionAppender:
+    """Append rows to the last column of a session file.
+
+    The rows field follows the rows at each update.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+        file.seek(0)
+        head = file.read(header.size)
+        if len(head) < header.size or head[:8] != magic:
+            raise InvalidSession(getattr(file, "name", ""))
+
+        _, size, _, self.rows = header.unpack(head)
+        content = json.loads(file.read(size).decode("utf-8"))
+        last = content["columns"][-1]
+        self.dtype = np.dtype(last["dtype"])
+        self.row_size = self.dtype.itemsize * int(np.prod(last["shape"][1:]))
+
+        # after the last complete row
+        file.seek(header.size + size + last["offset"] + self.rows * self.row_size)
+        file.truncate()
+
+    def append(self, values: np.ndarray):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        if values.size:
+            self.file.write(memoryview(values.reshape(-1)).cast("B"))
+        self.rows += values.shape[0]
+
+    def update(self):
+        end = self.file.tell()
+        self.file.seek(rows_offset)
+        self.file.write(self.rows.to_bytes(8, byteorder="little"))
+        self.file.seek(end)
+
+
+class InvalidSession(Message):
+    english = "Invalid session file: {0}"
+    german = "Ungültige Sitzungsdatei: {0}"
@@ -1,10 +1,11 @@
-from typing import Self, TextIO
+from typing import Any, BinaryIO, Self, TextIO
 
 import numpy as np
 from attrs import frozen
 
 from ..controller.csv import CSVTemplate
 from .chart import Chart
+from .session import Session
 
 
 @frozen
@@ -21,8 +22,11 @@ class Waveform:
     time_step: float = 0.0
     channels: list[np.ndarray] | None = None
 
+    # the raw ADC codes, channel 1 and channel 2
+    codes: np.ndarray | None = None
+
     @classmethod
-    def parse_reply(cls, reply: bytes) -> Self:
+    def parse_reply(cls, reply: bytes | memoryview) -> Self:
         sampling_interval_25ns = int.from_bytes(reply[4:6], byteorder="little")
         offset = int.from_bytes(reply[6:8], byteorder="little")
         payload = np.frombuffer(reply, np.dtype("<u2"), offset=8)
@@ -32,12 +36,18 @@ class Waveform:
         # 12 bit signed binary (2s complement), left aligned
         # payload = payload >> 4
 
+        # a copy, the reply may be a view of the receive buffer
+        return cls.from_codes(payload.copy(), offset, time_step)
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, offset: int, time_step: float) -> Self:
         # 12 bit unsigned integer
-        data = payload.astype(np.float64) / 4095 * 3.3 - 1.65  # 12 bit ADC
+        data = np.multiply(codes, 3.3 / 4095, dtype=np.float64)  # 12 bit ADC
+        data -= 1.65
         length = data.shape[0] // 2  # 2 channels
         channels = [data[:length], data[length:]]
 
-        return cls(length, offset, time_step, channels)
+        return cls(length, offset, time_step, channels, codes)
 
     def create_chart(self) -> WaveformChart:
         n_points = 6001
@@ -60,4 +70,25 @@ class Waveform:
 
         if self.length:
             chart = self.create_chart()
-            self.csv_template.write_rows(file.write, chart.rows())
+            self.csv_template.write_columns(file.write, chart.x, *chart.channels)
+
+    def save_session(self, file: BinaryIO, settings: dict[str, Any]):
+        codes = self.codes if self.codes is not None else np.empty((0,), np.dtype("<u2"))
+        Session(
+            "oscilloscope",
+            {"offset": self.offset, "time_step": self.time_step} | settings,
+            {"codes": codes.reshape((2, -1))},
+        ).save(file)
+
+    @classmethod
+    def from_session(cls, session: Session) -> Self:
+        offset, time_step = session.settings["offset"], session.settings["time_step"]
+        if "volts" in session.columns:
+            # from a CSV file
+            channel_1, channel_2 = session.columns["volts"]
+            return cls(channel_1.shape[0], offset, time_step, [channel_1, channel_2])
+
+        if session.columns["codes"].size == 0:
+            return cls()
+
+        return cls.from_codes(np.ravel(session.columns["codes"]), offset, time_step)
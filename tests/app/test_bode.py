@@ -3,6 +3,7 @@ import pytest
 
 from lenlab.app.bode import BodeWidget
 from lenlab.controller.signal import sine_table
+from lenlab.model.session import Session
 from lenlab.model.waveform import Waveform
 
 
@@ -70,3 +71,17 @@ def test_save_as(bode, terminal, waveform, save_as_output):
     bode.on_save_as_clicked()
     content = save_as_output["file_path"].read_text(encoding="utf-8")
     assert content.startswith("Lenlab_MSPM0,8.6,bode_plot\nfrequency,magnitude,phase\n10000")
+
+
+def test_session(bode, terminal, waveform, tmp_path):
+    bode.on_start_clicked()
+    bode.bode.on_bode(waveform)
+    bode.bode.on_bode(waveform)
+
+    file_path = tmp_path / "bode.lenlab-session"
+    bode.on_save_as(file_path)
+
+    other = BodeWidget(bode.lenlab)
+    other.bode.load_session(Session.load(file_path))
+    assert other.bode.step == bode.bode.step
+    assert list(other.bode.rows()) == list(bode.bode.rows())
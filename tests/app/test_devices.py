@@ -0,0 +1,52 @@
+import pytest
+
+from lenlab.app.devices import DevicesWindow
+from lenlab.controller.lenlab import Lenlab, NoReply
+from lenlab.controller.registry import DeviceRegistry
+from lenlab.controller.report import Report
+from lenlab.launchpad.watcher import DeviceWatcher
+
+
+class MockWatcher(DeviceWatcher):
+    def start(self):
+        pass
+
+
+@pytest.fixture()
+def registry():
+    registry = DeviceRegistry(MockWatcher())
+    registry.devices["A"] = Lenlab()
+    return registry
+
+
+@pytest.fixture()
+def window(qt_widgets, registry):
+    window = DevicesWindow(registry, Report())
+    registry.added.emit("A")
+    return window
+
+
+def test_devices_window(window):
+    assert window.table.rowCount() == 1
+    assert window.table.item(0, 0).text() == "A"
+
+
+def test_status(window, registry):
+    registry.devices["A"].ready.emit(True)
+    assert window.table.item(0, 1).text() == "Ready"
+
+    registry.devices["A"].error.emit(NoReply())
+    assert window.table.item(0, 1).text() == str(NoReply())
+
+
+def test_voltmeter_values(window, registry):
+    points = bytes(4) + b"\xff\x0f\x00\x00"
+    registry.devices["A"].reply.emit(b"Lx\x08\x00\x01\x00\x00\x00" + points)
+    assert window.table.item(0, 2).text() == "3.300 V"
+    assert window.table.item(0, 3).text() == "0.000 V"
+
+
+def test_open_device(window):
+    device_window = window.open_device("A")
+    assert device_window.windowTitle() == "Lenlab A"
+    assert window.open_device("A") is device_window
@@ -3,6 +3,7 @@ import pytest
 
 from lenlab.app.oscilloscope import OscilloscopeWidget
 from lenlab.launchpad.protocol import pack
+from lenlab.launchpad.terminal import ResourceError
 from lenlab.spy import Spy
 
 
@@ -115,3 +116,16 @@ def test_save_image(oscilloscope, terminal, save_as_output):
         '<?xml version="1.0" encoding="utf-8" standalone="no"?>\n'
         '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN"'
     )
+
+
+def test_resume(oscilloscope, lenlab, terminal):
+    oscilloscope.on_start_clicked()
+
+    terminal.error.emit(ResourceError())
+    assert oscilloscope.active
+
+    # reconnect
+    lenlab.on_terminal_ready(terminal := type(terminal)())
+
+    command = terminal.get_single_command()
+    assert command.startswith(b"La")
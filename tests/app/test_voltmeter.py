@@ -1,6 +1,10 @@
+import numpy as np
 import pytest
 
 from lenlab.app.voltmeter import VoltmeterWidget
+from lenlab.launchpad.protocol import pack
+from lenlab.launchpad.terminal import ResourceError
+from lenlab.model.points import Points
 
 
 @pytest.fixture()
@@ -30,3 +34,103 @@ def test_save_image(voltmeter, terminal, save_as_output):
         '<?xml version="1.0" encoding="utf-8" standalone="no"?>\n'
         '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN"'
     )
+
+
+def test_resume(voltmeter, lenlab, terminal):
+    voltmeter.on_start_clicked()
+
+    terminal.error.emit(ResourceError())
+    assert voltmeter.resume
+    assert not voltmeter.polling
+
+    # reconnect
+    lenlab.on_terminal_ready(terminal := type(terminal)())
+    assert not voltmeter.resume
+    assert voltmeter.polling
+
+    command = terminal.get_single_command()
+    assert command.startswith(b"Lv")
+
+
+def test_resume_after_no_reply(voltmeter, lenlab, terminal):
+    voltmeter.on_start_clicked()
+    voltmeter.on_reply(pack(b"v", (4_000_000).to_bytes(4, "little")))
+    assert voltmeter.polling
+
+    # the firmware hangs, the repeated command times out, too
+    lenlab.on_timeout()
+    lenlab.on_timeout()
+    assert voltmeter.resume
+    assert not voltmeter.polling
+
+    # reconnect
+    lenlab.on_terminal_ready(terminal := type(terminal)())
+    assert not voltmeter.resume
+    assert voltmeter.polling
+
+    command = terminal.get_single_command()
+    assert command.startswith(b"Lv")
+
+
+def test_journal(qt_widgets, lenlab, terminal, tmp_path):
+    voltmeter = VoltmeterWidget(lenlab, journal_dir=tmp_path)
+    voltmeter.on_start_clicked()
+    voltmeter.on_reply(pack(b"v", (4_000_000).to_bytes(4, "little")))
+    voltmeter.on_reply(pack(b"x", (1).to_bytes(4, "little"), 4) + b"\xd9\x04\xff\x07")
+    voltmeter.on_stop_clicked()
+    voltmeter.on_reply(pack(b"x", (0).to_bytes(4, "little"), 4) + b"\xd9\x04\xff\x07")
+    assert not voltmeter.started
+
+    # crash
+    path = voltmeter.auto_save.journal.path
+    voltmeter.auto_save.journal.close()
+
+    voltmeter = VoltmeterWidget(lenlab, journal_dir=tmp_path)
+    voltmeter.on_recovery_finished(path, True)
+    assert voltmeter.auto_save.points.index == 2
+    assert voltmeter.time_field.text() == "0:00:00.10"
+    assert not voltmeter.interval.isEnabled()
+
+
+def test_view(voltmeter, terminal):
+    points = Points(interval=0.1)
+    points.extend(np.array([1.0, 1.5]), np.array([2.0, 2.5]))
+    points.update_chart()
+    voltmeter.view(points)
+    assert voltmeter.auto_save.viewing
+    assert voltmeter.auto_save.points is points
+    assert not voltmeter.interval.isEnabled()
+
+    # start measures into new points, with the raw codes
+    voltmeter.on_start_clicked()
+    assert not voltmeter.auto_save.viewing
+    assert voltmeter.auto_save.points is not points
+    assert voltmeter.auto_save.points.index == 0
+    assert voltmeter.auto_save.points.codes
+    assert voltmeter.started
+
+
+def test_view_and_record(qt_widgets, lenlab, terminal, tmp_path):
+    recording = tmp_path / "recording.lenlab"
+    points = Points(interval=0.02, codes=True)
+    points.record(recording)
+    points.extend(np.arange(10, dtype="<u2"), np.arange(10, dtype="<u2"))
+    points.recording.set_length(points.index)
+    points.stop_recording()
+
+    voltmeter = VoltmeterWidget(lenlab, record_dir=tmp_path / "records")
+    voltmeter.view(Points.load(recording))
+    assert voltmeter.auto_save.points.index == 10
+    assert not voltmeter.auto_save.points.unsaved
+
+    # the read-only maps of the recording stay untouched
+    voltmeter.on_start_clicked()
+    voltmeter.on_reply(pack(b"v", (4_000_000).to_bytes(4, "little")))
+    voltmeter.on_reply(pack(b"x", (1).to_bytes(4, "little"), 4) + b"\xd9\x04\xff\x07")
+
+    points = voltmeter.auto_save.points
+    assert points.index == 1
+    assert points.codes
+    assert points.recording is not None
+    assert points.channels[0][0] == 0x04D9
+    points.stop_recording()
@@ -1,12 +1,15 @@
 import logging
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
+from PySide6.QtWidgets import QMessageBox
 
 from lenlab.app.window import MainWindow
 from lenlab.controller.lenlab import Lenlab
 from lenlab.controller.report import Report
 from lenlab.launchpad import rules
+from lenlab.model.session import Session
 
 logger = logging.getLogger(__name__)
 
@@ -32,3 +35,53 @@ def test_save_report(window, save_as_output):
     window.save_report_triggered()
     content = save_as_output["file_path"].read_text()
     assert content
+
+
+def test_open_voltmeter(window, tmp_path):
+    file_path = tmp_path / "volt.csv"
+    file_path.write_text(
+        "Lenlab_MSPM0,8.6,voltmeter\ntime,channel1,channel2\n0.000,1.0,2.0\n0.020,1.5,2.5\n"
+    )
+
+    window.open_file(file_path)
+    assert window.tab_widget.currentWidget() is window.voltmeter
+    assert window.voltmeter.auto_save.viewing
+    assert window.voltmeter.auto_save.points.index == 2
+    assert window.voltmeter.fields[1].text() == "2.500 V"
+
+
+def test_open_invalid(window, tmp_path):
+    file_path = tmp_path / "data.lenlab"
+    file_path.write_bytes(b"LENLABR1" + bytes(8))
+
+    # a message, no exception
+    window.open_file(file_path)
+    assert window.findChildren(QMessageBox)
+
+
+def test_open_oscilloscope(window, tmp_path):
+    file_path = tmp_path / "osci.lenlab-session"
+    codes = np.full((2, 6001), 2048, dtype="<u2")
+    with file_path.open("wb") as file:
+        Session(
+            "oscilloscope",
+            {"offset": 0, "time_step": 1e-6, "sine_index": 7},
+            {"codes": codes},
+        ).save(file)
+
+    window.open_file(file_path)
+    assert window.tab_widget.currentWidget() is window.oscilloscope
+    assert window.oscilloscope.waveform.length == 6001
+    assert window.oscilloscope.rate_field.text() == "1 MHz"
+    assert window.oscilloscope.signal.frequency.slider.value() == 7
+
+
+def test_open_bode(window, tmp_path):
+    file_path = tmp_path / "bode.csv"
+    file_path.write_text(
+        "Lenlab_MSPM0,8.6,bode_plot\nfrequency,magnitude,phase\n100,-0.1,-1.5\n200,-0.4,-3.0\n"
+    )
+
+    window.open_file(file_path)
+    assert window.tab_widget.currentWidget() is window.bode
+    assert list(window.bode.bode.rows()) == [(100.0, -0.1, -1.5), (200.0, -0.4, -3.0)]
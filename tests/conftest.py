@@ -1,3 +1,4 @@
+import io
 import os
 import sys
 from contextlib import contextmanager
@@ -94,6 +95,12 @@ class MockFileObject:
         assert type(value) is type(self.value)
         self.value += value
 
+    def flush(self):
+        pass
+
+    def fileno(self) -> int:
+        raise io.UnsupportedOperation("fileno")
+
 
 @define
 class MockPath:
@@ -147,6 +154,8 @@ def lenlab():
 class MockTerminal(QObject):
     reply = Signal(bytes)
     error = Signal(Message)
+    dropped = Signal(Message)
+    corrupt = Signal(bytes)
 
     def __init__(self):
         super().__init__()
@@ -156,6 +165,10 @@ class MockTerminal(QObject):
     def write(self, packet: bytes):
         self.commands.append(packet)
 
+    @Slot()
+    def discard(self):
+        pass
+
     def get_single_command(self):
         assert len(self.commands) == 1
         return self.commands[0]
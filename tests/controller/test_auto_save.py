@@ -1,7 +1,12 @@
+import gzip
+
+import numpy as np
 import pytest
 
 from lenlab.controller.auto_save import AutoSave
+from lenlab.controller.csv_writer import CSVWriterError
 from lenlab.launchpad import protocol
+from lenlab.model.session import Session
 from lenlab.spy import Spy
 
 
@@ -9,7 +14,8 @@ from lenlab.spy import Spy
 def auto_save():
     auto_save = AutoSave()
     auto_save.points.interval = 1.0
-    return auto_save
+    yield auto_save
+    auto_save.stop_writer()
 
 
 @pytest.fixture()
@@ -71,6 +77,7 @@ def test_auto_save(auto_save, add_points, auto_save_path):
     auto_save.save_update()
     assert not auto_save.points.unsaved
 
+    auto_save.join()
     assert auto_save_path.get_line_count() == 2 + 5
 
 
@@ -87,6 +94,7 @@ def test_auto_save_everything(auto_save, add_points, auto_save_path):
     auto_save.save_update()
     assert not auto_save.points.unsaved
 
+    auto_save.join()
     assert auto_save_path.get_line_count() == 2 + 12
 
 
@@ -96,4 +104,96 @@ def test_auto_save_twice(auto_save, add_points, auto_save_path):
         auto_save.save_update()
         assert not auto_save.points.unsaved
 
+        auto_save.join()
         assert auto_save_path.get_line_count() == 2 + (i + 1) * 5
+
+
+def test_record_dir(tmp_path, add_points):
+    auto_save = AutoSave(tmp_path / "records")
+    auto_save.points.interval = 1.0
+    auto_save.start_recording()
+    auto_save.start_recording()  # once per run
+
+    files = list((tmp_path / "records").glob("voltmeter_*.lenlab"))
+    assert len(files) == 1
+    assert auto_save.points.recording.path == files[0]
+
+
+def test_persistent_file(auto_save, add_points, tmp_path):
+    file_path = tmp_path / "data.csv"
+    auto_save.save_as(file_path)
+    auto_save.auto_save.set(True)
+    backlog = Spy(auto_save.backlog)
+
+    add_points(5)
+    auto_save.save_update()
+    add_points(5)
+    auto_save.save_update()
+    writer = auto_save.writer
+
+    auto_save.auto_save.set(False)  # stop the writer
+    assert not writer.isRunning()
+    assert writer.pending == 0
+    assert backlog.count() == 2
+
+    lines = file_path.read_text().splitlines()
+    assert len(lines) == 2 + 10
+    assert lines[-1] == "9.000,1.000073,1.649597"
+
+
+def test_compressed(auto_save, add_points, tmp_path):
+    file_path = tmp_path / "data.csv.gz"
+    add_points(5)
+    auto_save.save_as(file_path)
+    auto_save.auto_save.set(True)
+
+    add_points(5)
+    auto_save.save_update()
+    auto_save.auto_save.set(False)
+
+    with gzip.open(file_path, "rt", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+
+    assert len(lines) == 2 + 10
+    assert lines[-1] == "9.000,1.000073,1.649597"
+
+
+def test_session(auto_save, add_points, tmp_path):
+    file_path = tmp_path / "data.lenlab-session"
+    add_points(5)
+    auto_save.save_as(file_path)
+    auto_save.auto_save.set(True)
+
+    add_points(5)
+    auto_save.save_update()
+    auto_save.auto_save.set(False)
+
+    session = Session.load(file_path)
+    assert session.kind == "voltmeter"
+    assert session.settings["interval"] == 1.0
+    assert session.columns["codes"].shape == (10, 2)
+    assert np.array_equal(session.columns["codes"][-1], [0x04D9, 0x07FF])
+
+
+def test_writer_error(auto_save, add_points, tmp_path):
+    file_path = tmp_path / "folder" / "data.csv"
+    file_path.parent.mkdir()
+    add_points(5)
+    auto_save.save_as(file_path)
+    auto_save.auto_save.set(True)
+
+    # the folder vanishes, the writer cannot open the file
+    file_path.unlink()
+    file_path.parent.rmdir()
+    add_points(5)
+    auto_save.save_update()
+    assert auto_save.points.save_idx == 10
+
+    auto_save.writer.stop()
+    with pytest.raises(CSVWriterError):
+        auto_save.on_writer_error(CSVWriterError(file_path.name, "gone"))
+
+    # the next save writes the rows again
+    assert auto_save.points.save_idx == 5
+    assert auto_save.points.unsaved
+    assert not auto_save.auto_save
@@ -1,4 +1,6 @@
+import gzip
 import logging
+import lzma
 import time
 from functools import partial
 from operator import mod
@@ -7,7 +9,7 @@ from pathlib import Path
 import numpy as np
 import pytest
 
-from lenlab.controller.csv import CSVTemplate
+from lenlab.controller.csv import CSVTemplate, open_csv
 
 logger = logging.getLogger(__name__)
 
@@ -106,3 +108,122 @@ def test_for_loop_mod_local(tmp_file: Path, example: np.ndarray):
 
     assert tmp_file.read_text(encoding="utf-8")
     logger.info(probe)
+
+
+def write_rows(csv_template: CSVTemplate, *columns: np.ndarray) -> str:
+    lines = []
+    csv_template.write_rows(lines.append, zip(*columns, strict=True))
+    return "".join(lines)
+
+
+def write_columns(csv_template: CSVTemplate, *columns: np.ndarray) -> str:
+    lines = []
+    csv_template.write_columns(lines.append, *columns)
+    return "".join(lines)
+
+
+def test_write_columns(csv_template):
+    rng = np.random.default_rng(0)
+    time = np.arange(200_000) * 0.02
+    channels = [rng.integers(0, 4096, 200_000) * (3.3 / 4095) for _ in range(2)]
+
+    assert write_columns(csv_template, time, *channels) == write_rows(
+        csv_template, time, *channels
+    )
+
+
+def test_write_columns_special(csv_template):
+    # ties, negative zero, rounding up a digit, large, and small values
+    values = np.array(
+        [0.0625, 2.675, 1.0005, 0.0005, -0.0004, -0.0, 0.0, 9.9999999, 1234567.0625, 1e-9, -3.3]
+    )
+
+    assert write_columns(csv_template, values, values, -values) == write_rows(
+        csv_template, values, values, -values
+    )
+
+
+def test_write_columns_random(csv_template):
+    rng = np.random.default_rng(1)
+    values = [rng.uniform(-1e4, 1e4, 100_000) for _ in range(3)]
+
+    assert write_columns(csv_template, *values) == write_rows(csv_template, *values)
+
+
+def test_write_columns_decimals():
+    csv_template = CSVTemplate("bode_plot", "frequency", "magnitude", "phase", ".0f")
+    values = np.array([100.0, 2.5, 3.5, 999_999.5, 0.4])
+
+    assert write_columns(csv_template, values, values, values) == write_rows(
+        csv_template, values, values, values
+    )
+
+
+def test_write_columns_not_a_number(csv_template):
+    values = np.array([1.0, np.nan, np.inf, -np.inf])
+
+    assert write_columns(csv_template, values, values, values) == write_rows(
+        csv_template, values, values, values
+    )
+
+
+def test_write_columns_benchmark(csv_template, example):
+    rng = np.random.default_rng(2)
+    time = np.arange(example.shape[0]) * 0.02
+    channels = [rng.integers(0, 4096, example.shape[0]) * (3.3 / 4095) for _ in range(2)]
+
+    with RuntimeProbe() as rows:
+        before = write_rows(csv_template, time, *channels)
+
+    with RuntimeProbe() as columns:
+        after = write_columns(csv_template, time, *channels)
+
+    assert after == before
+    logger.info(
+        f"write_rows {example.shape[0] / rows.runtime:.0f} rows/s, "
+        f"write_columns {example.shape[0] / columns.runtime:.0f} rows/s"
+    )
+    assert columns.runtime < rows.runtime
+
+
+@pytest.mark.parametrize("suffix", [".csv.gz", ".csv.xz"])
+def test_open_csv_append(tmp_path, csv_template, suffix):
+    file_path = tmp_path / f"data{suffix}"
+    time = np.arange(1000) * 0.02
+    channels = [np.sin(time), np.cos(time)]
+
+    with open_csv(file_path) as file:
+        file.write(csv_template.head())
+        csv_template.write_columns(file.write, time[:500], *(values[:500] for values in channels))
+
+    # a second member or stream
+    with open_csv(file_path, "a") as file:
+        csv_template.write_columns(file.write, time[500:], *(values[500:] for values in channels))
+
+    opener = gzip.open if suffix.endswith(".gz") else lzma.open
+    with opener(file_path, "rt", encoding="utf-8", newline="\n") as file:
+        content = file.read()
+
+    assert content == csv_template.head() + write_rows(csv_template, time, *channels)
+
+
+def test_compression_ratio(tmp_path, csv_template):
+    # a slow drift and noise of a few codes
+    rng = np.random.default_rng(3)
+    time = np.arange(200_000) * 0.02
+    channels = [
+        np.clip(2048 + np.cumsum(rng.integers(-2, 3, time.shape[0])), 0, 4095) * (3.3 / 4095),
+        np.clip(1000 + rng.integers(-3, 4, time.shape[0]), 0, 4095) * (3.3 / 4095),
+    ]
+
+    sizes = {}
+    for suffix in [".csv", ".csv.gz", ".csv.xz"]:
+        file_path = tmp_path / f"data{suffix}"
+        with RuntimeProbe() as probe, open_csv(file_path) as file:
+            csv_template.write_columns(file.write, time, *channels)
+
+        sizes[suffix] = file_path.stat().st_size
+        logger.info(f"{suffix}: {sizes[suffix] / time.shape[0]:.1f} bytes per row, {probe}")
+
+    assert sizes[".csv"] > 5 * sizes[".csv.gz"]
+    assert sizes[".csv"] > 5 * sizes[".csv.xz"]
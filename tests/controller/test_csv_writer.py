@@ -0,0 +1,73 @@
+import numpy as np
+
+from lenlab.controller.csv import CSVTemplate
+from lenlab.controller.csv_writer import CSVWriter, CSVWriterError
+from lenlab.spy import Spy
+
+
+def block(begin: int, end: int) -> tuple[np.ndarray, ...]:
+    time = np.arange(begin, end) * 0.1
+    return time, np.full(time.shape, 1.0), np.full(time.shape, 2.0)
+
+
+def test_write(tmp_path):
+    file_path = tmp_path / "data.csv"
+    writer = CSVWriter(file_path, CSVTemplate("test"), flush_interval=0, sync_interval=0)
+    backlog = Spy(writer.backlog)
+    writer.start()
+
+    assert writer.put(block(0, 10))
+    assert writer.put(block(10, 20))
+    writer.join()
+    assert file_path.read_text().count("\n") == 20
+
+    writer.stop()
+    assert not writer.isRunning()
+    assert writer.pending == 0
+    assert backlog.count() >= 1
+    assert file_path.read_text().endswith("1.900,1.000000,2.000000\n")
+
+
+def test_backlog(tmp_path):
+    file_path = tmp_path / "data.csv"
+    writer = CSVWriter(file_path, CSVTemplate("test"), max_blocks=2)
+
+    # a stalled drive
+    assert writer.put(block(0, 10))
+    assert writer.put(block(10, 20))
+    assert not writer.put(block(20, 30))
+    assert writer.pending == 20
+
+    writer.start()
+    writer.join()
+    assert writer.put(block(20, 30))
+    writer.stop()
+
+    assert writer.pending == 0
+    assert file_path.read_text().count("\n") == 30
+
+
+def test_batch(tmp_path):
+    file_path = tmp_path / "data.csv"
+    writer = CSVWriter(file_path, CSVTemplate("test"))
+    backlog = Spy(writer.backlog)
+    for i in range(10):
+        writer.put(block(10 * i, 10 * (i + 1)))
+
+    writer.start()
+    writer.stop()
+
+    # one batch of the blocks in the queue
+    assert backlog.count() == 1
+    assert file_path.read_text().count("\n") == 100
+
+
+def test_error(tmp_path):
+    writer = CSVWriter(tmp_path / "missing" / "data.csv", CSVTemplate("test"))
+    error = Spy(writer.error)
+    writer.start()
+    assert writer.put(block(0, 10))
+    writer.stop()
+
+    assert isinstance(error.get_single_arg(), CSVWriterError)
+    assert not writer.isRunning()
@@ -0,0 +1,102 @@
+import json
+from importlib import resources
+
+import pytest
+
+import lenlab
+from lenlab.controller import flash
+from lenlab.controller.flash import FlashStation
+from lenlab.launchpad.launchpad import lp_pid, ti_vid
+from lenlab.launchpad.port_info import PortInfo
+from lenlab.launchpad.simulator import BslSimulator, VirtualPort
+from lenlab.launchpad.terminal import Terminal
+from lenlab.spy import Spy
+
+
+@pytest.fixture(scope="module")
+def firmware_binary():
+    return (resources.files(lenlab) / "lenlab_fw.bin").read_bytes()
+
+
+def run(station: FlashStation):
+    finished = Spy(station.finished)
+    station.start()
+    assert finished.wait(5000)
+
+
+def test_parallel(firmware_binary):
+    boards = {sn: [BslSimulator.create_terminal(pacing=False)] for sn in "ABC"}
+    station = FlashStation(boards, firmware_binary)
+    run(station)
+
+    assert station.success
+    assert sorted(result.serial_number for result in station.results) == ["A", "B", "C"]
+    for result in station.results:
+        assert result.status == "verified"
+        assert result.written == len(firmware_binary)
+
+    for terminals in boards.values():
+        assert terminals[0].port.started
+
+
+def test_one_board_fails(firmware_binary):
+    boards = {
+        "A": [BslSimulator.create_terminal(pacing=False)],
+        "B": [BslSimulator.create_terminal(pacing=False, stuck_bits=True)],
+    }
+    station = FlashStation(boards, firmware_binary)
+    run(station)
+
+    assert not station.success
+    results = {result.serial_number: result for result in station.results}
+    assert results["A"].success
+    assert not results["B"].success
+    assert results["B"].status.startswith("Verification failed")
+
+
+def test_second_port(firmware_binary):
+    # Windows: the station programs both ports of a Launchpad, one of them has got the BSL
+    silent = VirtualPort.create_terminal(pacing=False)
+    boards = {"A": [silent, BslSimulator.create_terminal(pacing=False)]}
+    station = FlashStation(boards, firmware_binary)
+    run(station)
+
+    assert station.success
+    assert station.results[0].status == "verified"
+
+
+def test_open_error(firmware_binary):
+    terminal = Terminal.from_port_info(PortInfo.from_name("COM0"))
+    station = FlashStation({"A": [terminal]}, firmware_binary)
+    finished = Spy(station.finished)
+    station.start()  # finishes at once
+    assert finished.count() == 1
+
+    assert not station.success
+    result = station.results[0]
+    # the reason instead of "no port"
+    assert "COM0" in result.status
+
+
+def test_find_boards(monkeypatch):
+    available_ports = [
+        PortInfo("ttyACM0", ti_vid, lp_pid, "A"),
+        PortInfo("ttyACM1", ti_vid, lp_pid, "A"),
+        PortInfo("ttyACM2", ti_vid, lp_pid, "B"),
+        PortInfo("ttyACM3", ti_vid, lp_pid, "B"),
+    ]
+    monkeypatch.setattr(PortInfo, "available_ports", lambda: available_ports)
+    monkeypatch.setattr(flash.sys, "platform", "linux")
+
+    boards = flash.find_boards()
+    assert list(boards) == ["A", "B"]
+    assert [terminal.port_name for terminal in boards["B"]] == ["ttyACM2"]
+
+
+def test_main_json(capsys):
+    assert flash.main(["--simulator", "2", "--json"]) == 0
+
+    results = json.loads(capsys.readouterr().out)
+    assert len(results) == 2
+    assert all(result["status"] == "verified" for result in results)
+    assert all(result["throughput"] > 0 for result in results)
@@ -0,0 +1,151 @@
+import time
+
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
+
+from lenlab.controller.io_thread import IOThread
+from lenlab.controller.lenlab import Lenlab, NoReply
+from lenlab.launchpad.terminal import ResourceError, Terminal
+from lenlab.message import Message
+from lenlab.spy import Spy
+
+knock = b"Lk\x00\x00nock"
+
+
+class EchoTerminal(Terminal):
+    def __init__(self, echo: bool = True):
+        super().__init__("COM0")
+        self.echo = echo
+        self.packet = b""
+        self.write_threads = list()
+
+    @property
+    def bytes_available(self) -> int:
+        return len(self.packet)
+
+    def read(self, n: int) -> bytes:
+        chunk, self.packet = self.packet[:n], self.packet[n:]
+        return chunk
+
+    def write(self, packet: bytes) -> int:
+        self.write_threads.append(QThread.currentThread())
+        if self.echo:
+            self.packet += packet
+            self.on_ready_read()
+
+        return len(packet)
+
+
+class Relay(QObject):
+    """Queued signals between the main thread and the I/O thread."""
+
+    write = Signal(bytes)
+    watch = Signal(int)
+    reply = Signal(bytes)
+    timeout = Signal()
+    error = Signal(Message)
+
+
+def wait(spy: Spy, timeout: float = 1.0) -> bool:
+    # QSignalSpy.wait holds the GIL and blocks the Python slots on the I/O thread
+    deadline = time.monotonic() + timeout
+    while not spy.count() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+
+    return spy.count() > 0
+
+
+def start(terminal: Terminal) -> tuple[IOThread, Relay]:
+    io = IOThread(terminal)
+    relay = Relay()
+    relay.write.connect(io.worker.write)
+    relay.watch.connect(io.worker.watch)
+    io.worker.reply.connect(relay.reply)
+    io.worker.timeout.connect(relay.timeout)
+    terminal.error.connect(relay.error)
+    io.start()
+    return io, relay
+
+
+def test_reply():
+    terminal = EchoTerminal()
+    io, relay = start(terminal)
+    reply = Spy(relay.reply)
+    assert terminal.thread() == io.thread
+
+    relay.write.emit(knock)
+
+    assert wait(reply)
+    assert reply.get_single_arg() == knock
+    # the worker copies the reply at the thread boundary
+    assert type(reply.get_single_arg()) is bytes
+    assert terminal.write_threads == [io.thread]
+
+    io.stop()
+    assert terminal.thread() == QCoreApplication.instance().thread()
+
+
+def test_timeout():
+    terminal = EchoTerminal(echo=False)
+    io, relay = start(terminal)
+    timeout = Spy(relay.timeout)
+
+    relay.watch.emit(10)
+    relay.write.emit(knock)
+
+    assert wait(timeout)
+    io.stop()
+
+
+def test_error():
+    terminal = EchoTerminal()
+    io, relay = start(terminal)
+    error = Spy(relay.error)
+
+    relay.write.emit(b"invalid packet")
+
+    assert wait(error)
+    # the terminal returns to the main thread before the error handlers run
+    assert terminal.thread() == QCoreApplication.instance().thread()
+    io.stop()
+
+
+def test_stop_twice():
+    io, relay = start(EchoTerminal())
+    io.stop()
+    io.stop()
+
+
+def test_lenlab():
+    lenlab = Lenlab(io_thread=True)
+    terminal = EchoTerminal()
+    lenlab.on_terminal_ready(terminal)
+    reply = Spy(lenlab.reply)
+
+    lenlab.send_command(knock)
+
+    assert wait(reply)
+    assert reply.get_single_arg() == knock
+    assert not lenlab.lock.is_locked
+
+    lenlab.on_terminal_error(ResourceError(terminal.port_name))
+    assert lenlab.io is None
+    assert terminal.thread() == QCoreApplication.instance().thread()
+
+
+def test_lenlab_no_reply():
+    lenlab = Lenlab(reply_timeout=10, io_thread=True)
+    lenlab.discovery.error.disconnect(lenlab.error)
+    terminal = EchoTerminal(echo=False)
+    lenlab.on_terminal_ready(terminal)
+    error = Spy(lenlab.error)
+
+    lenlab.send_command(knock)
+
+    assert wait(error)
+    error.check_single_message(NoReply)
+    # the command was repeated once
+    assert len(terminal.write_threads) == 2
+    # discovery may probe the terminal again on the main thread
+    assert lenlab.io is None
+    assert terminal.thread() == QCoreApplication.instance().thread()
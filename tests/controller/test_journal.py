@@ -0,0 +1,166 @@
+import io
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from lenlab.controller.auto_save import AutoSave
+from lenlab.controller.journal import (
+    InvalidJournal,
+    Journal,
+    discard_journal,
+    find_journals,
+    read_journal,
+)
+from lenlab.launchpad.protocol import pack
+from lenlab.model.points import Points
+
+logger = logging.getLogger(__name__)
+
+start = pack(b"v", (4_000_000).to_bytes(4, "little"))  # 100 ms
+
+
+def points_reply(n: int, offset: int = 0, polling: int = 1) -> bytes:
+    payload = np.empty((2 * n,), np.dtype("<u2"))
+    payload[::2] = (np.arange(n) + offset) % 4096  # channel 1
+    payload[1::2] = 4095 - payload[::2]  # channel 2
+    return pack(b"x", polling.to_bytes(4, "little"), 4 * n) + payload.tobytes()
+
+
+@pytest.fixture()
+def replies():
+    return [start] + [points_reply(10, 10 * i) for i in range(100)]
+
+
+def reference(replies) -> Points:
+    points = Points(0.1, codes=True)
+    for reply in replies[1:]:
+        points.parse_reply(reply)
+
+    return points
+
+
+def write(tmp_path, replies) -> Journal:
+    journal = Journal.create(tmp_path)
+    for reply in replies:
+        journal.append(reply)
+
+    return journal
+
+
+def test_recover(tmp_path, replies):
+    journal = write(tmp_path, replies)
+    assert find_journals(tmp_path) == []  # this Lenlab writes it
+
+    journal.close()
+    assert find_journals(tmp_path) == [journal.path]
+
+    points, size = read_journal(journal.path)
+    expected = reference(replies)
+    assert points.interval == 0.1
+    assert points.index == 1000
+    assert np.array_equal(points.channels[0][:], expected.channels[0][:])
+    assert np.array_equal(points.channels[1][:], expected.channels[1][:])
+    assert points.unsaved
+    assert size == journal.path.stat().st_size
+
+
+def test_interrupted(tmp_path, replies):
+    journal = write(tmp_path, replies)
+    journal.append(points_reply(10)[:20])  # the crash interrupts the write
+    journal.close()
+
+    points, size = read_journal(journal.path)
+    assert points.index == 1000
+    assert size == journal.path.stat().st_size - 20
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "voltmeter_1.journal"
+    path.write_bytes(b"Lenlab_MSPM0,8.6,voltmeter\n")
+
+    with pytest.raises(InvalidJournal):
+        read_journal(path)
+
+
+def test_discard(tmp_path, replies):
+    journal = write(tmp_path, replies)
+    journal.discard()
+    assert not journal.path.exists()
+
+    journal = write(tmp_path, replies)
+    journal.close()
+    discard_journal(journal.path)
+    assert find_journals(tmp_path) == []
+
+
+def test_auto_save(tmp_path, replies):
+    auto_save = AutoSave(journal_dir=tmp_path)
+    auto_save.points.interval = 0.1
+    for reply in replies:
+        auto_save.write_journal(reply)
+        if reply[1:2] == b"x":
+            auto_save.points.parse_reply(reply)
+
+    auto_save.sync_journal()
+    path = auto_save.journal.path
+    auto_save.journal.close()  # crash
+
+    recovered = AutoSave(journal_dir=tmp_path)
+    recovered.recover(path)
+    assert recovered.points.index == 1000
+    assert recovered.journal.path == path
+
+    # continue the journal
+    recovered.write_journal(points_reply(10))
+    recovered.journal.close()
+    assert read_journal(path)[0].index == 1010
+
+    recovered.journal = Journal.open(path)
+    recovered.clear()
+    assert not path.exists()
+
+
+def test_no_journal(replies):
+    auto_save = AutoSave()
+    auto_save.write_journal(replies[0])
+    assert auto_save.journal is None
+
+
+def test_benchmark(tmp_path, replies):
+    # the journal appends the raw replies, the auto save formats each row
+    points = reference(replies)
+    journal = Journal.create(tmp_path)
+    start = time.perf_counter()
+    for _ in range(10):
+        for reply in replies:
+            journal.append(reply)
+    raw = time.perf_counter() - start  # the sync is every 5 seconds
+    journal.discard()
+
+    file = io.StringIO()
+    start = time.perf_counter()
+    for _ in range(10):
+        points.save_update(file)
+        points.unsaved = True
+        points.save_idx = 0
+    csv = time.perf_counter() - start
+
+    logger.info(f"10k samples: journal {raw * 1e3:.3f} ms, csv {csv * 1e3:.3f} ms")
+    assert raw < csv
+
+
+def test_recover_interrupted(tmp_path, replies):
+    journal = write(tmp_path, replies)
+    journal.append(points_reply(10)[:20])  # the crash interrupts the write
+    journal.close()
+
+    auto_save = AutoSave(journal_dir=tmp_path)
+    auto_save.recover(journal.path)
+    assert auto_save.points.index == 1000
+
+    # the new replies follow the last complete reply
+    auto_save.write_journal(points_reply(10))
+    auto_save.journal.close()
+    assert read_journal(journal.path)[0].index == 1010
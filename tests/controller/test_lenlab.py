@@ -1,6 +1,7 @@
 import pytest
 
 from lenlab.controller.lenlab import Lenlab, Lock, NoReply
+from lenlab.launchpad.protocol import command
 from lenlab.launchpad.terminal import ResourceError, Terminal
 from lenlab.spy import Spy
 
@@ -74,6 +75,42 @@ def test_on_timeout(lenlab):
     assert isinstance(spy.get_single_arg(), NoReply)
 
 
+def test_repeat_on_timeout(lenlab):
+    lenlab.lock.release()
+    lenlab.send_command(b"Lk\x08\x00nock, knock!")
+
+    write = Spy(lenlab.write)
+    error = Spy(lenlab.error)
+    discard = Spy(lenlab.discard)
+
+    lenlab.timer.timeout.emit()
+    assert write.get_single_arg() == b"Lk\x08\x00nock, knock!"
+    assert discard.count() == 1
+    assert error.count() == 0
+
+    ready = Spy(lenlab.ready)
+    lenlab.timer.timeout.emit()
+    assert write.count() == 1
+    assert isinstance(error.get_single_arg(), NoReply)
+    assert ready.get_single_arg() is False
+
+
+def test_no_repeat_without_resync():
+    lenlab = Lenlab(resync=False)
+    lenlab.lock.release()
+    lenlab.send_command(b"Lk\x08\x00nock, knock!")
+
+    error = Spy(lenlab.error)
+    lenlab.timer.timeout.emit()
+
+    assert isinstance(error.get_single_arg(), NoReply)
+
+
+def test_resync_mode(lenlab):
+    lenlab.discovery.ready.emit(terminal := Terminal())
+    assert terminal.resync_mode is True
+
+
 def test_send_command(lenlab):
     lenlab.lock.release()
 
@@ -84,3 +121,173 @@ def test_send_command(lenlab):
 
     assert lenlab.lock.is_locked is True
     assert lenlab.timer.isActive() is True
+
+
+knock = command(b"k")
+knock_reply = b"Lk\x00\x00nock"
+version = command(b"8")
+version_reply = b"L8\x00\x006\x00\x00\x00"
+
+
+def test_request(lenlab):
+    lenlab.lock.release()
+    request = lenlab.submit(knock)
+
+    reply = Spy(request.reply)
+    lenlab.on_reply(knock_reply)
+
+    assert reply.get_single_arg() == knock_reply
+
+
+def test_queue(lenlab):
+    lenlab.lock.release()
+    write = Spy(lenlab.write)
+
+    lenlab.submit(knock)
+    lenlab.submit(version)
+    assert write.count() == 1
+
+    lenlab.on_reply(knock_reply)
+    assert write.count() == 2
+    assert write.at(1)[0] == version
+    assert lenlab.lock.is_locked is True
+
+    lenlab.on_reply(version_reply)
+    assert lenlab.lock.is_locked is False
+    assert lenlab.timer.isActive() is False
+
+
+def test_queue_before_ready(lenlab):
+    write = Spy(lenlab.write)
+    lenlab.submit(knock)
+    assert write.count() == 0
+
+    lenlab.discovery.ready.emit(Terminal())
+    assert write.get_single_arg() == knock
+
+
+def test_depth():
+    lenlab = Lenlab(depth=2)
+    lenlab.lock.release()
+    write = Spy(lenlab.write)
+
+    first = Spy(lenlab.submit(knock).reply)
+    second = Spy(lenlab.submit(version).reply)
+    lenlab.submit(knock)
+    assert write.count() == 2
+
+    lenlab.on_reply(knock_reply)
+    assert first.count() == 1
+    assert write.count() == 3
+
+    lenlab.on_reply(version_reply)
+    assert second.count() == 1
+
+
+def test_lost_reply():
+    lenlab = Lenlab(depth=2)
+    lenlab.lock.release()
+    write = Spy(lenlab.write)
+
+    first = Spy(lenlab.submit(knock).reply)
+    second = Spy(lenlab.submit(version).reply)
+
+    # the reply to the knock was damaged
+    lenlab.on_reply(version_reply)
+    assert first.count() == 0
+    assert second.count() == 1
+
+    # repeat the knock
+    assert write.count() == 3
+    assert write.at(2)[0] == knock
+
+
+def test_unexpected_reply(lenlab):
+    lenlab.lock.release()
+    lenlab.submit(knock)
+
+    spy = Spy(lenlab.reply)
+    lenlab.on_reply(version_reply)
+
+    assert spy.count() == 0
+
+
+def test_request_timeout(lenlab):
+    lenlab.lock.release()
+    lenlab.submit(knock, timeout=50)
+
+    assert lenlab.timer.interval() == 50
+
+
+def test_request_no_reply():
+    lenlab = Lenlab(resync=False)
+    lenlab.lock.release()
+    first = Spy(lenlab.submit(knock).error)
+    second = Spy(lenlab.submit(version).error)
+
+    lenlab.timer.timeout.emit()
+
+    first.check_single_message(NoReply)
+    second.check_single_message(NoReply)
+    assert lenlab.lock.is_locked is True
+
+
+def test_request_terminal_error(lenlab):
+    lenlab.discovery.ready.emit(terminal := Terminal())
+    error = Spy(lenlab.submit(knock).error)
+
+    terminal.error.emit(ResourceError())
+
+    error.check_single_message(ResourceError)
+
+
+def test_corrupt_reply(lenlab):
+    lenlab.lock.release()
+    reply = Spy(lenlab.submit(knock).reply)
+    write = Spy(lenlab.write)
+
+    # link mode, the reply to the knock had got a false checksum
+    for _ in range(lenlab.max_retransmits + 1):
+        lenlab.on_corrupt(knock_reply[:8])
+
+    assert write.count() == lenlab.max_retransmits
+    assert write.at(0)[0] == command(b"r")
+
+    lenlab.on_reply(knock_reply)
+    assert reply.count() == 1
+
+
+def test_unexpected_corrupt_reply(lenlab):
+    lenlab.lock.release()
+    lenlab.submit(knock)
+    write = Spy(lenlab.write)
+
+    lenlab.on_corrupt(version_reply[:8])
+    assert write.count() == 0
+
+
+def test_same_terminal_again(lenlab):
+    lenlab.discovery.ready.emit(terminal := Terminal())
+    lenlab.submit(knock)
+    lenlab.timer.timeout.emit()
+    lenlab.timer.timeout.emit()
+
+    # discovery retries and probes the same terminal
+    lenlab.discovery.ready.emit(terminal)
+    reply = Spy(lenlab.submit(knock).reply)
+    terminal.reply.emit(knock_reply)
+
+    assert reply.count() == 1
+
+
+def test_coalesce(lenlab):
+    write = Spy(lenlab.write)
+    first = lenlab.submit(command(b"x", 1))
+    second = lenlab.submit(command(b"x", 0))
+    lenlab.submit(knock)
+    assert second is first
+    assert len(lenlab.queue) == 2
+
+    # the newest command of the code
+    lenlab.discovery.ready.emit(Terminal())
+    assert write.get_single_arg() == command(b"x", 0)
@@ -0,0 +1,169 @@
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from lenlab.controller import reader
+from lenlab.controller.csv import open_csv
+from lenlab.controller.reader import InvalidFile, read_file
+from lenlab.launchpad.protocol import pack
+from lenlab.model.points import Points
+from lenlab.model.session import Session
+from lenlab.model.waveform import Waveform
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def points():
+    length = 10_000
+    payload = np.empty((2 * length,), np.dtype("<u2"))
+    payload[::2] = np.arange(length) % 4096  # channel 1
+    payload[1::2] = 4095 - payload[::2]  # channel 2
+    points = Points(interval=0.02)
+    points.parse_reply(pack(b"v", arg=b"\x00\x00\x00\x00", length=length) + payload.tobytes())
+    return points
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # many chunks and lines across chunks
+    monkeypatch.setattr(reader, "chunk_size", 1000)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".csv.gz", ".csv.xz"])
+def test_voltmeter(tmp_path, points, small_chunks, suffix):
+    file_path = tmp_path / f"volt{suffix}"
+    with open_csv(file_path) as file:
+        points.save_as(file)
+
+    loaded = read_file(file_path)
+    assert isinstance(loaded, Points)
+    assert loaded.index == points.index
+    assert loaded.interval == 0.02
+    assert not loaded.unsaved
+    # six decimals in the file
+    assert np.allclose(loaded.channels[0][:], points.channels[0][:], atol=1e-6)
+    assert np.allclose(loaded.channels[1][:], points.channels[1][:], atol=1e-6)
+    assert loaded.chart_n_points == points.chart_n_points
+
+
+def test_voltmeter_session(tmp_path, points):
+    file_path = tmp_path / "volt.lenlab-session"
+    with file_path.open("w+b") as file:
+        points.save_session(file)
+
+    loaded = read_file(file_path)
+    assert isinstance(loaded, Points)
+    assert np.array_equal(loaded.channels[1][:], points.channels[1][:])
+
+
+def test_recording(tmp_path, points):
+    file_path = tmp_path / "volt.lenlab"
+    points.record(file_path)
+    points.stop_recording()
+
+    loaded = read_file(file_path)
+    assert isinstance(loaded, Points)
+    assert loaded.index == points.index
+    assert not loaded.unsaved
+
+
+def test_oscilloscope(tmp_path):
+    payload = np.arange(2 * 8 * 864, dtype="<u2") % 4096
+    arg = (10).to_bytes(2, "little") + (432).to_bytes(2, "little")  # 4 MHz
+    waveform = Waveform.parse_reply(pack(b"a", arg, 2 * 8 * 864) + payload.tobytes())
+
+    file_path = tmp_path / "osci.csv"
+    with open_csv(file_path) as file:
+        waveform.save_as(file)
+
+    session = read_file(file_path)
+    assert session.kind == "oscilloscope"
+
+    loaded = Waveform.from_session(session)
+    assert loaded.time_step == pytest.approx(waveform.time_step)
+    chart, expected = loaded.create_chart(), waveform.create_chart()
+    assert np.allclose(chart.x, expected.x, atol=1e-3)
+    assert np.allclose(chart.channels[1], expected.channels[1], atol=1e-6)
+
+
+def test_bode_plot(tmp_path):
+    file_path = tmp_path / "bode.csv"
+    file_path.write_text(
+        "Lenlab_MSPM0,8.6,bode_plot\nfrequency,magnitude,phase\n100,-0.1,-1.5\n200,-0.4,-3.0\n"
+    )
+
+    session = read_file(file_path)
+    assert session.kind == "bode_plot"
+    assert np.array_equal(session.columns["frequency"], [100, 200])
+    assert np.array_equal(session.columns["phase"], [-1.5, -3.0])
+
+
+def test_crlf_and_no_final_line_break(tmp_path):
+    file_path = tmp_path / "volt.csv"
+    file_path.write_bytes(
+        b"Lenlab_MSPM0,8.6,voltmeter\r\ntime,channel1,channel2\r\n0.000,1.0,2.0\r\n0.100,1.5,2.5"
+    )
+
+    loaded = read_file(file_path)
+    assert loaded.index == 2
+    assert loaded.interval == 0.1
+    assert loaded.get_last_value(1) == 2.5
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"time,channel1,channel2\n0.0,1.0,2.0\n",
+        b"Lenlab_MSPM0,8.6,voltmeter\ntime,channel1,channel2\n0.0,1.0,x\n",
+        b"Lenlab_MSPM0,8.6,voltmeter\ntime,channel1,channel2\n0.0,1.0\n",
+        b"Lenlab_MSPM0,8.6,other\nx,y,z\n0.0,1.0,2.0\n",
+        b"\x89PNG\r\n\x1a\n",
+    ],
+)
+def test_invalid(tmp_path, content):
+    file_path = tmp_path / "data.csv"
+    file_path.write_bytes(content)
+
+    with pytest.raises(InvalidFile):
+        read_file(file_path)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        Session("other"),
+        Session("oscilloscope", columns={"codes": np.zeros((2, 10), "<u2")}),
+        Session("bode_plot", columns={"frequency": np.zeros(3)}),
+        Session("voltmeter", {"interval": 1.0}, {"codes": np.zeros((10, 2), "<u2")}),
+    ],
+)
+def test_invalid_session(tmp_path, content):
+    file_path = tmp_path / "data.lenlab-session"
+    with file_path.open("wb") as file:
+        content.save(file)
+
+    with pytest.raises(InvalidFile):
+        read_file(file_path)
+
+
+def test_read_benchmark(tmp_path):
+    n = 1_000_000
+    rng = np.random.default_rng(3)
+    points = Points(interval=0.02)
+    points.extend(rng.random(n) * 3.3, rng.random(n) * 3.3)
+    points.unsaved = True
+
+    file_path = tmp_path / "volt.csv"
+    with open_csv(file_path) as file:
+        points.save_as(file)
+
+    size = file_path.stat().st_size
+    start = time.perf_counter()
+    loaded = read_file(file_path)
+    runtime = time.perf_counter() - start
+
+    assert loaded.index == n
+    logger.info(f"read_file {size / runtime / 1e6:.0f} MB/s, {n / runtime:.0f} rows/s")
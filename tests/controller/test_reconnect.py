@@ -0,0 +1,101 @@
+import pytest
+
+from lenlab.controller.lenlab import Lenlab, NoReply
+from lenlab.controller.reconnect import Reconnect
+from lenlab.launchpad.discovery import NoLaunchpad
+from lenlab.launchpad.terminal import ResourceError
+from lenlab.launchpad.watcher import DeviceWatcher
+from lenlab.spy import Spy
+
+
+class MockWatcher(DeviceWatcher):
+    def start(self):
+        pass
+
+
+@pytest.fixture()
+def reconnect(monkeypatch, lenlab):
+    reconnect = Reconnect(lenlab, MockWatcher())
+    retries = []
+    monkeypatch.setattr(lenlab.discovery, "retry", lambda: retries.append(True))
+    reconnect.retries = retries
+    return reconnect
+
+
+def test_backoff(reconnect, lenlab):
+    lenlab.error.emit(NoReply())
+    assert reconnect.timer.interval() == reconnect.initial_delay
+
+    for _ in range(10):
+        reconnect.timer.stop()
+        reconnect.retry()
+        lenlab.error.emit(NoLaunchpad())
+
+    assert reconnect.timer.interval() == reconnect.max_delay
+    assert len(reconnect.retries) == 10
+
+
+def test_schedule_once(reconnect, lenlab):
+    lenlab.ready.emit(False)
+    lenlab.error.emit(NoReply())
+
+    assert reconnect.delay == 2 * reconnect.initial_delay
+
+
+def test_ready(reconnect, lenlab):
+    lenlab.error.emit(NoReply())
+    lenlab.ready.emit(True)
+
+    assert not reconnect.timer.isActive()
+    assert reconnect.delay == reconnect.initial_delay
+
+
+def test_plugged(reconnect, lenlab):
+    lenlab.error.emit(NoLaunchpad())
+    lenlab.error.emit(NoLaunchpad())
+
+    reconnect.watcher.plugged.emit()
+
+    assert reconnect.retries == [True]
+    assert not reconnect.timer.isActive()
+    assert reconnect.delay == reconnect.initial_delay
+
+
+def test_plugged_while_connected(reconnect, lenlab):
+    lenlab.ready.emit(True)
+
+    reconnect.watcher.plugged.emit()
+
+    assert reconnect.retries == []
+
+
+def test_simulator():
+    lenlab = Lenlab(simulator=True)
+    ready = Spy(lenlab.ready)
+    assert ready.wait(1000)
+
+    reconnect = Reconnect(lenlab, MockWatcher())
+    reconnect.delay = 10
+
+    # the Launchpad vanishes
+    ready = Spy(lenlab.ready)
+    terminal = lenlab.terminal
+    terminal.error.emit(ResourceError())
+    assert ready.get_single_arg() is False
+
+    assert ready.wait(1000)
+    assert ready.at(1)[0] is True
+    assert lenlab.terminal is not terminal
+
+
+def test_shared_watcher(lenlab):
+    class SharedWatcher(DeviceWatcher):
+        starts = 0
+
+        def start(self):
+            self.starts += 1
+
+    watcher = SharedWatcher()
+    reconnect = Reconnect(lenlab, watcher)
+    assert reconnect.watcher is watcher
+    assert watcher.starts == 0
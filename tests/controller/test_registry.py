@@ -0,0 +1,50 @@
+import pytest
+
+from lenlab.controller.registry import DeviceRegistry
+from lenlab.launchpad.launchpad import lp_pid, ti_vid
+from lenlab.launchpad.port_info import PortInfo
+from lenlab.launchpad.watcher import DeviceWatcher
+from lenlab.spy import Spy
+
+
+class MockWatcher(DeviceWatcher):
+    def start(self):
+        pass
+
+
+@pytest.fixture()
+def available_ports(monkeypatch):
+    available_ports = [
+        PortInfo("ttyACM0", ti_vid, lp_pid, "A"),
+        PortInfo("ttyACM1", ti_vid, lp_pid, "A"),
+        PortInfo("ttyACM2", ti_vid, lp_pid, "B"),
+        PortInfo("ttyACM3", ti_vid, lp_pid, "B"),
+    ]
+    monkeypatch.setattr(PortInfo, "available_ports", lambda: available_ports)
+    return available_ports
+
+
+@pytest.fixture()
+def registry():
+    return DeviceRegistry(MockWatcher(), reply_timeout=100)
+
+
+def test_scan(available_ports, registry):
+    added = Spy(registry.added)
+    registry.scan()
+
+    assert added.count() == 2
+    assert list(registry.devices) == ["A", "B"]
+    assert registry.devices["B"].discovery.serial_number == "B"
+    assert registry.devices["B"].reply_timeout == 100
+
+
+def test_plugged(available_ports, registry):
+    registry.scan()
+    available_ports.append(PortInfo("ttyACM4", ti_vid, lp_pid, "C"))
+
+    added = Spy(registry.added)
+    registry.watcher.plugged.emit()
+
+    assert added.get_single_arg() == "C"
+    assert len(registry.devices) == 3
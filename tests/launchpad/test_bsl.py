@@ -0,0 +1,189 @@
+import logging
+import time
+from importlib import resources
+from itertools import batched
+
+import numpy as np
+import pytest
+
+import lenlab
+from lenlab.launchpad.bsl import (
+    BootstrapLoader,
+    BufferTooSmall,
+    FirmwareUpToDate,
+    VerificationFailed,
+    WriteChanges,
+    WriteFirmware,
+    pack,
+    pack_longs,
+)
+from lenlab.launchpad.crc32 import crc32
+from lenlab.launchpad.launchpad import KB
+from lenlab.launchpad.simulator import BslSimulator
+from lenlab.launchpad.terminal import Terminal
+from lenlab.spy import Spy
+
+logger = logging.getLogger(__name__)
+
+PROGRAM = 0x24
+RANGE_ERASE = 0x13
+MASS_ERASE = 0x15
+
+
+@pytest.fixture(scope="module")
+def firmware():
+    return (resources.files(lenlab) / "lenlab_fw.bin").read_bytes()
+
+
+def bsl_pack(payload: bytes) -> bytes:
+    # the packing of a single payload before the parts
+    return (
+        b"\x80"
+        + len(payload).to_bytes(2, "little")
+        + payload
+        + crc32(payload).to_bytes(4, "little")
+    )
+
+
+def create_terminal(**kwargs) -> Terminal:
+    kwargs.setdefault("pacing", False)
+    terminal = BslSimulator.create_terminal(**kwargs)
+    assert terminal.open()
+    return terminal
+
+
+def program(terminal: Terminal, firmware: bytes) -> tuple[BootstrapLoader, Spy, Spy]:
+    bsl = BootstrapLoader(terminal)
+    messages = Spy(bsl.message)
+    success = Spy(bsl.success)
+    error = Spy(bsl.error)
+    bsl.start(firmware)
+    for _ in range(500):
+        if success.count() or error.count():
+            break
+
+        success.wait(10)
+
+    assert success.count() or error.count()
+    return bsl, messages, error
+
+
+def message_types(messages: Spy) -> list[type]:
+    return [type(messages.at(i)[0]) for i in range(messages.count())]
+
+
+def test_program_blank(firmware):
+    terminal = create_terminal()
+    port = terminal.port
+    bsl, messages, error = program(terminal, firmware)
+
+    assert error.count() == 0
+    assert port.started
+    assert port.flash[: len(firmware)].tobytes() == firmware
+    assert WriteChanges in message_types(messages)
+    assert sum(message.progress for message in message_types(messages)) == 9
+
+
+def test_up_to_date(firmware):
+    terminal = create_terminal()
+    port = terminal.port
+    port.flash[: len(firmware)] = np.frombuffer(firmware, np.uint8)
+    bsl, messages, error = program(terminal, firmware)
+
+    assert error.count() == 0
+    assert port.started
+    assert FirmwareUpToDate in message_types(messages)
+    assert PROGRAM not in port.commands
+    assert RANGE_ERASE not in port.commands
+
+
+def test_write_changed_sector(firmware):
+    terminal = create_terminal()
+    port = terminal.port
+    port.flash[: len(firmware)] = np.frombuffer(firmware, np.uint8)
+    port.flash[3000] ^= 0x10  # the old firmware differs in sector 2
+    bsl, messages, error = program(terminal, firmware)
+
+    assert error.count() == 0
+    assert port.flash[: len(firmware)].tobytes() == firmware
+    assert port.commands.count(RANGE_ERASE) == 1
+    assert port.commands.count(PROGRAM) == 1
+    assert port.flash[len(firmware) :].min() == 0xFF
+
+
+def test_verification_failed(firmware):
+    terminal = create_terminal(stuck_bits=True)
+    bsl, messages, error = program(terminal, firmware)
+
+    assert isinstance(error.get_single_arg(), VerificationFailed)
+    assert bsl.unsuccessful
+    assert not terminal.port.started
+
+
+def test_no_verification(firmware):
+    terminal = create_terminal(verification=False)
+    port = terminal.port
+    bsl, messages, error = program(terminal, firmware)
+
+    assert error.count() == 0
+    assert port.started
+    assert port.flash[: len(firmware)].tobytes() == firmware
+    assert MASS_ERASE in port.commands
+    assert WriteFirmware in message_types(messages)
+    assert sum(message.progress for message in message_types(messages)) == 9
+
+
+def test_pack_parts():
+    assert pack(b"\x24", b"\x00\x01\x00\x00", memoryview(b"data")) == pack(
+        b"\x24\x00\x01\x00\x00data"
+    )
+
+
+def test_batch_size(firmware):
+    terminal = create_terminal(max_buffer_size=2 * KB + 8)
+    port = terminal.port
+    bsl, messages, error = program(terminal, firmware)
+
+    assert error.count() == 0
+    assert bsl.batch_size == 2 * KB
+    assert port.commands.count(PROGRAM) == 4
+    assert port.flash[: len(firmware)].tobytes() == firmware
+
+
+def test_buffer_too_small(firmware):
+    terminal = create_terminal(max_buffer_size=512)
+    bsl, messages, error = program(terminal, firmware)
+
+    error.check_single_message(BufferTooSmall)
+
+
+def test_benchmark(firmware):
+    start = time.perf_counter()
+    for _ in range(100):
+        for i, batch in enumerate(batched(firmware, 12 * KB)):
+            # before: tuples of ints
+            packet = bsl_pack(
+                b"\x24" + (i * 12 * KB).to_bytes(4, byteorder="little") + bytes(batch)
+            )
+    tuples = (time.perf_counter() - start) / 100
+
+    view = memoryview(firmware)
+    start = time.perf_counter()
+    for _ in range(100):
+        for address in range(0, len(firmware), 12 * KB):
+            packet = pack(b"\x24", pack_longs(address), view[address : address + 12 * KB])
+    views = (time.perf_counter() - start) / 100
+
+    logger.info(f"pack firmware: tuples {tuples * 1e3:.3f} ms, memoryview {views * 1e3:.3f} ms")
+    assert packet
+    assert views * 3 < tuples
+
+    # end-to-end against the simulator at 1 MBaud
+    terminal = create_terminal(pacing=True)
+    start = time.perf_counter()
+    bsl, messages, error = program(terminal, firmware)
+    duration = time.perf_counter() - start
+
+    assert error.count() == 0
+    logger.info(f"flash {len(firmware)} bytes in {duration * 1e3:.1f} ms: {bsl.phases}")
+    assert list(bsl.phases) == ["connect", "check", "write", "verify", "restart"]
@@ -0,0 +1,23 @@
+from lenlab.launchpad.buffer import BufferPool
+
+
+def test_acquire():
+    pool = BufferPool(1, 16)
+    buffer = pool.acquire()
+    assert len(buffer) == 16
+    assert not pool.free
+
+
+def test_release():
+    pool = BufferPool(1, 16)
+    buffer = pool.acquire()
+    pool.release(buffer)
+    assert pool.acquire() is buffer
+
+
+def test_grow():
+    pool = BufferPool(1, 16)
+    buffer = pool.acquire(32)
+    assert len(buffer) == 32
+    # the small buffer stays in the pool
+    assert len(pool.free) == 1
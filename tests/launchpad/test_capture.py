@@ -0,0 +1,149 @@
+import io
+
+import pytest
+
+from lenlab.launchpad.capture import (
+    RECEIVED,
+    SENT,
+    CaptureError,
+    CaptureWriter,
+    InvalidCapture,
+    Recorder,
+    ReplayPort,
+    read_capture,
+)
+from lenlab.launchpad.discovery import Discovery
+from lenlab.launchpad.protocol import command, get_example_version_reply
+from lenlab.launchpad.simulator import Simulator
+from lenlab.launchpad.terminal import Terminal
+from lenlab.spy import Spy
+
+knock_reply = b"Lk\x00\x00nock"
+
+
+def request(terminal: Terminal, packet: bytes) -> bytes:
+    reply = Spy(terminal.reply)
+    terminal.write(packet)
+    assert reply.wait(1000)
+    return bytes(reply.get_single_arg())
+
+
+@pytest.fixture()
+def capture(tmp_path):
+    path = tmp_path / "lenlab.cap"
+    terminal = Simulator.create_terminal(pacing=False, fragment_size=5)
+    writer = CaptureWriter.open(path)
+    terminal.recorder = Recorder(writer)
+    terminal.open()
+    terminal.set_baud_rate(1_000_000)
+
+    assert request(terminal, command(b"8")) == get_example_version_reply()
+    Spy(terminal.reply).wait(20)
+    assert request(terminal, command(b"k")) == knock_reply
+
+    terminal.close()
+    writer.close()
+    return path
+
+
+def test_read_capture(capture):
+    with capture.open("rb") as file:
+        records = list(read_capture(file))
+
+    assert records[0].kind == SENT
+    assert records[0].data == command(b"8")
+    # fragments of the version reply
+    assert records[1].kind == RECEIVED
+    assert records[2].kind == RECEIVED
+    reply = b"".join(record.data for record in records[1:] if record.kind == RECEIVED)
+    assert reply.startswith(get_example_version_reply())
+    assert all(a.time <= b.time for a, b in zip(records, records[1:], strict=False))
+
+
+def test_invalid_capture():
+    file = io.BytesIO(b"no capture")
+    file.name = "no.cap"
+    with pytest.raises(InvalidCapture):
+        list(read_capture(file))
+
+
+def test_truncated_capture(capture):
+    data = capture.read_bytes()
+    capture.write_bytes(data[:-1])
+    with pytest.raises(InvalidCapture):
+        ReplayPort.create_terminal(capture)
+
+
+def test_missing_capture(tmp_path):
+    with pytest.raises(CaptureError):
+        ReplayPort.create_terminal(tmp_path / "missing.cap")
+
+
+@pytest.mark.parametrize("realtime", [False, True])
+def test_replay(capture, realtime):
+    terminal = ReplayPort.create_terminal(capture, realtime)
+    terminal.open()
+
+    assert request(terminal, command(b"8")) == get_example_version_reply()
+    assert request(terminal, command(b"k")) == knock_reply
+    assert terminal.port.is_finished
+
+
+def test_replay_different_write(capture):
+    terminal = ReplayPort.create_terminal(capture, False)
+    terminal.open()
+
+    # the replay does not check the commands
+    assert request(terminal, command(b"k")) == get_example_version_reply()
+
+
+def test_end_of_capture(capture):
+    terminal = ReplayPort.create_terminal(capture, False)
+    terminal.open()
+    request(terminal, command(b"8"))
+    request(terminal, command(b"k"))
+
+    reply = Spy(terminal.reply)
+    terminal.write(command(b"k"))
+    assert not reply.wait(20)
+
+
+def test_discovery_replay(capture):
+    discovery = Discovery(replay=capture, replay_realtime=False)
+    ready = Spy(discovery.ready)
+    discovery.find()
+    assert ready.wait(1000)
+    assert ready.get_single_arg().port_name == capture.name
+
+
+def test_discovery_capture(tmp_path):
+    path = tmp_path / "lenlab.cap"
+    discovery = Discovery(simulator=True, capture=path)
+    ready = Spy(discovery.ready)
+    discovery.find()
+    assert ready.wait(1000)
+
+    with path.open("rb") as file:
+        records = list(read_capture(file))
+
+    assert records[0].data == command(b"8")
+
+
+def test_discovery_capture_retry(tmp_path):
+    path = tmp_path / "lenlab.cap"
+    discovery = Discovery(simulator=True, capture=path)
+    ready = Spy(discovery.ready)
+    discovery.find()
+    assert ready.wait(1000)
+
+    # the second open continues the capture
+    ready = Spy(discovery.ready)
+    discovery.find()
+    assert ready.wait(1000)
+    discovery.close_capture()
+
+    with path.open("rb") as file:
+        records = list(read_capture(file))
+
+    probes = [record for record in records if record.data == command(b"8")]
+    assert len(probes) == 2
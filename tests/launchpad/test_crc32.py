@@ -0,0 +1,56 @@
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from lenlab.launchpad.crc32 import crc32
+from lenlab.launchpad.launchpad import KB, crc, last
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture(scope="module")
+def batch():
+    # a batch of the firmware
+    return np.random.default_rng(0).integers(256, size=12 * KB, dtype=np.uint8).tobytes()
+
+
+def test_connect_packet():
+    assert crc32(bytes([0x12])) == 0xDE44613A
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00", b"Lk\x00\x00nock", bytes(range(256))])
+def test_equivalence(data):
+    assert crc32(data) == (last(crc(data)) if data else 0xFFFFFFFF)
+
+
+def test_equivalence_batch(batch):
+    assert crc32(batch) == last(crc(batch))
+
+
+def test_seed(batch):
+    assert crc32(batch[:100], 0x12345678) == last(crc(batch[:100], seed=0x12345678))
+
+
+def test_incremental(batch):
+    view = memoryview(batch)
+    checksum = crc32(view[:1000])
+    checksum = crc32(view[1000:5000], checksum)
+    checksum = crc32(view[5000:], checksum)
+    assert checksum == crc32(batch)
+
+
+def test_benchmark(batch):
+    start = time.perf_counter()
+    reference = last(crc(batch))
+    generator = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        checksum = crc32(batch)
+    fast = (time.perf_counter() - start) / 100
+
+    logger.info(f"CRC32 of 12 KB: generator {generator * 1e3:.3f} ms, zlib {fast * 1e3:.3f} ms")
+    assert checksum == reference
+    assert fast * 10 < generator
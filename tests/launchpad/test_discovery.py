@@ -1,14 +1,15 @@
 import sys
 
 import pytest
+from PySide6.QtCore import QSettings
 
 from lenlab.launchpad import discovery as discovery_messages
 from lenlab.launchpad import rules
 from lenlab.launchpad import terminal as terminal_messages
-from lenlab.launchpad.discovery import Discovery
+from lenlab.launchpad.discovery import Discovery, LastPort
 from lenlab.launchpad.launchpad import lp_pid, ti_vid, tiva_pid
 from lenlab.launchpad.port_info import PortInfo
-from lenlab.launchpad.protocol import get_example_version_reply
+from lenlab.launchpad.protocol import get_app_version, get_example_version_reply
 from lenlab.launchpad.terminal import Terminal
 from lenlab.spy import Spy
 
@@ -219,3 +220,138 @@ def test_open_fails(discovery, terminal, error):
     terminal.error.emit(terminal_messages.NoPermission("COM0"))
 
     error.check_single_message(terminal_messages.NoPermission)
+
+
+@pytest.fixture()
+def settings(tmp_path):
+    return QSettings(str(tmp_path / "lenlab.ini"), QSettings.Format.IniFormat)
+
+
+@pytest.fixture()
+def last_port(monkeypatch, settings):
+    last_port = LastPort("COM3", "ABCD1234", get_app_version())
+    last_port.save(settings)
+    monkeypatch.setattr(
+        PortInfo,
+        "from_name",
+        lambda name: PortInfo(name, ti_vid, lp_pid, "ABCD1234", is_available=name == "COM3"),
+    )
+    return last_port
+
+
+def test_save_last_port(monkeypatch, settings, terminal):
+    monkeypatch.setattr(PortInfo, "from_name", lambda name: PortInfo(name, serial_number="1234"))
+    discovery = Discovery(settings=settings)
+    terminal.port_name = "COM3"
+    discovery.terminals = [terminal]
+    discovery.probe()
+
+    # the version of the firmware
+    terminal.reply.emit(get_example_version_reply())
+
+    assert terminal.fw_version == get_app_version()
+    assert LastPort.load(settings) == LastPort("COM3", "1234", terminal.fw_version)
+
+
+def test_fast_path(available_ports, last_port, settings):
+    discovery = Discovery(settings=settings)
+    discovery.find()
+
+    assert discovery.fast_path
+    assert [t.port_name for t in discovery.terminals] == ["COM3"]
+
+
+def test_fast_path_other_serial_number(available_ports, last_port, settings):
+    LastPort("COM3", "EFGH5678", get_app_version()).save(settings)
+    discovery = Discovery(settings=settings)
+    error = Spy(discovery.error)
+    discovery.find()
+
+    assert not discovery.fast_path
+    error.check_single_message(discovery_messages.NoLaunchpad)
+
+
+def test_fast_path_other_fw_version(available_ports, last_port, settings):
+    LastPort("COM3", "ABCD1234", "7.0").save(settings)
+    discovery = Discovery(settings=settings)
+    discovery.find()
+
+    assert not discovery.fast_path
+
+
+def test_fast_path_fallback(available_ports, last_port, settings):
+    discovery = Discovery(settings=settings)
+    error = Spy(discovery.error)
+    discovery.find()
+    discovery.terminals = [MockTerminal("COM3")]
+    discovery.probe()
+
+    assert discovery.timer.interval() == discovery.fast_probe_timeout
+    discovery.timer.timeout.emit()
+
+    # the full scan finds nothing
+    assert error.wait(100)
+    error.check_single_message(discovery_messages.NoLaunchpad)
+    assert not discovery.fast_path
+
+
+def test_fast_path_open_error(available_ports, last_port, settings):
+    discovery = Discovery(settings=settings)
+    error = Spy(discovery.error)
+    discovery.find()
+    terminal = discovery.terminals[0] = MockTerminal("COM3")
+    terminal.open = lambda: False
+
+    discovery.open()
+    terminal.error.emit(terminal_messages.NoPermission("COM3"))
+
+    # the full scan reports its own result
+    assert error.wait(100)
+    error.check_single_message(discovery_messages.NoLaunchpad)
+    assert not discovery.fast_path
+
+
+def test_fast_path_invalid_version(available_ports, last_port, settings):
+    discovery = Discovery(settings=settings)
+    error = Spy(discovery.error)
+    discovery.find()
+    discovery.terminals = [terminal := MockTerminal("COM3")]
+    discovery.probe()
+
+    terminal.reply.emit(b"L8\x00\x00\x00\x00\x00\x00")
+
+    assert error.wait(100)
+    error.check_single_message(discovery_messages.NoLaunchpad)
+    assert not discovery.fast_path
+
+
+def test_time_to_ready(discovery, terminal):
+    discovery.clock.start()
+
+    discovery.ready.emit(terminal)
+
+    assert discovery.time_to_ready is not None
+    assert not discovery.clock.isValid()
+
+
+@pytest.fixture()
+def two_launchpads(available_ports):
+    available_ports.append(PortInfo("ttyACM0", ti_vid, lp_pid, "A"))
+    available_ports.append(PortInfo("ttyACM1", ti_vid, lp_pid, "A"))
+    available_ports.append(PortInfo("ttyACM2", ti_vid, lp_pid, "B"))
+    available_ports.append(PortInfo("ttyACM3", ti_vid, lp_pid, "B"))
+
+
+def test_serial_number(two_launchpads):
+    discovery = Discovery(serial_number="B")
+    discovery.find()
+
+    assert [t.port_name for t in discovery.terminals] == ["ttyACM2"]
+
+
+def test_serial_number_not_found(two_launchpads):
+    discovery = Discovery(serial_number="C")
+    error = Spy(discovery.error)
+    discovery.find()
+
+    error.check_single_message(discovery_messages.DeviceNotFound)
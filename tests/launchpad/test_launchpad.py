@@ -357,3 +357,15 @@ def test_bsl_connect_packet_crc():
 
 def test_last():
     assert launchpad.last(range(7)) == 6
+
+
+def test_group_by_serial_number():
+    port_infos = [
+        PortInfo("ttyACM0", serial_number="A"),
+        PortInfo("ttyACM1", serial_number="A"),
+        PortInfo("ttyACM2", serial_number="B"),
+        PortInfo("ttyACM3", serial_number="B"),
+    ]
+    launchpads = launchpad.group_by_serial_number(port_infos)
+    assert list(launchpads) == ["A", "B"]
+    assert [pi.name for pi in launchpads["B"]] == ["ttyACM2", "ttyACM3"]
@@ -1,5 +1,7 @@
 from importlib import metadata
 
+import pytest
+
 from lenlab.launchpad import protocol
 
 
@@ -24,3 +26,30 @@ def test_get_app_version(monkeypatch):
 def test_get_example_version_reply(monkeypatch):
     monkeypatch.setattr(metadata, "version", lambda name: "8.2a1")
     assert protocol.get_example_version_reply() == b"L8\x00\x002a1\x00"
+
+
+@pytest.mark.parametrize(
+    "head", [b"L", b"Lk", b"Lk\x00", b"Lk\x00\x00", b"Lx\x00\x10", b"La\x00\x6c", b"Ls\xa0\x0f"]
+)
+def test_plausible_reply(head):
+    assert protocol.is_plausible_reply(head)
+
+
+@pytest.mark.parametrize(
+    "head", [b"", b"\x00\x08", b"LQ", b"Lk\x01\x00", b"Lx\x02\x00", b"Lx\x04\x10", b"La\x00\x00"]
+)
+def test_implausible_reply(head):
+    assert not protocol.is_plausible_reply(head)
+
+
+def test_checksum():
+    packet = b"Lk\x00\x00nock"
+    packet += protocol.checksum(packet)
+    assert len(packet) == 8 + protocol.checksum_size
+    assert protocol.has_valid_checksum(packet)
+
+
+def test_false_checksum():
+    packet = b"Lk\x00\x00nock"
+    packet += protocol.checksum(packet)
+    assert not protocol.has_valid_checksum(packet[:5] + b"m" + packet[6:])
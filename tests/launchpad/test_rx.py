@@ -1,5 +1,7 @@
 import pytest
 
+from lenlab.launchpad.buffer import BufferPool
+from lenlab.launchpad.protocol import checksum
 from lenlab.launchpad.terminal import Terminal
 from lenlab.spy import Spy
 
@@ -20,6 +22,10 @@ class StaticReplyTerminal(Terminal):
         chunk, self.packet = self.packet[:n], self.packet[n:]
         return chunk
 
+    def feed(self, packet: bytes) -> None:
+        self.packet += packet
+        self.on_ready_read()
+
     def capture(self) -> tuple[Spy, Spy, Spy]:
         ack = Spy(self.ack)
         error = Spy(self.error)
@@ -82,9 +88,9 @@ def test_bsl_ack_success():
 @pytest.mark.parametrize("packet", [b"L", b"\x00", b"\x00\x08", knock[:4]])
 def test_valid_prefix(packet):
     terminal = StaticReplyTerminal(packet)
-    # do not consume a valid prefix
+    # keep a valid prefix for the next call
     assert terminal.capture_nothing()
-    assert terminal.packet == packet
+    assert terminal.buffer == packet
 
 
 @pytest.mark.parametrize("packet", [b"Q", b"\x00\x80", b"QQQQ", b"\x00" + knock])
@@ -93,10 +99,58 @@ def test_invalid_prefix(packet):
     assert terminal.capture_error()
 
 
-@pytest.mark.parametrize("packet", [knock + b"\x00", ok + bytes([0x51])])
-def test_invalid_postfix(packet):
-    terminal = StaticReplyTerminal(packet)
-    assert terminal.capture_error()
+def test_valid_postfix():
+    terminal = StaticReplyTerminal(knock + b"\x00")
+    reply = Spy(terminal.reply)
+    error = Spy(terminal.error)
+
+    terminal.on_ready_read()
+
+    assert reply.get_single_arg() == knock
+    assert error.count() == 0
+    # keep the beginning of the next packet
+    assert terminal.buffer == b"\x00"
+
+
+def test_invalid_postfix():
+    terminal = StaticReplyTerminal(ok + bytes([0x51]))
+    reply = Spy(terminal.reply)
+    error = Spy(terminal.error)
+
+    terminal.on_ready_read()
+
+    assert reply.get_single_arg() == ok
+    assert error.count() == 1
+    assert terminal.buffer == b""
+
+
+def test_two_packets():
+    terminal = StaticReplyTerminal(knock + ok)
+    reply = Spy(terminal.reply)
+
+    terminal.on_ready_read()
+
+    assert reply.count() == 2
+    assert reply.at(0)[0] == knock
+    assert reply.at(1)[0] == ok
+    assert terminal.buffer == b""
+
+
+def test_fragments():
+    bulk = b"La\x00\x6c\x28\x00\x00\x00" + bytes(27 * 1024)
+    terminal = StaticReplyTerminal(b"")
+    reply = Spy(terminal.reply)
+
+    # a poll reply and the beginning of a bulk reply arrive together
+    terminal.feed(knock + bulk[:1000])
+    assert reply.count() == 1
+
+    for i in range(1000, len(bulk), 4096):
+        terminal.feed(bulk[i : i + 4096])
+
+    assert reply.count() == 2
+    assert reply.at(1)[0] == bulk
+    assert terminal.buffer == b""
 
 
 @pytest.mark.parametrize(
@@ -108,3 +162,126 @@ def test_invalid_bytes_ack_mode(packet):
     assert count == 0
     # drop invalid bytes
     assert terminal.packet == b""
+
+
+@pytest.fixture
+def resync_terminal():
+    terminal = StaticReplyTerminal(b"")
+    terminal.resync_mode = True
+    return terminal
+
+
+def test_resync(resync_terminal):
+    reply = Spy(resync_terminal.reply)
+    dropped = Spy(resync_terminal.dropped)
+    error = Spy(resync_terminal.error)
+
+    # the tail of a damaged packet with some L in it, then a valid reply
+    resync_terminal.feed(b"\x12L\x34Lz\x00\x00" + knock)
+
+    assert reply.get_single_arg() == knock
+    assert dropped.count() == 1
+    assert error.count() == 0
+    assert resync_terminal.skipped_bytes == 7
+    assert resync_terminal.resync_count == 1
+
+
+def test_resync_implausible_length(resync_terminal):
+    reply = Spy(resync_terminal.reply)
+
+    # a knock header with a payload length
+    resync_terminal.feed(b"Lk\x04\x00" + knock)
+
+    assert reply.get_single_arg() == knock
+    assert resync_terminal.skipped_bytes == 4
+
+
+def test_resync_keeps_prefix(resync_terminal):
+    dropped = Spy(resync_terminal.dropped)
+
+    resync_terminal.feed(b"QQLx")
+
+    assert dropped.count() == 1
+    assert resync_terminal.buffer == b"Lx"
+
+
+def test_resync_points(resync_terminal):
+    reply = Spy(resync_terminal.reply)
+
+    points = b"Lx\x08\x00\x01\x00\x00\x00" + bytes(8)
+    resync_terminal.feed(b"\x00" + points)
+
+    assert reply.get_single_arg() == points
+    assert resync_terminal.skipped_bytes == 1
+
+
+def test_discard(resync_terminal):
+    dropped = Spy(resync_terminal.dropped)
+
+    resync_terminal.feed(b"La\x00\x6c\x28\x00\x00\x00" + bytes(1000))
+    resync_terminal.discard()
+
+    assert dropped.count() == 1
+    assert resync_terminal.buffer == b""
+    assert resync_terminal.skipped_bytes == 1008
+
+
+@pytest.fixture
+def crc_terminal():
+    terminal = StaticReplyTerminal(b"")
+    terminal.resync_mode = True
+    terminal.crc_mode = True
+    return terminal
+
+
+def test_checksum(crc_terminal):
+    reply = Spy(crc_terminal.reply)
+
+    # the trailer arrives in a second chunk
+    crc_terminal.feed(knock)
+    assert reply.count() == 0
+
+    crc_terminal.feed(checksum(knock) + knock + checksum(knock))
+    assert reply.count() == 2
+    assert reply.at(1)[0] == knock
+    assert crc_terminal.buffer == b""
+
+
+def test_false_checksum(crc_terminal):
+    reply = Spy(crc_terminal.reply)
+    corrupt = Spy(crc_terminal.corrupt)
+
+    # a flipped bit in the payload
+    crc_terminal.feed(b"Lk\x00\x00nocK" + checksum(knock) + knock + checksum(knock))
+
+    assert corrupt.get_single_arg() == b"Lk\x00\x00nocK"
+    assert reply.get_single_arg() == knock
+    assert crc_terminal.crc_errors == 1
+
+
+def test_reply_view():
+    terminal = StaticReplyTerminal(knock)
+    reply_types = []
+    terminal.reply.connect(lambda packet: reply_types.append(type(packet)))
+
+    terminal.on_ready_read()
+
+    assert reply_types == [memoryview]
+
+
+def test_buffer_reuse():
+    terminal = StaticReplyTerminal(b"")
+    terminal.pool = BufferPool(2, 64)
+    terminal.rx = terminal.pool.acquire()
+    buffers = {id(terminal.rx), id(terminal.pool.free[0])}
+
+    replies = []
+    terminal.reply.connect(lambda packet: replies.append(bytes(packet)))
+
+    # packets across buffer boundaries
+    stream = knock * 100
+    for i in range(0, len(stream), 28):
+        terminal.feed(stream[i : i + 28])
+
+    assert replies == [knock] * 100
+    assert id(terminal.rx) in buffers
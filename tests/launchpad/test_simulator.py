@@ -0,0 +1,290 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QElapsedTimer
+
+from lenlab.controller.lenlab import Lenlab
+from lenlab.launchpad.discovery import Discovery
+from lenlab.launchpad.protocol import command, get_example_version_reply
+from lenlab.launchpad.simulator import Simulator
+from lenlab.launchpad.terminal import Terminal
+from lenlab.spy import Spy
+
+knock_reply = b"Lk\x00\x00nock"
+
+
+def create_terminal(**kwargs) -> Terminal:
+    kwargs.setdefault("pacing", False)
+    terminal = Simulator.create_terminal(**kwargs)
+    assert terminal.open()
+    terminal.set_baud_rate(1_000_000)
+    return terminal
+
+
+@pytest.fixture()
+def terminal():
+    terminal = create_terminal()
+    yield terminal
+    terminal.close()
+
+
+def request(terminal: Terminal, packet: bytes, timeout: int = 1000) -> bytes:
+    reply = Spy(terminal.reply)
+    terminal.write(packet)
+    assert reply.wait(timeout)
+    # the reply is a view of the receive buffer
+    return bytes(reply.get_single_arg())
+
+
+def test_knock(terminal):
+    assert request(terminal, command(b"k")) == knock_reply
+
+
+def test_version(terminal):
+    assert request(terminal, command(b"8")) == get_example_version_reply()
+
+
+def test_false_baud_rate(terminal):
+    terminal.set_baud_rate(9_600)
+    reply = Spy(terminal.reply)
+    terminal.write(command(b"k"))
+    assert not reply.wait(50)
+
+
+def test_invalid_command(terminal):
+    reply = Spy(terminal.reply)
+    terminal.write(b"Lk\x00\x00nock, knock!")
+    assert not reply.wait(50)
+
+
+def test_sinus(terminal):
+    length, amplitude = 1000, 2000
+    reply = request(terminal, command(b"s", 0, length, amplitude))
+    assert int.from_bytes(reply[2:4], byteorder="little") == 2 * 2000
+    assert int.from_bytes(reply[4:8], byteorder="little") == length
+
+    sinus = np.frombuffer(reply, np.dtype("<i2"), offset=8)[:length]
+    t = np.linspace(0, 2 * np.pi, endpoint=False, num=length)
+    assert np.all(np.absolute(sinus - np.sin(t) * amplitude) <= 1)
+
+
+def test_acquire(terminal):
+    length, amplitude = 1000, 1000
+    reply = request(terminal, command(b"a", 40, length, amplitude))
+    assert int.from_bytes(reply[2:4], byteorder="little") == 27 * 1024
+
+    interval = int.from_bytes(reply[4:6], byteorder="little")
+    offset = int.from_bytes(reply[6:8], byteorder="little")
+    assert interval == 40
+
+    channels = np.frombuffer(reply, np.dtype("<u2"), offset=8)
+    ch1 = channels[: channels.shape[0] // 2].astype(np.float64)
+    # rising zero crossing in the middle of the window
+    mid = offset + 3000
+    assert abs(ch1[mid] - 2048) < 10
+    assert ch1[mid + length // 4] > 2048 + 0.9 * amplitude
+
+
+def test_bode(terminal):
+    # 10 kHz, the low pass filter at 1 kHz attenuates by 20 dB
+    length, amplitude = 100, 1000
+    reply = request(terminal, command(b"b", 40, length, amplitude))
+    assert reply[0:2] == b"Lb"
+
+    channels = np.frombuffer(reply, np.dtype("<u2"), offset=8).astype(np.float64) - 2048
+    ch1, ch2 = channels[: channels.shape[0] // 2], channels[channels.shape[0] // 2 :]
+    magnitude = np.std(ch2) / np.std(ch1)
+    assert magnitude == pytest.approx(1 / np.sqrt(101), rel=0.05)
+
+
+def test_logging(terminal):
+    # 1 ms
+    reply = request(terminal, command(b"v", 40_000))
+    assert reply == b"Lv\x00\x00" + (40_000).to_bytes(4, byteorder="little")
+
+    clock = QElapsedTimer()
+    clock.start()
+    Spy(terminal.reply).wait(50)
+
+    reply = request(terminal, command(b"x", 0))
+    n_points = int.from_bytes(reply[2:4], byteorder="little") // 4
+    assert 45 <= n_points <= clock.elapsed() + 1
+    assert int.from_bytes(reply[4:8], byteorder="little") == 0
+
+    reply = request(terminal, command(b"x", 0))
+    assert reply == b"Lx\x00\x00\x00\x00\x00\x00"
+
+
+def test_full_logging_buffer(terminal):
+    terminal.port.log_clock.start()
+    request(terminal, command(b"v", 1))
+    Spy(terminal.reply).wait(10)
+
+    reply = request(terminal, command(b"x", 1))
+    assert int.from_bytes(reply[2:4], byteorder="little") == 4 * 1024
+    assert int.from_bytes(reply[4:8], byteorder="little") == 1
+
+    # the timer stopped
+    reply = request(terminal, command(b"x", 1))
+    assert int.from_bytes(reply[2:4], byteorder="little") == 0
+
+
+def test_example_data(terminal):
+    assert request(terminal, command(b"u"))[0:2] == b"Lu"
+
+    reply = request(terminal, command(b"x", 1))
+    assert reply[0:4] == b"Lv\x00\x10"
+    payload = np.frombuffer(reply, np.dtype("<u2"), offset=8)
+    assert payload[0:4].tolist() == [0, 4096, 4, 4092]
+
+
+def test_transmit_while_transmitting(terminal):
+    reply = Spy(terminal.reply)
+    terminal.write(command(b"k"))
+    terminal.write(command(b"k"))
+    assert reply.wait(100)
+    assert not reply.wait(50)
+    assert reply.count() == 1
+    assert terminal.port.hung
+
+
+def test_pacing():
+    terminal = create_terminal(pacing=True)
+    clock = QElapsedTimer()
+    clock.start()
+
+    # 27 KB at 100 KB/s and 12 * 864 samples at 1 µs
+    reply = request(terminal, command(b"a", 40, 1000, 1000), 2000)
+    assert len(reply) == 8 + 27 * 1024
+    assert clock.elapsed() >= 27 * 1024 / 100 + 10
+
+
+def test_fragments():
+    terminal = create_terminal(fragment_size=7)
+    for _ in range(3):
+        assert request(terminal, command(b"k")) == knock_reply
+
+
+def test_corruption():
+    terminal = create_terminal(corruption=1.0, seed=1)
+    terminal.resync_mode = True
+    dropped = Spy(terminal.dropped)
+    reply = Spy(terminal.reply)
+
+    for _ in range(10):
+        terminal.write(command(b"s", 0, 1000, 1000))
+        reply.wait(20)
+        terminal.discard()
+
+    assert dropped.count() > 0
+    # a flipped bit in the payload goes unnoticed
+    assert reply.count() < 10
+
+
+def test_discovery():
+    discovery = Discovery(simulator=True)
+    ready = Spy(discovery.ready)
+    discovery.find()
+    assert ready.wait(1000)
+    assert ready.get_single_arg().port_name == "simulator"
+
+
+def test_lenlab():
+    lenlab = Lenlab(simulator=True)
+    ready = Spy(lenlab.ready)
+    assert ready.wait(1000)
+    assert ready.get_single_arg() is True
+
+    reply = Spy(lenlab.reply)
+    lenlab.send_command(command(b"k"))
+    assert reply.wait(1000)
+    assert bytes(reply.get_single_arg()) == knock_reply
+
+
+def test_soak():
+    terminal = create_terminal(fragment_size=1024)
+    for _ in range(50):
+        reply = request(terminal, command(b"a", 40, 1000, 1000))
+        assert len(reply) == 8 + 27 * 1024
+
+    assert terminal.skipped_bytes == 0
+
+
+def test_lenlab_queue():
+    lenlab = Lenlab(simulator=True)
+    assert Spy(lenlab.ready).wait(1000)
+
+    requests = [Spy(lenlab.submit(command(b"k")).reply) for _ in range(3)]
+    assert requests[-1].wait(1000)
+    assert all(request.count() == 1 for request in requests)
+
+
+def test_lenlab_depth():
+    # the firmware hangs when it should transmit while transmitting
+    lenlab = Lenlab(simulator=True, depth=2)
+    assert Spy(lenlab.ready).wait(1000)
+
+    error = Spy(lenlab.error)
+    lenlab.submit(command(b"k"))
+    lenlab.submit(command(b"k"))
+    assert error.wait(3000)
+
+
+def test_link():
+    discovery = Discovery(simulator=True, link_baud_rate=4_000_000)
+    ready = Spy(discovery.ready)
+    discovery.find()
+    assert ready.wait(1000)
+
+    terminal = ready.get_single_arg()
+    assert terminal.crc_mode
+    assert terminal.port.baudRate() == 4_000_000
+    assert terminal.port.device_baud_rate == 4_000_000
+    assert request(terminal, command(b"k")) == knock_reply
+
+
+def test_link_unsupported_baud_rate():
+    discovery = Discovery(simulator=True, link_baud_rate=3_000_000)
+    ready = Spy(discovery.ready)
+    discovery.find()
+    assert ready.wait(1000)
+
+    # the firmware does not confirm and the terminal stays at 1 MBaud
+    terminal = ready.get_single_arg()
+    assert not terminal.crc_mode
+    assert terminal.port.baudRate() == 1_000_000
+    assert request(terminal, command(b"k")) == knock_reply
+
+
+def test_retransmit(terminal):
+    terminal.port.crc_mode = True
+    terminal.crc_mode = True
+    assert request(terminal, command(b"k")) == knock_reply
+    assert request(terminal, command(b"r")) == knock_reply
+
+
+def test_lenlab_link():
+    lenlab = Lenlab(simulator=True, link_baud_rate=4_000_000)
+    assert Spy(lenlab.ready).wait(1000)
+    terminal = lenlab.discovery.terminals[0]
+
+    # flip a bit in every other packet
+    flips = iter([True, False] * 5)
+
+    def damage(packet: bytes) -> bytes:
+        if next(flips):
+            packet = bytearray(packet)
+            packet[100] ^= 0x10
+        return bytes(packet)
+
+    terminal.port.corruption = 1.0
+    terminal.port.damage = damage
+
+    error = Spy(lenlab.error)
+    for _ in range(5):
+        reply = Spy(lenlab.submit(command(b"s", 0, 1000, 1000)).reply)
+        assert reply.wait(1000)
+        assert len(reply.get_single_arg()) == 8 + 2 * 2000
+
+    # the retransmissions repair the flipped bits
+    assert terminal.crc_errors == 5
+    assert error.count() == 0
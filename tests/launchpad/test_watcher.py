@@ -0,0 +1,52 @@
+import pytest
+
+from lenlab.launchpad.launchpad import lp_pid, ti_vid
+from lenlab.launchpad.port_info import PortInfo
+from lenlab.launchpad.watcher import DeviceWatcher
+from lenlab.spy import Spy
+
+
+@pytest.fixture()
+def available_ports(monkeypatch):
+    available_ports = []
+    monkeypatch.setattr(PortInfo, "available_ports", lambda: available_ports)
+    return available_ports
+
+
+@pytest.fixture()
+def watcher(available_ports):
+    watcher = DeviceWatcher()
+    watcher.start()
+    yield watcher
+    watcher.stop()
+
+
+def test_plugged(available_ports, watcher):
+    plugged = Spy(watcher.plugged)
+    available_ports.append(PortInfo("ttyACM0", ti_vid, lp_pid))
+
+    watcher.poll()
+    assert plugged.count() == 1
+
+    watcher.poll()
+    assert plugged.count() == 1
+
+
+def test_unplugged(available_ports):
+    available_ports.append(PortInfo("ttyACM0", ti_vid, lp_pid))
+    watcher = DeviceWatcher()
+    watcher.start()
+
+    unplugged = Spy(watcher.unplugged)
+    available_ports.clear()
+
+    watcher.poll()
+    assert unplugged.count() == 1
+
+
+def test_other_device(available_ports, watcher):
+    plugged = Spy(watcher.plugged)
+    available_ports.append(PortInfo("ttyUSB0", 0x0403, 0x6001))
+
+    watcher.poll()
+    assert plugged.count() == 0
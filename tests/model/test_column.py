@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from lenlab.model.column import Column
+
+
+@pytest.fixture
+def column():
+    column = Column(chunk_size=8)
+    column.extend(np.arange(5, dtype=np.double))
+    column.extend(np.arange(5, 20, dtype=np.double))
+    return column
+
+
+def test_extend(column):
+    assert len(column) == 20
+    assert len(column.chunks) == 3
+    assert np.array_equal(np.asarray(column), np.arange(20))
+
+
+def test_extend_factor():
+    column = Column(chunk_size=4)
+    payload = np.arange(10, dtype=np.dtype("<u2"))
+    column.extend(payload, 0.5)
+    assert np.allclose(column[:], payload * 0.5)
+
+
+def test_slice_view(column):
+    view = column[9:15]
+    assert np.array_equal(view, np.arange(9, 15))
+    assert np.shares_memory(view, column.chunks[1])
+
+
+def test_slice_across_chunks(column):
+    assert np.array_equal(column[3:19], np.arange(3, 19))
+    assert np.array_equal(column[15:], np.arange(15, 20))
+    assert np.array_equal(column[::3], np.arange(0, 20, 3))
+    assert column[12:12].shape == (0,)
+
+
+def test_item(column):
+    assert column[0] == 0
+    assert column[17] == 17
+    assert column[-1] == 19
+    with pytest.raises(IndexError):
+        column[20]
+
+
+def test_take(column):
+    indices = np.asarray([[0, 7, 8], [19, 3, 16]])
+    assert np.array_equal(column[indices], indices)
+
+
+def test_clear(column):
+    first_chunk = column.chunks[0]
+    column.clear()
+    assert len(column) == 0
+
+    column.extend(np.ones(3))
+    assert column.chunks[0] is first_chunk
+    assert np.array_equal(column[:], np.ones(3))
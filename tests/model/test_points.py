@@ -49,6 +49,14 @@ def test_parse_reply(length, reply, rising, falling):
     assert np.allclose(chart.channels[1], falling)
 
 
+def test_parse_reply_view(length, reply, rising):
+    points = Points(0.1)
+    points.parse_reply(memoryview(reply))
+
+    chart = points.create_chart()
+    assert np.allclose(chart.channels[0], rising)
+
+
 def test_append_reply(length, reply, rising, falling):
     points = Points(1.0)
     points.parse_reply(reply)
@@ -117,14 +125,18 @@ def test_compression(length, reply):
     assert chart.channels[1].shape == (compressed,)
 
 
-def test_padding(length, reply):
+def test_chunks(length, reply):
     points = Points(interval=1.0)
+    points.parse_reply(reply)
+    first_chunk = points.channels[0].chunks[0]
 
-    for _ in range(100):
+    for _ in range(99):
         points.parse_reply(reply)
 
-    assert points.channels[0].shape == (110_000,)
-    assert points.channels[1].shape == (110_000,)
+    # no reallocation
+    assert points.channels[0].chunks[0] is first_chunk
+    assert points.channels[0].shape == (102_400,)
+    assert len(points.channels[1].chunks) == 2
 
 
 def test_huge_compression(length, reply):
@@ -141,3 +153,104 @@ def test_huge_compression(length, reply):
     assert chart.x.shape == (compressed,)
     assert chart.channels[0].shape == (compressed,)
     assert chart.channels[1].shape == (compressed,)
+
+
+def reference_envelope(values, size):
+    blocks = values[: values.shape[0] // size * size].reshape((-1, size))
+    return blocks.min(axis=1), blocks.max(axis=1), blocks.mean(axis=1)
+
+
+def random_reply(rng, length):
+    payload = rng.integers(4096, size=2 * length, dtype=np.dtype("<u2"))
+    return pack(b"v", arg=b"\x00\x00\x00\x00", length=length) + payload.tobytes()
+
+
+def test_pyramid():
+    rng = np.random.default_rng(0)
+    points = Points(interval=0.1)
+    for length in [1, 15, 100, 1024, 7, 3000]:
+        points.parse_reply(random_reply(rng, length))
+
+    values = points.channels[0][: points.index]
+    pyramid = points.pyramids[0]
+    for i, level in enumerate(pyramid.levels):
+        minimum, maximum, mean = reference_envelope(values, 1 << (i + pyramid.min_level))
+        n = pyramid.lengths[i]
+        assert n == minimum.shape[0]
+        assert np.array_equal(level[:n, 0], minimum)
+        assert np.array_equal(level[:n, 1], maximum)
+        assert np.allclose(level[:n, 2], mean)
+
+
+def test_prefix_sum():
+    rng = np.random.default_rng(1)
+    points = Points(interval=0.1)
+    points.parse_reply(random_reply(rng, 5000))
+
+    values = points.channels[1][: points.index]
+    positions = np.asarray([0, 1, 15, 16, 17, 100, 1023, 1024, 4999, 5000])
+    sums = points.pyramids[1].prefix_sum(points.channels[1], points.index, positions)
+    assert np.allclose(sums, [values[:p].sum() for p in positions])
+
+
+def test_batch_means(length, reply):
+    points = Points(interval=0.1)
+    for _ in range(10):
+        points.parse_reply(reply)
+
+    for i, values in enumerate(points.channels):
+        reference = Points.compress(values, 100, 100)
+        assert np.allclose(points.batch_means(i, 100, 100), reference)
+
+
+def test_window():
+    rng = np.random.default_rng(2)
+    points = Points(interval=0.02)
+    for _ in range(20):
+        points.parse_reply(random_reply(rng, 1000))
+
+    # zoom into a part of the log
+    chart = points.window(3000, 11000, 100)
+    assert 100 <= chart.x.shape[0] <= 200
+    values = points.channels[0][:11000]
+    size = round((chart.x[1] - chart.x[0]) * chart.x_unit / points.interval)
+    first = round(chart.x[0] * chart.x_unit / points.interval)
+    minimum, maximum, mean = reference_envelope(values[first:], size)
+    n = chart.x.shape[0]
+    assert np.array_equal(chart.lower[0], minimum[:n])
+    assert np.array_equal(chart.upper[0], maximum[:n])
+    assert np.allclose(chart.channels[0], mean[:n])
+
+
+def test_window_raw():
+    rng = np.random.default_rng(3)
+    points = Points(interval=1.0)
+    points.parse_reply(random_reply(rng, 1000))
+
+    # fewer samples than pixels
+    chart = points.window(10, 110, 1000)
+    assert np.array_equal(chart.channels[0], points.channels[0][10:110])
+    assert np.array_equal(chart.lower[0], chart.upper[0])
+
+
+def test_codes(length, reply):
+    volts = Points(interval=0.1)
+    codes = Points(interval=0.1, codes=True)
+    for _ in range(20):
+        volts.parse_reply(reply)
+        codes.parse_reply(reply)
+
+    assert codes.channels[0].dtype == np.dtype("<u2")
+    assert codes.channels[0].chunks[0].nbytes * 4 == volts.channels[0].chunks[0].nbytes
+
+    # the same volts for the readouts, the chart, and the export
+    assert codes.get_last_value(0) == volts.get_last_value(0)
+    assert np.array_equal(codes.volts(codes.channels[1][:]), volts.channels[1][:])
+
+    chart, reference = codes.create_chart(), volts.create_chart()
+    assert np.allclose(chart.channels[0], reference.channels[0])
+
+    window, reference = codes.window(0, 20 * length, 100), volts.window(0, 20 * length, 100)
+    assert np.allclose(window.upper[1], reference.upper[1])
+
+    assert list(codes.rows(20 * length - 3)) == list(volts.rows(20 * length - 3))
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from lenlab.launchpad.protocol import pack
+from lenlab.model.column import Column
+from lenlab.model.points import Points
+from lenlab.model.recording import InvalidRecording, Recording
+
+
+@pytest.fixture
+def reply():
+    length = 1000
+    payload = np.empty((2 * length,), np.dtype("<u2"))
+    payload[::2] = np.arange(length) * 4  # channel 1
+    payload[1::2] = 4095 - payload[::2]  # channel 2
+    return pack(b"v", arg=b"\x00\x00\x00\x00", length=length) + payload.tobytes()
+
+
+def create_points() -> Points:
+    points = Points(interval=0.1, codes=True)
+    # small chunks for many rows
+    points.channels = [Column(1024, np.dtype("<u2")) for _ in range(2)]
+    return points
+
+
+def test_record(tmp_path, reply):
+    path = tmp_path / "voltmeter.lenlab"
+    points = create_points()
+    points.record(path)
+    for _ in range(5):
+        points.parse_reply(reply)
+
+    assert points.recording.length == 5000
+    points.stop_recording()
+
+    loaded = Points.load(path)
+    assert loaded.index == 5000
+    assert loaded.interval == 0.1
+    assert loaded.codes
+    assert np.array_equal(loaded.channels[0][:], points.channels[0][:])
+    assert np.array_equal(loaded.channels[1][:], points.channels[1][:])
+    assert loaded.get_last_value(1) == points.get_last_value(1)
+    assert loaded.chart_n_points == 500  # means per second
+
+
+def test_record_later(tmp_path, reply):
+    # the recording begins with the samples so far
+    path = tmp_path / "voltmeter.lenlab"
+    points = create_points()
+    points.parse_reply(reply)
+    points.parse_reply(reply)
+    reference = points.channels[0][:].copy()
+
+    points.record(path)
+    points.parse_reply(reply)
+    points.stop_recording()
+
+    loaded = Points.load(path)
+    assert loaded.index == 3000
+    assert np.array_equal(loaded.channels[0][:2000], reference)
+
+
+def test_interrupted(tmp_path, reply):
+    # no close, the header counts the samples after each reply
+    path = tmp_path / "voltmeter.lenlab"
+    points = create_points()
+    points.record(path)
+    points.parse_reply(reply)
+    points.parse_reply(reply)
+    points.recording.flush()
+
+    recording = Recording.open(path)
+    assert recording.length == 2000
+    assert recording.chunks[1][0][1] == 4091
+
+
+def test_clear_keeps_the_file(tmp_path, reply):
+    path = tmp_path / "voltmeter.lenlab"
+    points = create_points()
+    points.record(path)
+    points.parse_reply(reply)
+
+    points.clear()
+    assert points.recording is None
+    points.parse_reply(reply)  # in memory
+
+    assert Points.load(path).index == 1000
+
+
+def test_allocate(tmp_path):
+    path = tmp_path / "voltmeter.lenlab"
+    recording = Recording.create(path, 2, 1024, np.dtype("<u2"), 0.1, 1.0)
+    first = recording.allocate(0)
+    first[-1] = 7
+
+    # a row for both channels, the mapped chunks stay valid
+    recording.allocate(1)
+    recording.allocate(0)
+    assert path.stat().st_size == recording.chunk_offset(2, 0)
+    assert first[-1] == 7
+    recording.close()
+
+
+def test_rows(tmp_path, reply):
+    path = tmp_path / "voltmeter.lenlab"
+    points = create_points()
+    points.record(path)
+    points.parse_reply(reply)
+    points.parse_reply(reply)
+
+    memory = create_points()
+    memory.parse_reply(reply)
+    memory.parse_reply(reply)
+
+    assert list(points.rows(500)) == list(memory.rows(500))
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("Lenlab MSPM0,8.2,voltmeter\n")
+
+    with pytest.raises(InvalidRecording):
+        Recording.open(path)
+
+
+def test_truncated(tmp_path, reply):
+    path = tmp_path / "voltmeter.lenlab"
+    points = create_points()
+    points.record(path)
+    points.parse_reply(reply)
+    points.stop_recording()
+
+    with path.open("r+b") as file:
+        file.truncate(Recording.header_size + 100)
+
+    with pytest.raises(InvalidRecording):
+        Recording.open(path)
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from lenlab.launchpad.protocol import pack
+from lenlab.model.points import Points
+from lenlab.model.session import InvalidSession, Session, SessionAppender, is_session
+from lenlab.model.waveform import Waveform
+
+
+@pytest.fixture
+def reply():
+    length = 1000
+    payload = np.empty((2 * length,), np.dtype("<u2"))
+    payload[::2] = np.arange(length) * 4  # channel 1
+    payload[1::2] = 4095 - payload[::2]  # channel 2
+    return pack(b"v", arg=b"\x00\x00\x00\x00", length=length) + payload.tobytes()
+
+
+def test_is_session(tmp_path):
+    assert is_session(tmp_path / "data.lenlab-session")
+    assert not is_session(tmp_path / "data.csv")
+    assert not is_session(tmp_path / "voltmeter.lenlab")  # a recording
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "data.lenlab-session"
+    session = Session(
+        "bode_plot",
+        {"step": 2, "amplitude": 1.5},
+        {"a": np.arange(3, dtype=np.double), "b": np.arange(12, dtype="<u2").reshape((6, 2))},
+    )
+    with path.open("wb") as file:
+        session.save(file)
+
+    loaded = Session.load(path)
+    assert loaded.kind == "bode_plot"
+    assert loaded.settings == {"step": 2, "amplitude": 1.5}
+    assert loaded.firmware == session.firmware
+    assert isinstance(loaded.columns["b"], np.memmap)
+    assert np.array_equal(loaded.columns["a"], session.columns["a"])
+    assert np.array_equal(loaded.columns["b"], session.columns["b"])
+
+    # the columns are aligned
+    for values in loaded.columns.values():
+        assert values.offset % 64 == 0
+
+
+def test_append(tmp_path):
+    path = tmp_path / "data.lenlab-session"
+    with path.open("wb") as file:
+        Session("voltmeter", columns={"codes": np.empty((0, 2), "<u2")}).save(file)
+
+    rows = np.arange(20, dtype="<u2").reshape((10, 2))
+    with path.open("r+b") as file:
+        appender = SessionAppender(file)
+        appender.append(rows[:4])
+        appender.update()
+        appender.append(rows[4:])
+
+        # the rows field counts the rows of the last update
+        assert Session.load(path).columns["codes"].shape == (4, 2)
+
+        appender.update()
+
+    assert np.array_equal(Session.load(path).columns["codes"], rows)
+
+
+def test_append_interrupted(tmp_path):
+    path = tmp_path / "data.lenlab-session"
+    with path.open("wb") as file:
+        Session("voltmeter", columns={"codes": np.arange(8, dtype="<u2").reshape((4, 2))}).save(
+            file
+        )
+
+    # an incomplete row
+    with path.open("ab") as file:
+        file.write(b"\x01\x02\x03")
+
+    with path.open("r+b") as file:
+        appender = SessionAppender(file)
+        appender.append(np.array([[8, 9]], "<u2"))
+        appender.update()
+
+    codes = Session.load(path).columns["codes"]
+    assert np.array_equal(codes, np.arange(10).reshape((5, 2)))
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "data.lenlab-session"
+    path.write_bytes(b"LENLABR1" + bytes(56))
+    with pytest.raises(InvalidSession):
+        Session.load(path)
+
+    with path.open("wb") as file:
+        Session("voltmeter", columns={"codes": np.arange(8, dtype="<u2").reshape((4, 2))}).save(
+            file
+        )
+
+    # a truncated file
+    path.write_bytes(path.read_bytes()[:-4])
+    with pytest.raises(InvalidSession):
+        Session.load(path)
+
+
+@pytest.mark.parametrize("codes", [True, False])
+def test_points(tmp_path, reply, codes):
+    path = tmp_path / "voltmeter.lenlab-session"
+    points = Points(interval=0.1, codes=codes)
+    for _ in range(3):
+        points.parse_reply(reply)
+
+    with path.open("w+b") as file:
+        points.save_session(file)
+
+    assert not points.unsaved
+
+    loaded = Points.from_session(Session.load(path))
+    assert loaded.index == 3000
+    assert loaded.interval == 0.1
+    assert loaded.codes == codes
+    assert np.array_equal(loaded.channels[0][:], points.channels[0][:])
+    assert np.array_equal(loaded.channels[1][:], points.channels[1][:])
+    assert loaded.get_last_value(1) == points.get_last_value(1)
+
+
+def test_waveform_session(tmp_path):
+    path = tmp_path / "osci.lenlab-session"
+    payload = np.arange(2 * 6000, dtype="<u2") % 4096
+    reply = b"La" + bytes(2) + (40).to_bytes(2, "little") + (3000).to_bytes(2, "little")
+    waveform = Waveform.parse_reply(reply + payload.tobytes())
+    with path.open("wb") as file:
+        waveform.save_session(file, {"sine_index": 12})
+
+    session = Session.load(path)
+    assert session.kind == "oscilloscope"
+    assert session.settings["sine_index"] == 12
+    assert session.columns["codes"].shape == (2, 6000)
+
+    loaded = Waveform.from_session(session)
+    assert loaded.length == waveform.length
+    assert loaded.offset == 3000
+    assert loaded.time_step == waveform.time_step
+    assert np.array_equal(loaded.channels[1], waveform.channels[1])